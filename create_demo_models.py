@@ -4,11 +4,14 @@ Crée des fichiers de démo pour tester le dashboard
 """
 
 import json
-import pickle
 import os
+import sys
 from sklearn.ensemble import RandomForestClassifier
 import numpy as np
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+from model_registry import ModelRegistry
+
 # Créer le dossier models s'il n'existe pas
 os.makedirs('models', exist_ok=True)
 
@@ -21,9 +24,9 @@ X_demo = np.random.rand(100, 10)
 y_demo = np.random.randint(0, 2, 100)
 model.fit(X_demo, y_demo)
 
-# Sauvegarder le modèle
-with open('models/production_model.pkl', 'wb') as f:
-    pickle.dump(model, f)
+# Sauvegarder le modèle (blob du registre + lien models/production_model.pkl)
+registry = ModelRegistry()
+registry.publish(model, 'models/production_model.pkl', 'production')
 
 print(f"✅ Modèle sauvegardé: models/production_model.pkl ({os.path.getsize('models/production_model.pkl') / 1024:.1f} KB)")
 
@@ -40,6 +43,7 @@ metrics = {
 
 with open('models/production_metrics.json', 'w') as f:
     json.dump(metrics, f, indent=2)
+registry.register('models/production_model.pkl', metrics=metrics)
 
 print(f"✅ Métriques sauvegardées: models/production_metrics.json")
 
@@ -48,8 +52,7 @@ print("🆕 Création du modèle candidat...")
 candidate_model = RandomForestClassifier(n_estimators=150, max_depth=15, random_state=43)
 candidate_model.fit(X_demo, y_demo)
 
-with open('models/candidate_model.pkl', 'wb') as f:
-    pickle.dump(candidate_model, f)
+registry.publish(candidate_model, 'models/candidate_model.pkl', 'candidate')
 
 candidate_metrics = {
     'accuracy': 0.892,
@@ -62,6 +65,7 @@ candidate_metrics = {
 
 with open('models/candidate_metrics.json', 'w') as f:
     json.dump(candidate_metrics, f, indent=2)
+registry.register('models/candidate_model.pkl', metrics=candidate_metrics)
 
 print(f"✅ Modèle candidat sauvegardé: models/candidate_model.pkl")
 
@@ -4,15 +4,25 @@ Dashboard Automatique des Résultats MLOps
 Affiche le meilleur modèle déployé et ses métriques
 """
 
-from flask import Flask, render_template, jsonify
+from flask import Flask, render_template, jsonify, Response, stream_with_context
 import json
 import os
-import pickle
 from datetime import datetime
-import pandas as pd
+import sys
+
+# Modules partagés du pipeline (../src)
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '../src'))
+from dataset_stats import DatasetStats
+from tail_reader import tail_lines
+from model_card import CardCache
+from live_updates import LiveBroadcaster
+from model_registry import open_read_only
 
 app = Flask(__name__)
 
+# Fiches des modèles (JSON écrit au déploiement), relues seulement si elles changent
+model_cards = CardCache()
+
 def get_model_info():
     """Récupère les informations du modèle en production"""
     model_path = '../models/production_model.pkl'
@@ -26,32 +36,40 @@ def get_model_info():
         'metrics': {}
     }
     
-    # Charger le modèle
-    if os.path.exists(model_path):
+    # Version pointée par l'étape production dans le registre (lecture seule,
+    # ouvert à la demande: rien n'est créé si le registre n'existe pas)
+    registry = open_read_only('../models')
+    production = registry.stage('production') if registry else None
+    if production:
+        info['deployed'] = True
+        info['version'] = production['version']
+        info['size'] = f"{production['size'] / 1024:.1f} KB"
+        info['deployed_at'] = datetime.fromisoformat(production['stage_updated_at']).strftime('%Y-%m-%d %H:%M:%S')
+        info['model_type'] = production['model_type'] or 'N/A'
+        for key in ('n_estimators', 'max_depth', 'n_features'):
+            if key in production['card']:
+                info[key] = production['card'][key]
+        info['metrics'] = production['metrics']
+    
+    # Modèle déployé avant le registre
+    elif os.path.exists(model_path):
         info['deployed'] = True
         info['size'] = f"{os.path.getsize(model_path) / 1024:.1f} KB"
         info['deployed_at'] = datetime.fromtimestamp(os.path.getmtime(model_path)).strftime('%Y-%m-%d %H:%M:%S')
         
-        try:
-            with open(model_path, 'rb') as f:
-                model = pickle.load(f)
-            info['model_type'] = type(model).__name__
-            
-            # Paramètres du modèle
-            if hasattr(model, 'n_estimators'):
-                info['n_estimators'] = model.n_estimators
-            if hasattr(model, 'max_depth'):
-                info['max_depth'] = model.max_depth
-            if hasattr(model, 'n_features_in_'):
-                info['n_features'] = model.n_features_in_
-        except Exception as e:
-            print(f"Erreur lecture modèle: {e}")
+        # Type et paramètres depuis la fiche du modèle (pas de désérialisation)
+        card = model_cards.get(model_path)
+        if card:
+            info['model_type'] = card['model_type']
+            for key in ('n_estimators', 'max_depth', 'n_features'):
+                if key in card:
+                    info[key] = card[key]
     
     # Charger les métriques
     if os.path.exists(metrics_path):
         try:
             with open(metrics_path, 'r') as f:
-                info['metrics'] = json.load(f)
+                info['metrics'] = dict(info['metrics'], **json.load(f))
         except Exception as e:
             print(f"Erreur lecture métriques: {e}")
     
@@ -62,12 +80,9 @@ def get_deployment_history():
     log_path = '../logs/deployment.log'
     history = []
     
-    if os.path.exists(log_path):
-        with open(log_path, 'r') as f:
-            lines = f.readlines()
-            for line in lines[-20:]:  # 20 dernières lignes
-                if line.strip():
-                    history.append(line.strip())
+    for line in tail_lines(log_path, 20):  # 20 dernières lignes
+        if line.strip():
+            history.append(line.strip())
     
     return history
 
@@ -83,10 +98,12 @@ def get_data_stats():
     
     if os.path.exists(data_path):
         try:
-            df = pd.read_csv(data_path)
-            stats['total_apps'] = len(df)
-            if 'Category' in df.columns:
-                stats['categories'] = df['Category'].nunique()
+            # Agrégats incrémentaux: seules les lignes ajoutées depuis la dernière lecture sont lues
+            dataset_stats = DatasetStats(data_path)
+            dataset_stats.refresh()
+            summary = dataset_stats.summary()
+            stats['total_apps'] = summary['total_apps']
+            stats['categories'] = summary['total_categories']
             stats['last_updated'] = datetime.fromtimestamp(os.path.getmtime(data_path)).strftime('%Y-%m-%d %H:%M:%S')
         except Exception as e:
             print(f"Erreur lecture données: {e}")
@@ -158,6 +175,20 @@ def api_comparison():
     """API: Comparaison des modèles"""
     return jsonify(compare_models())
 
+# Canal de mises à jour en direct: un seul calcul par changement, quel que soit le nombre de clients
+live = LiveBroadcaster()
+live.add_source('model', get_model_info, ['../models'])
+live.add_source('comparison', compare_models, ['../models'])
+live.add_source('history', lambda: {'history': get_deployment_history()}, ['../logs'])
+live.add_source('stats', get_data_stats, ['../data/googleplaystore_clean.csv'])
+
+@app.route('/api/events')
+def api_events():
+    """API: Flux SSE (état complet puis deltas par section)"""
+    return Response(stream_with_context(live.stream()),
+                    mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
 @app.route('/health')
 def health():
     """Health check"""
@@ -172,6 +203,7 @@ if __name__ == '__main__':
     print("📊 API Model: http://localhost:5002/api/model")
     print("📈 API Stats: http://localhost:5002/api/stats")
     print("🔄 API Comparison: http://localhost:5002/api/comparison")
+    print("📡 Flux temps réel: http://localhost:5002/api/events")
     print()
     print("Ctrl+C pour arrêter")
     print("=" * 80)
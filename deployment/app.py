@@ -4,11 +4,19 @@ Serving: google-playstore-success-predictor
 """
 
 import os
-import mlflow
-import pandas as pd
+import sys
 from flask import Flask, request, jsonify
 from flask_cors import CORS
 import logging
+import numpy as np
+
+# Modules partagés (features, service): copiés à côté de app.py par
+# deploy_gcp.sh, lus depuis ../src en développement local.
+# mlflow et pandas sont importés à la demande: seul le chargement depuis le
+# registre MLflow (et la prédiction pyfunc) en a besoin
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '../src'))
+import serving
+from features import REQUEST_KEYS, record_from_request
 
 # Configuration du logging
 logging.basicConfig(level=logging.INFO)
@@ -21,17 +29,48 @@ CORS(app)
 # Configuration
 MODEL_URI = os.getenv("MODEL_URI", "models:/google-playstore-success-predictor/Production")
 MLFLOW_TRACKING_URI = os.getenv("MLFLOW_TRACKING_URI", "http://localhost:5000")
+# Modèle joblib embarqué dans l'image: chemin de service minimal, sans mlflow
+MODEL_PATH = os.getenv("MODEL_PATH", "model.pkl")
 PORT = int(os.getenv("PORT", 8080))
 
+
+def load_model():
+    """
+    Modèle local (chemin de service partagé, avec son pipeline de features)
+    si présent, sinon modèle pyfunc du registre MLflow
+    """
+    if os.path.exists(MODEL_PATH):
+        logger.info(f"Loading model from: {MODEL_PATH}")
+        local_model, pipeline = serving.load_model(MODEL_PATH)
+        return local_model, pipeline, 'local'
+
+    import mlflow.pyfunc
+    logger.info(f"Loading model from: {MODEL_URI}")
+    mlflow.set_tracking_uri(MLFLOW_TRACKING_URI)
+    return mlflow.pyfunc.load_model(MODEL_URI), None, 'mlflow'
+
+
 # Charger le modèle
-logger.info(f"Loading model from: {MODEL_URI}")
 try:
-    mlflow.set_tracking_uri(MLFLOW_TRACKING_URI)
-    model = mlflow.pyfunc.load_model(MODEL_URI)
+    model, feature_pipeline, model_source = load_model()
     logger.info("✅ Model loaded successfully")
 except Exception as e:
     logger.error(f"❌ Failed to load model: {str(e)}")
-    model = None
+    model, feature_pipeline, model_source = None, None, None
+
+
+def expected_features():
+    """Champs lus dans chaque instance selon le modèle chargé"""
+    if model_source == 'mlflow':
+        return [
+            "Rating", "Reviews", "Size", "Installs", "Price",
+            "Content Rating", "Genres", "Last Updated", "Android Ver"
+        ]
+    if feature_pipeline is not None:
+        # Champs bruts de la requête, transformés par le pipeline du modèle
+        return list(REQUEST_KEYS)
+    # Ancien modèle entraîné avec Rating et Reviews uniquement
+    return ["rating", "reviews"]
 
 @app.route("/", methods=["GET"])
 def home():
@@ -61,12 +100,9 @@ def info():
     """Informations sur le modèle"""
     return jsonify({
         "model_name": "google-playstore-success-predictor",
-        "model_uri": MODEL_URI,
+        "model_uri": MODEL_URI if model_source == 'mlflow' else MODEL_PATH,
         "mlflow_tracking_uri": MLFLOW_TRACKING_URI,
-        "expected_features": [
-            "Rating", "Reviews", "Size", "Installs", "Price",
-            "Content Rating", "Genres", "Last Updated", "Android Ver"
-        ],
+        "expected_features": expected_features(),
         "output": "Success prediction (0 or 1)"
     })
 
@@ -75,11 +111,11 @@ def predict():
     """
     Endpoint de prédiction
     
-    Body (JSON):
+    Body (JSON), modèle local (champs listés par /info):
     {
         "instances": [
-            {"Rating": 4.5, "Reviews": 1000, ...},
-            {"Rating": 3.0, "Reviews": 50, ...}
+            {"reviews": 1000, "size": "15M", "price": 0, "category": "GAME", ...},
+            {"reviews": 50, "size": "3M", "price": 1.99, "category": "TOOLS", ...}
         ]
     }
     """
@@ -93,14 +129,23 @@ def predict():
         if not data or "instances" not in data:
             return jsonify({
                 "error": "Invalid input format",
-                "expected": {"instances": [{"feature1": "value1", ...}]}
+                "expected": {"instances": [{"feature1": "value1"}]}
             }), 400
         
-        # Convertir en DataFrame
-        df = pd.DataFrame(data["instances"])
-        
-        # Prédiction
-        predictions = model.predict(df)
+        if model_source == 'local':
+            # Même transformation que prediction_interface/app.py et
+            # src/serving_app.py: pipeline de features du modèle sur les
+            # champs bruts (reviews, size, price, category, ...)
+            if feature_pipeline is not None:
+                rows = [feature_pipeline.transform_one(record_from_request(row))
+                        for row in data["instances"]]
+            else:
+                rows = [serving.legacy_features(row) for row in data["instances"]]
+            predictions = model.predict(np.vstack(rows))
+        else:
+            # Convertir en DataFrame (signature pyfunc)
+            import pandas as pd
+            predictions = model.predict(pd.DataFrame(data["instances"]))
         
         # Retourner les résultats
         return jsonify({
@@ -48,6 +48,8 @@ echo ""
 
 # 5. Build et push l'image
 echo "🏗️  5/7 - Build et push de l'image Docker..."
+# Modules partagés avec src/ (pipeline de features, chemin de service)
+cp ../src/features.py ../src/serving.py ../src/compact_forest.py .
 docker build -t ${IMAGE_NAME}:latest .
 docker push ${IMAGE_NAME}:latest
 echo "✅ Image pushée: ${IMAGE_NAME}:latest"
@@ -6,14 +6,18 @@ Utilise le modèle entraîné par le pipeline MLOps
 """
 
 from flask import Flask, render_template, request, jsonify
-import pandas as pd
-import numpy as np
-import joblib
-import mlflow
+import csv
 import os
 from datetime import datetime
 import logging
-import json
+import sys
+import time
+
+# Modules partagés (features, service): copiés à côté de app.py dans l'image
+# Docker, lus depuis ../src en développement local.
+# Chemin de service minimal: ni pandas ni mlflow au démarrage (python src/import_profile.py)
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '../src'))
+import serving
 
 app = Flask(__name__)
 
@@ -45,35 +49,56 @@ logger = logging.getLogger(__name__)
 # Variable globale pour le modèle
 model = None
 model_info = {}
+feature_pipeline = None
+# Prêt à recevoir du trafic: modèle chargé et préchauffé (/health/ready)
+ready = False
+warmup_metrics = {}
+
+def warm_up(new_model, new_pipeline):
+    """Préchauffe le modèle et précompile les réponses (gabarit, JSON)"""
+    metrics = serving.warm_up(new_model, new_pipeline)
+    start = time.perf_counter()
+    app.jinja_env.get_template('prediction.html')
+    with app.test_request_context():
+        jsonify({'success': True, 'prediction': 'Success', 'confidence': 0.0})
+    metrics['templates_seconds'] = round(time.perf_counter() - start, 4)
+    return metrics
 
 def load_model():
-    """Charge le modèle de production ou le dernier modèle entraîné"""
-    global model, model_info
+    """
+    Charge le modèle de production ou le dernier modèle entraîné, le préchauffe,
+    puis remplace le modèle servi (l'ancien continue de répondre pendant ce temps)
+    """
+    global model, model_info, feature_pipeline, ready, warmup_metrics
     
     try:
         # En production (Cloud Run), charger directement depuis le fichier local
         # Évite le timeout MLflow
         if os.path.exists(MODEL_FILE):
-            model = joblib.load(MODEL_FILE)
-            model_info = {
-                'source': 'Local file',
-                'path': MODEL_FILE,
-                'loaded_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-            }
-            logger.info(f"✅ Modèle chargé depuis fichier: {MODEL_FILE}")
-            return True
+            path, source = MODEL_FILE, 'Local file'
         elif os.path.exists(CANDIDATE_MODEL_FILE):
-            model = joblib.load(CANDIDATE_MODEL_FILE)
-            model_info = {
-                'source': 'Candidate model',
-                'path': CANDIDATE_MODEL_FILE,
-                'loaded_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-            }
-            logger.info(f"✅ Modèle candidat chargé: {CANDIDATE_MODEL_FILE}")
-            return True
+            path, source = CANDIDATE_MODEL_FILE, 'Candidate model'
         else:
             logger.error("❌ Aucun modèle trouvé")
             return False
+
+        new_model, new_pipeline = serving.load_model(path)
+        backend = serving.backend_name(new_model)
+        logger.info(f"✅ Modèle chargé ({source}, moteur {backend}): {path}")
+        metrics = warm_up(new_model, new_pipeline)
+        logger.info(f"🔥 Préchauffage: {metrics['warmup_seconds']:.3f}s "
+                    f"({metrics['warmup_rows']} lignes, {metrics['touched_bytes']} octets lus)")
+
+        model, feature_pipeline, warmup_metrics = new_model, new_pipeline, metrics
+        model_info = {
+            'source': source,
+            'path': path,
+            'backend': backend,
+            'loaded_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            'warmup_seconds': metrics['warmup_seconds'],
+        }
+        ready = True
+        return True
             
     except Exception as e:
         logger.error(f"❌ Erreur chargement modèle: {e}")
@@ -91,9 +116,14 @@ else:
 
 def get_categories():
     """Récupère les catégories disponibles depuis les données"""
+    # Vocabulaire appris par le pipeline de features (évite de relire le CSV)
+    if feature_pipeline is not None and feature_pipeline.categories.get('Category'):
+        return list(feature_pipeline.categories['Category'])
+    
     try:
-        df = pd.read_csv(DATA_FILE)
-        categories = sorted(df['Category'].unique().tolist())
+        # Seule la colonne Category est utile: lecture csv sans pandas
+        with open(DATA_FILE, 'r', encoding='utf-8', newline='') as f:
+            categories = sorted({row['Category'] for row in csv.DictReader(f) if row.get('Category')})
         return categories
     except Exception as e:
         logger.error(f"Erreur lecture catégories: {e}")
@@ -102,21 +132,21 @@ def get_categories():
 def preprocess_input(data):
     """
     Prétraite les données d'entrée pour correspondre au format du modèle
-    Le modèle a été entraîné avec Rating et Reviews uniquement
+    Utilise le pipeline de features sérialisé avec le modèle (sans pandas)
     """
     try:
-        # Le modèle utilise uniquement les colonnes numériques du CSV
-        # Rating (float) et Reviews (int)
-        
-        df = pd.DataFrame({
-            'Rating': [float(data.get('Rating', 0))],
-            'Reviews': [float(data.get('Reviews', 0))]
-        })
+        if feature_pipeline is not None:
+            record = dict(data, **{'Content Rating': data.get('Content_Rating', 'Everyone')})
+            X = feature_pipeline.transform_one(record)
+            logger.info(f"Features utilisées: {feature_pipeline.feature_names}")
+        else:
+            # Ancien modèle entraîné avec Rating et Reviews uniquement
+            X = serving.legacy_features(data)
+            logger.info("Features utilisées: ['Rating', 'Reviews'] (ancien modèle)")
         
-        logger.info(f"Features utilisées: {df.columns.tolist()}")
-        logger.info(f"Valeurs: Rating={df['Rating'].values[0]}, Reviews={df['Reviews'].values[0]}")
+        logger.info(f"Valeurs: {X[0].tolist()}")
         
-        return df
+        return X
         
     except Exception as e:
         logger.error(f"Erreur prétraitement: {e}", exc_info=True)
@@ -181,21 +211,8 @@ def predict():
         # Prétraiter les données
         X = preprocess_input(app_data)
         
-        # Faire la prédiction
-        prediction = model.predict(X)[0]
-        
-        # Essayer d'obtenir la probabilité si disponible
-        confidence = 75.0  # Valeur par défaut
-        try:
-            if hasattr(model, 'predict_proba'):
-                proba = model.predict_proba(X)[0]
-                confidence = float(max(proba) * 100)
-                logger.info(f"Probabilités: {proba}, Confidence: {confidence}")
-            else:
-                logger.info("Le modèle n'a pas de predict_proba, utilise confidence par défaut")
-        except Exception as e:
-            logger.warning(f"Impossible d'obtenir predict_proba: {e}")
-            confidence = 75.0
+        # Faire la prédiction (probabilités si disponibles, sinon confiance par défaut)
+        prediction, confidence = serving.predict_one(model, X)
         
         # Interpréter la prédiction
         success = bool(prediction == 1)
@@ -228,13 +245,28 @@ def predict():
             'error': str(e)
         }), 500
 
+@app.route('/health/live')
+def liveness():
+    """Sonde de vivacité: le processus répond"""
+    return jsonify({'status': 'alive'})
+
+@app.route('/health/ready')
+@app.route('/health')
+def readiness():
+    """Sonde de disponibilité: modèle chargé et préchauffé"""
+    payload = {'status': 'ready' if ready else 'not ready', 'model_loaded': model is not None}
+    payload.update(warmup_metrics)
+    return jsonify(payload), 200 if ready else 503
+
 @app.route('/api/status')
 def status():
     """Status de l'API et du modèle"""
     return jsonify({
         'status': 'running',
         'model_loaded': model is not None,
+        'ready': ready,
         'model_info': model_info,
+        'warmup': warmup_metrics,
         'mlflow_uri': MLFLOW_TRACKING_URI,
         'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
     })
@@ -62,10 +62,18 @@ echo "📦 Préparation des fichiers..."
 if [ -f "../models/model.pkl" ]; then
     echo "✅ Copie du modèle model.pkl"
     cp ../models/model.pkl .
+    # Forêt compacte exportée au déploiement (utilisée si elle correspond au modèle)
+    [ -f "../models/model.cforest" ] && cp ../models/model.cforest .
+    # Export ONNX (SERVING_BACKEND=onnx)
+    [ -f "../models/model.onnx" ] && cp ../models/model.onnx .
 else
     echo "⚠️  Aucun modèle trouvé (sera chargé depuis MLflow)"
 fi
 
+# Copier les modules partagés (requis par app.py) et le profil d'import (build)
+echo "✅ Copie des modules features.py, serving.py, compact_forest.py, onnx_model.py et import_profile.py"
+cp ../src/features.py ../src/serving.py ../src/compact_forest.py ../src/onnx_model.py ../src/import_profile.py .
+
 # ============================================
 # BUILD DE L'IMAGE DOCKER
 # ============================================
@@ -0,0 +1,113 @@
+"""
+Index des Noms d'Applications
+=============================
+Ensemble haché persistant des noms d'applications normalisés (casse et
+espaces), chargé une seule fois puis mis à jour à chaque ajout. Évite de
+relire et parcourir le dataset pour détecter les doublons, y compris pour
+un upload de plusieurs milliers de lignes (recherche par lot).
+
+Sur disque: fichier binaire en ajout seul d'empreintes uint64 (blake2b).
+"""
+
+import hashlib
+import os
+import threading
+import unicodedata
+import numpy as np
+
+from app_store import file_lock
+
+INDEX_FILE = 'data/app_index.bin'
+
+HASH_DTYPE = np.dtype('<u8')
+
+
+def normalize_name(name):
+    """'  Mon   App ' et 'mon app' désignent la même application"""
+    text = unicodedata.normalize('NFKC', str(name))
+    return ' '.join(text.split()).casefold()
+
+
+def name_hash(name):
+    """Empreinte 64 bits du nom normalisé"""
+    digest = hashlib.blake2b(normalize_name(name).encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(digest, 'little')
+
+
+class AppIndex:
+    """Ensemble haché des noms, synchronisé avec son fichier en ajout seul"""
+
+    def __init__(self, path=INDEX_FILE, source=None):
+        """
+        `source` est un appelable retournant tous les noms existants, utilisé
+        pour construire l'index quand le fichier n'existe pas encore
+        """
+        self.path = path
+        self._hashes = set()
+        self._loaded_bytes = 0
+        self._lock = threading.Lock()
+
+        if not os.path.exists(path) and source is not None:
+            self._build(source())
+        self._refresh()
+
+    def _build(self, names):
+        hashes = np.fromiter((name_hash(name) for name in names), dtype=HASH_DTYPE)
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        np.unique(hashes).tofile(tmp_path)
+        os.replace(tmp_path, self.path)
+
+    def _refresh(self):
+        """Lit uniquement les empreintes ajoutées par d'autres processus"""
+        if not os.path.exists(self.path):
+            return
+        # Ignorer une éventuelle empreinte en cours d'écriture
+        pending = (os.path.getsize(self.path) - self._loaded_bytes) // HASH_DTYPE.itemsize
+        if pending <= 0:
+            return
+        with open(self.path, 'rb') as f:
+            f.seek(self._loaded_bytes)
+            tail = np.frombuffer(f.read(pending * HASH_DTYPE.itemsize), dtype=HASH_DTYPE)
+        self._hashes.update(tail.tolist())
+        self._loaded_bytes += tail.nbytes
+
+    def __len__(self):
+        return len(self._hashes)
+
+    def contains(self, name):
+        with self._lock:
+            self._refresh()
+            return name_hash(name) in self._hashes
+
+    def contains_many(self, names):
+        """
+        Recherche par lot: tableau booléen, vrai si le nom existe déjà
+        dans l'index ou apparaît plus haut dans le même lot
+        """
+        hashes = [name_hash(name) for name in names]
+        found = np.zeros(len(hashes), dtype=bool)
+        with self._lock:
+            self._refresh()
+            seen = set()
+            for i, h in enumerate(hashes):
+                found[i] = h in self._hashes or h in seen
+                seen.add(h)
+        return found
+
+    def add(self, name):
+        self.add_many([name])
+
+    def add_many(self, names):
+        hashes = {name_hash(name) for name in names}
+        with self._lock, file_lock(self.path):
+            self._refresh()
+            new = hashes - self._hashes
+            if not new:
+                return 0
+            data = np.fromiter(new, dtype=HASH_DTYPE, count=len(new))
+            with open(self.path, 'ab') as f:
+                f.write(data.tobytes())
+                self._loaded_bytes = f.tell()
+            self._hashes.update(new)
+            return len(new)
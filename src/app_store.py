@@ -0,0 +1,248 @@
+"""
+Store d'Ingestion des Applications
+==================================
+Table SQLite en ajout seul (index unique sur App) qui reçoit les ajouts de
+l'interface web, sans relire ni réécrire le CSV à chaque soumission.
+SQLite sérialise les écrivains concurrents (WAL + busy timeout).
+
+Les lignes en attente sont périodiquement compactées, c'est-à-dire ajoutées
+en fin du CSV canonique lu par le pipeline d'entraînement, sous verrou de
+fichier. Compaction manuelle:
+
+    python src/app_store.py --compact
+"""
+
+import argparse
+import csv
+import fcntl
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+DATA_FILE = 'data/googleplaystore_clean.csv'
+
+# Colonnes du CSV canonique (dans l'ordre)
+COLUMNS = [
+    'App', 'Category', 'Rating', 'Reviews', 'Size', 'Installs', 'Type', 'Price',
+    'Content Rating', 'Genres', 'Last Updated', 'Current Ver', 'Android Ver',
+]
+
+# Politique de compaction par défaut
+COMPACT_EVERY = int(os.environ.get('STORE_COMPACT_EVERY', 100))
+COMPACT_INTERVAL = float(os.environ.get('STORE_COMPACT_INTERVAL', 300))
+
+
+def _quote(column):
+    return '"' + column.replace('"', '""') + '"'
+
+
+def _to_text(value):
+    """Valeur stockée telle qu'elle sera écrite dans le CSV"""
+    if value is None:
+        return ''
+    if isinstance(value, float) and value != value:  # NaN
+        return ''
+    return str(value)
+
+
+@contextmanager
+def file_lock(path):
+    """Verrou exclusif inter-processus sur un fichier .lock voisin"""
+    with open(f"{path}.lock", 'w') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+class AppStore:
+    """Store d'ingestion adossé au CSV canonique"""
+
+    def __init__(self, data_file=DATA_FILE, db_path=None,
+                 compact_every=COMPACT_EVERY, compact_interval=COMPACT_INTERVAL):
+        self.data_file = data_file
+        self.db_path = db_path or os.path.join(os.path.dirname(data_file) or '.', 'ingestion.db')
+        self.compact_every = compact_every
+        self.compact_interval = compact_interval
+        self._last_compaction = time.monotonic()
+        self._init_db()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.execute('PRAGMA busy_timeout = 30000')
+        return conn
+
+    def _init_db(self):
+        columns = ', '.join(f"{_quote(col)} TEXT" for col in COLUMNS)
+        conn = self._connect()
+        try:
+            conn.execute('PRAGMA journal_mode = WAL')
+            conn.execute(f"""
+                CREATE TABLE IF NOT EXISTS apps (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    {columns},
+                    added_at TEXT NOT NULL,
+                    compacted INTEGER NOT NULL DEFAULT 0
+                )
+            """)
+            conn.execute('CREATE UNIQUE INDEX IF NOT EXISTS idx_apps_app ON apps("App")')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_apps_pending ON apps(compacted)')
+
+            # Premier démarrage: indexer les apps déjà présentes dans le CSV
+            empty = conn.execute('SELECT COUNT(*) FROM apps').fetchone()[0] == 0
+            if empty and os.path.exists(self.data_file):
+                self._bootstrap(conn)
+        finally:
+            conn.close()
+
+    def _bootstrap(self, conn):
+        """Import unique du CSV existant (lignes déjà compactées)"""
+        with open(self.data_file, 'r', newline='', encoding='utf-8') as f:
+            reader = csv.DictReader(f)
+            rows = (self._row_values(row, compacted=1) for row in reader)
+            conn.execute('BEGIN')
+            conn.executemany(self._insert_sql('INSERT OR IGNORE'), rows)
+            conn.execute('COMMIT')
+
+    def _insert_sql(self, verb):
+        columns = ', '.join(_quote(col) for col in COLUMNS)
+        placeholders = ', '.join('?' for _ in range(len(COLUMNS) + 2))
+        return f"{verb} INTO apps ({columns}, added_at, compacted) VALUES ({placeholders})"
+
+    def _row_values(self, row, compacted=0):
+        return (*(_to_text(row.get(col)) for col in COLUMNS),
+                datetime.now().isoformat(), compacted)
+
+    def add(self, row):
+        """Ajoute une application; retourne False si elle existe déjà"""
+        conn = self._connect()
+        try:
+            conn.execute(self._insert_sql('INSERT'), self._row_values(row))
+            return True
+        except sqlite3.IntegrityError:
+            return False
+        finally:
+            conn.close()
+
+    def add_many(self, rows):
+        """Ajoute un lot en une transaction; retourne le nombre de lignes insérées"""
+        conn = self._connect()
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            before = conn.total_changes
+            conn.executemany(self._insert_sql('INSERT OR IGNORE'), (self._row_values(row) for row in rows))
+            inserted = conn.total_changes - before
+            conn.execute('COMMIT')
+            return inserted
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        finally:
+            conn.close()
+
+    def app_names(self):
+        """Tous les noms d'applications (en attente et compactées)"""
+        conn = self._connect()
+        try:
+            return [row[0] for row in conn.execute('SELECT "App" FROM apps')]
+        finally:
+            conn.close()
+
+    def count(self):
+        conn = self._connect()
+        try:
+            return conn.execute('SELECT COUNT(*) FROM apps').fetchone()[0]
+        finally:
+            conn.close()
+
+    def pending_count(self):
+        conn = self._connect()
+        try:
+            return conn.execute('SELECT COUNT(*) FROM apps WHERE compacted = 0').fetchone()[0]
+        finally:
+            conn.close()
+
+    def pending_rows(self, limit=None):
+        """
+        Lignes pas encore compactées (dictionnaires au format du CSV), dans
+        l'ordre d'ajout; les `limit` plus récentes si précisé. Lecture seule:
+        ni verrou de fichier ni transaction d'écriture.
+        """
+        columns = ', '.join(_quote(col) for col in COLUMNS)
+        query = f"SELECT id, {columns} FROM apps WHERE compacted = 0 ORDER BY id DESC"
+        conn = self._connect()
+        try:
+            if limit is None:
+                rows = conn.execute(query).fetchall()
+            else:
+                rows = conn.execute(query + ' LIMIT ?', (limit,)).fetchall()
+        finally:
+            conn.close()
+        return [dict(zip(COLUMNS, row[1:])) for row in reversed(rows)]
+
+    def compact(self):
+        """
+        Ajoute les lignes en attente en fin du CSV canonique.
+        Le CSV n'est jamais réécrit; en cas d'erreur il est tronqué à sa taille initiale.
+        """
+        columns = ', '.join(_quote(col) for col in COLUMNS)
+        conn = self._connect()
+        try:
+            with file_lock(self.data_file):
+                # BEGIN IMMEDIATE: les écrivains attendent la fin de la compaction
+                conn.execute('BEGIN IMMEDIATE')
+                rows = conn.execute(
+                    f"SELECT id, {columns} FROM apps WHERE compacted = 0 ORDER BY id"
+                ).fetchall()
+                if not rows:
+                    conn.execute('COMMIT')
+                    return 0
+
+                write_header = not os.path.exists(self.data_file) or os.path.getsize(self.data_file) == 0
+                with open(self.data_file, 'a', newline='', encoding='utf-8') as f:
+                    start = f.tell()
+                    try:
+                        writer = csv.writer(f)
+                        if write_header:
+                            writer.writerow(COLUMNS)
+                        writer.writerows(row[1:] for row in rows)
+                        f.flush()
+                        os.fsync(f.fileno())
+                    except Exception:
+                        f.truncate(start)
+                        raise
+
+                conn.execute('UPDATE apps SET compacted = 1 WHERE compacted = 0 AND id <= ?', (rows[-1][0],))
+                conn.execute('COMMIT')
+                self._last_compaction = time.monotonic()
+                return len(rows)
+        except Exception:
+            if conn.in_transaction:
+                conn.execute('ROLLBACK')
+            raise
+        finally:
+            conn.close()
+
+    def maybe_compact(self):
+        """Compacte si assez de lignes en attente ou si l'intervalle est écoulé"""
+        pending = self.pending_count()
+        elapsed = time.monotonic() - self._last_compaction
+        if pending and (pending >= self.compact_every or elapsed >= self.compact_interval):
+            return self.compact()
+        return 0
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Store d'ingestion des applications")
+    parser.add_argument('--data-file', default=DATA_FILE)
+    parser.add_argument('--compact', action='store_true', help='Compacter les ajouts dans le CSV')
+    args = parser.parse_args()
+
+    store = AppStore(args.data_file)
+    if args.compact:
+        written = store.compact()
+        print(f"✅ {written} application(s) ajoutée(s) à {args.data_file}")
+    print(f"📊 Applications: {store.count()} (en attente: {store.pending_count()})")
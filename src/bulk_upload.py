@@ -0,0 +1,153 @@
+"""
+Upload en Masse: Lecture par Blocs et Validation
+================================================
+Lit un CSV uploadé par blocs, normalise chaque bloc vers le schéma du
+dataset propre (Size en Mo, Installs/Price numériques, Category en
+majuscules...) avec des règles vectorisées, et valide les lignes.
+Les lignes acceptées sont ajoutées au store par lots; les lignes rejetées
+sont écrites dans un rapport CSV téléchargeable (numéro de ligne, raison).
+"""
+
+import csv
+import os
+import uuid
+import numpy as np
+import pandas as pd
+
+from app_store import COLUMNS
+from features import parse_installs, parse_price, parse_size
+
+CHUNKSIZE = int(os.environ.get('UPLOAD_CHUNKSIZE', 5000))
+REPORTS_DIR = 'reports/upload_rejects'
+
+# Valeurs texte acceptées comme "taille inconnue"
+UNKNOWN_SIZES = {'', 'varies with device', 'nan'}
+
+
+def _text(chunk, col, default=''):
+    if col not in chunk.columns:
+        return pd.Series(default, index=chunk.index, dtype=object)
+    return chunk[col].fillna('').astype(str).str.strip().replace('', default)
+
+
+def _format(values):
+    """Nombres écrits comme dans le CSV propre ('19.0'), NaN -> vide"""
+    return pd.Series(values).map(lambda v: '' if np.isnan(v) else repr(float(v))).to_numpy()
+
+
+def validate_chunk(chunk):
+    """
+    Normalise et valide un bloc.
+
+    Retourne (DataFrame des lignes acceptées au schéma COLUMNS,
+              DataFrame des rejets avec les colonnes 'line', 'App', 'errors')
+    """
+    errors = {}
+
+    app = _text(chunk, 'App')
+    errors['App manquant'] = (app == '').to_numpy()
+
+    category = _text(chunk, 'Category').str.upper().str.replace(r'\s+', '_', regex=True)
+    errors['Category manquante'] = (category == '').to_numpy()
+
+    rating = pd.to_numeric(_text(chunk, 'Rating'), errors='coerce').to_numpy(dtype=np.float64)
+    errors['Rating invalide (0 à 5)'] = ~((rating >= 0) & (rating <= 5))
+
+    reviews = parse_installs(_text(chunk, 'Reviews', '0').to_numpy(dtype=str))
+    errors['Reviews invalide'] = ~(reviews >= 0)
+
+    raw_size = _text(chunk, 'Size')
+    size = parse_size(raw_size.to_numpy(dtype=str))
+    unknown_size = raw_size.str.lower().isin(UNKNOWN_SIZES).to_numpy()
+    errors['Size invalide'] = np.isnan(size) & ~unknown_size | (size < 0)
+
+    installs = parse_installs(_text(chunk, 'Installs', '0').to_numpy(dtype=str))
+    errors['Installs invalide'] = ~(installs >= 0)
+
+    price = parse_price(_text(chunk, 'Price', '0').to_numpy(dtype=str))
+    errors['Price invalide'] = ~(price >= 0)
+
+    derived_type = np.where(price > 0, 'Paid', 'Free')
+    app_type = _text(chunk, 'Type').str.capitalize()
+    app_type = app_type.where(app_type != '', derived_type)
+    errors['Type invalide (Free/Paid)'] = ~app_type.isin(['Free', 'Paid']).to_numpy()
+
+    # Une ligne est rejetée si au moins une règle échoue
+    error_matrix = np.column_stack(list(errors.values()))
+    rejected = error_matrix.any(axis=1)
+
+    accepted = pd.DataFrame({
+        'App': app,
+        'Category': category,
+        'Rating': _format(rating),
+        'Reviews': np.nan_to_num(reviews).astype(np.int64).astype(str),
+        'Size': _format(size),
+        'Installs': _format(installs),
+        'Type': app_type,
+        'Price': _format(price),
+        'Content Rating': _text(chunk, 'Content Rating', 'Everyone'),
+        'Genres': _text(chunk, 'Genres', 'Unknown'),
+        'Last Updated': _text(chunk, 'Last Updated'),
+        'Current Ver': _text(chunk, 'Current Ver'),
+        'Android Ver': _text(chunk, 'Android Ver'),
+    }, index=chunk.index)[COLUMNS]
+
+    messages = np.array(list(errors))
+    rejects = pd.DataFrame({
+        # Numéro de ligne dans le fichier uploadé (en-tête = ligne 1)
+        'line': chunk.index[rejected] + 2,
+        'App': app[rejected],
+        'errors': ['; '.join(messages[row]) for row in error_matrix[rejected]],
+    })
+    return accepted[~rejected], rejects
+
+
+class UploadReport:
+    """Rapport des lignes rejetées, écrit au fil de l'eau"""
+
+    def __init__(self, reports_dir=REPORTS_DIR):
+        self.upload_id = uuid.uuid4().hex[:12]
+        self.path = os.path.join(reports_dir, f"{self.upload_id}.csv")
+        self.rejected = 0
+        self._reports_dir = reports_dir
+
+    def write(self, rejects):
+        if rejects.empty:
+            return
+        os.makedirs(self._reports_dir, exist_ok=True)
+        new_file = not os.path.exists(self.path)
+        with open(self.path, 'a', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            if new_file:
+                writer.writerow(['line', 'App', 'errors'])
+            writer.writerows(rejects.itertuples(index=False))
+        self.rejected += len(rejects)
+
+
+def ingest_upload(stream, store, app_index, chunksize=CHUNKSIZE, reports_dir=REPORTS_DIR):
+    """
+    Ingestion d'un upload par blocs: validation, élimination des doublons,
+    ajout par lots. Retourne (nombre de lignes acceptées, UploadReport).
+    """
+    report = UploadReport(reports_dir)
+    accepted_total = 0
+
+    reader = pd.read_csv(stream, dtype=str, keep_default_na=False, chunksize=chunksize)
+    for chunk in reader:
+        accepted, rejects = validate_chunk(chunk)
+
+        # Doublons: déjà présents ou répétés plus haut dans l'upload
+        names = accepted['App'].tolist()
+        duplicates = app_index.contains_many(names)
+        report.write(pd.concat([rejects, pd.DataFrame({
+            'line': accepted.index[duplicates] + 2,
+            'App': accepted['App'][duplicates],
+            'errors': 'Application déjà existante',
+        })]))
+        accepted = accepted[~duplicates]
+
+        # Ajout du lot en une transaction
+        accepted_total += store.add_many(accepted.to_dict('records'))
+        app_index.add_many(accepted['App'].tolist())
+
+    return accepted_total, report
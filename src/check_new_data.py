@@ -1,42 +1,58 @@
 """
 Script pour détecter les nouvelles données
 ==========================================
-Vérifie si de nouvelles applications ont été ajoutées
+Vérifie si des applications ont été ajoutées, modifiées ou supprimées
+depuis le dernier entraînement (voir data_version.py) et écrit le
+manifeste des changements pour l'étape d'entraînement
 """
 
 import os
-import pandas as pd
 from datetime import datetime, timedelta
 
+from data_version import detect_changes, write_manifest, print_manifest, MANIFEST_FILE
+
 def check_new_data():
-    """Vérifie si de nouvelles données sont disponibles"""
+    """
+    Vérifie si de nouvelles données sont disponibles
+    (résultat écrit dans /tmp pour le workflow et retourné à l'orchestrateur)
+    """
     
     # Chemins des fichiers
     data_path = 'data/googleplaystore_clean.csv'
     last_train_file = 'models/last_training_date.txt'
     
-    # Charger les données
+    # Comparer les données à la version du dernier entraînement
     try:
-        df = pd.read_csv(data_path)
-        current_data_count = len(df)
-        print(f"📊 Données actuelles: {current_data_count} applications")
+        manifest = detect_changes(data_path)
+        print_manifest(manifest)
     except Exception as e:
         print(f"❌ Erreur lors du chargement des données: {e}")
         with open('/tmp/has_new_data.txt', 'w') as f:
             f.write('false')
         with open('/tmp/new_data_count.txt', 'w') as f:
             f.write('0')
-        return
+        return {'has_new_data': False, 'new_data_count': 0, 'manifest': None}
     
-    # Vérifier la dernière date d'entraînement
-    if os.path.exists(last_train_file):
-        with open(last_train_file, 'r') as f:
-            last_count = int(f.read().strip())
-        
-        new_data_count = current_data_count - last_count
-        print(f"➕ Nouvelles applications: {new_data_count}")
+    write_manifest(manifest)
+    print(f"📝 Manifeste des changements: {MANIFEST_FILE}")
+    
+    first_run = manifest['previous_version'] is None
+    if first_run and os.path.exists(last_train_file):
+        # Ancien suivi: seul le nombre de lignes était enregistré
+        try:
+            with open(last_train_file, 'r') as f:
+                last_count = int(f.read().strip())
+            manifest['appended'] = manifest['current_rows'] - last_count
+            first_run = False
+            print(f"ℹ️  Pas de version enregistrée, comparaison au nombre de lignes ({last_count})")
+        except ValueError:
+            pass
+    
+    if not first_run:
+        new_data_count = manifest['appended'] + manifest['modified'] + manifest['deleted']
+        print(f"➕ Applications ajoutées, modifiées ou supprimées: {new_data_count}")
         
-        # Seuil: au moins 100 nouvelles applications
+        # Seuil: au moins 100 applications changées
         threshold = 100
         has_new_data = new_data_count >= threshold
         
@@ -47,7 +63,7 @@ def check_new_data():
     else:
         # Première fois - toujours réentraîner
         print("🆕 Première exécution - réentraînement nécessaire")
-        new_data_count = current_data_count
+        new_data_count = manifest['current_rows']
         has_new_data = True
     
     # Écrire les résultats
@@ -60,6 +76,8 @@ def check_new_data():
     print(f"\n{'='*60}")
     print(f"Résultat: {'✅ Réentraînement nécessaire' if has_new_data else '⏳ Attendre plus de données'}")
     print(f"{'='*60}")
+    
+    return {'has_new_data': has_new_data, 'new_data_count': new_data_count, 'manifest': manifest}
 
 if __name__ == '__main__':
     check_new_data()
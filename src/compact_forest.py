@@ -0,0 +1,436 @@
+"""
+Format Compact des Forêts
+=========================
+Sérialise les forêts scikit-learn (RandomForest, ExtraTrees, arbre seul,
+GradientBoosting binaire ou multiclasse) sans le graphe d'objets pickle:
+
+- seuils et valeurs des feuilles en float32, valeurs stockées pour les
+  feuilles seulement
+- indices de features en int16, enfants en int16 (int32 si un arbre dépasse
+  32767 nœuds), indices locaux à chaque arbre
+- compression optionnelle du bloc de données: zstd ou lz4 (si installés)
+
+Le seuil float32 est arrondi vers le bas: pour une entrée float32 (scikit-learn
+convertit X en float32), `x <= seuil32` équivaut exactement à `x <= seuil64`.
+
+La prédiction parcourt tous les arbres en même temps avec NumPy (une
+opération vectorisée par niveau de profondeur), sans scikit-learn.
+
+    python src/compact_forest.py models/model.pkl --codec zstd --report
+"""
+
+import argparse
+import json
+import os
+import struct
+import sys
+import time
+from datetime import datetime
+import numpy as np
+
+MAGIC = b'CFOREST1'
+FORMAT_VERSION = 1
+EXTENSION = '.cforest'
+REPORT_FILE = 'reports/compact_model.json'
+
+# Codec par défaut des exports (none: chargement le plus rapide)
+DEFAULT_CODEC = os.environ.get('COMPACT_MODEL_CODEC', 'none')
+
+# Tolérance de parité sur les probabilités (arrondi float32 des valeurs)
+PROBA_TOLERANCE = 1e-4
+
+FORESTS = ('RandomForestClassifier', 'ExtraTreesClassifier', 'DecisionTreeClassifier')
+BOOSTING = ('GradientBoostingClassifier',)
+
+
+def _codec(name):
+    """(compresser, décompresser) du codec, ou None s'il n'est pas disponible"""
+    if name == 'none':
+        return (lambda data: data), (lambda data: data)
+    if name == 'zstd':
+        try:
+            import zstandard
+        except ImportError:
+            return None
+        return (lambda data: zstandard.ZstdCompressor(level=9).compress(data),
+                lambda data: zstandard.ZstdDecompressor().decompress(data))
+    if name == 'lz4':
+        try:
+            import lz4.frame
+        except ImportError:
+            return None
+        return lz4.frame.compress, lz4.frame.decompress
+    raise ValueError(f"Codec inconnu: {name}")
+
+
+def available_codecs():
+    return [name for name in ('none', 'zstd', 'lz4') if _codec(name) is not None]
+
+
+def supports(model):
+    """Le modèle peut-il être converti (classification, une sortie)?"""
+    name = type(model).__name__
+    if getattr(model, 'n_outputs_', 1) != 1:
+        return False
+    if name in FORESTS:
+        return True
+    return name in BOOSTING and getattr(model, 'loss', None) in ('log_loss', 'deviance')
+
+
+def _floor_float32(values):
+    """Plus grand float32 <= chaque valeur float64"""
+    rounded = values.astype(np.float32)
+    above = rounded.astype(np.float64) > values
+    rounded[above] = np.nextafter(rounded[above], np.float32(-np.inf))
+    return rounded
+
+
+class CompactForest:
+    """Forêt en tableaux plats; interface predict / predict_proba de scikit-learn"""
+
+    def __init__(self, arrays, meta):
+        self.arrays = arrays
+        self.meta = meta
+        self.kind = meta['kind']
+        self.classes_ = np.asarray(meta['classes'])
+        self.n_features_in_ = meta['n_features']
+        self.n_estimators = meta['params'].get('n_estimators')
+        self.max_depth = meta['params'].get('max_depth')
+        if meta.get('feature_pipeline'):
+            self.feature_pipeline_ = meta['feature_pipeline']
+        self._prepare()
+
+    @classmethod
+    def from_model(cls, model):
+        if not supports(model):
+            raise ValueError(f"Modèle non supporté par le format compact: {type(model).__name__}")
+        name = type(model).__name__
+        estimators = np.ravel(getattr(model, 'estimators_', [model]))
+        trees = [estimator.tree_ for estimator in estimators]
+
+        max_nodes = max(tree.node_count for tree in trees)
+        child_dtype = np.int16 if max_nodes <= np.iinfo(np.int16).max else np.int32
+        if model.n_features_in_ > np.iinfo(np.int16).max:
+            raise ValueError("Trop de features pour des indices int16")
+
+        features, thresholds, lefts, rights, leaf_values = [], [], [], [], []
+        node_counts, leaf_counts = [], []
+        for tree in trees:
+            left = tree.children_left.copy()
+            is_leaf = left == -1
+            # Feuilles: enfant gauche = -(indice de feuille + 1), valeurs des feuilles seules
+            left[is_leaf] = -(np.arange(is_leaf.sum()) + 1)
+            value = tree.value[is_leaf][:, 0, :].astype(np.float64)
+            if name in FORESTS:
+                # Probabilités par feuille (comme DecisionTreeClassifier.predict_proba)
+                total = value.sum(axis=1, keepdims=True)
+                value = value / np.where(total == 0, 1, total)
+            features.append(np.where(is_leaf, 0, tree.feature).astype(np.int16))
+            thresholds.append(_floor_float32(np.where(is_leaf, 0.0, tree.threshold)))
+            lefts.append(left.astype(child_dtype))
+            rights.append(np.where(is_leaf, 0, tree.children_right).astype(child_dtype))
+            leaf_values.append(value.astype(np.float32))
+            node_counts.append(tree.node_count)
+            leaf_counts.append(int(is_leaf.sum()))
+
+        arrays = {
+            'feature': np.concatenate(features),
+            'threshold': np.concatenate(thresholds),
+            'left': np.concatenate(lefts),
+            'right': np.concatenate(rights),
+            'leaf_value': np.concatenate(leaf_values),
+            'node_counts': np.array(node_counts, dtype=np.int32),
+            'leaf_counts': np.array(leaf_counts, dtype=np.int32),
+        }
+        meta = {
+            'kind': 'forest' if name in FORESTS else 'boosting',
+            'model_type': name,
+            'classes': model.classes_.tolist(),
+            'n_features': int(model.n_features_in_),
+            'depth': int(max(tree.max_depth for tree in trees)),
+            'params': {'n_estimators': getattr(model, 'n_estimators', 1),
+                       'max_depth': getattr(model, 'max_depth', None)},
+            'feature_pipeline': getattr(model, 'feature_pipeline_', None),
+        }
+        if meta['kind'] == 'boosting':
+            meta['learning_rate'] = float(model.learning_rate)
+            meta['trees_per_stage'] = int(model.estimators_.shape[1])
+            meta['init_raw'] = [0.0] * meta['trees_per_stage']
+            forest = cls(arrays, meta)
+            # Prédiction initiale (a priori des classes): seule l'API publique est utilisée
+            x0 = np.zeros((1, model.n_features_in_))
+            raw = np.asarray(model.decision_function(x0), dtype=np.float64).reshape(1, -1)
+            meta['init_raw'] = (raw - forest._raw(x0))[0].tolist()
+        return cls(arrays, meta)
+
+    def _prepare(self):
+        """Indices globaux (int32/intp) et correspondance nœud -> feuille pour la prédiction"""
+        node_counts = self.arrays['node_counts'].astype(np.intp)
+        leaf_counts = self.arrays['leaf_counts'].astype(np.intp)
+        node_offsets = np.concatenate([[0], np.cumsum(node_counts)])
+        leaf_offsets = np.concatenate([[0], np.cumsum(leaf_counts)])
+        tree_of_node = np.repeat(np.arange(len(node_counts)), node_counts)
+
+        left = self.arrays['left'].astype(np.intp)
+        right = self.arrays['right'].astype(np.intp)
+        is_leaf = left < 0
+        nodes = np.arange(len(left))
+        offsets = node_offsets[tree_of_node]
+
+        self._roots = node_offsets[:-1]
+        self._feature = self.arrays['feature'].astype(np.intp)
+        self._threshold = self.arrays['threshold'].copy()
+        # Une feuille boucle sur elle-même: le parcours peut continuer sans test
+        self._threshold[is_leaf] = np.inf
+        self._left = np.where(is_leaf, nodes, left + offsets)
+        self._right = np.where(is_leaf, nodes, right + offsets)
+        self._leaf = np.zeros(len(left), dtype=np.intp)
+        self._leaf[is_leaf] = -left[is_leaf] - 1 + leaf_offsets[tree_of_node[is_leaf]]
+
+    def _leaf_values(self, X):
+        """Valeurs des feuilles atteintes: (n_lignes, n_arbres, n_sorties)"""
+        X = np.asarray(X, dtype=np.float32)
+        rows = np.arange(len(X))[:, None]
+        nodes = np.broadcast_to(self._roots, (len(X), len(self._roots))).copy()
+        for _ in range(self.meta['depth']):
+            go_left = X[rows, self._feature[nodes]] <= self._threshold[nodes]
+            nodes = np.where(go_left, self._left[nodes], self._right[nodes])
+        return self.arrays['leaf_value'][self._leaf[nodes]].astype(np.float64)
+
+    def _raw(self, X):
+        """Score brut du boosting par classe (sans la prédiction initiale)"""
+        values = self._leaf_values(X)[:, :, 0]
+        per_stage = self.meta['trees_per_stage']
+        staged = values.reshape(len(values), -1, per_stage).sum(axis=1)
+        return self.meta['learning_rate'] * staged
+
+    def predict_proba(self, X):
+        if self.kind == 'forest':
+            return self._leaf_values(X).mean(axis=1)
+        raw = np.asarray(self.meta['init_raw']) + self._raw(X)
+        if raw.shape[1] == 1:
+            positive = 1.0 / (1.0 + np.exp(-raw[:, 0]))
+            return np.column_stack([1.0 - positive, positive])
+        raw = np.exp(raw - raw.max(axis=1, keepdims=True))
+        return raw / raw.sum(axis=1, keepdims=True)
+
+    def predict(self, X):
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
+
+    def touch(self):
+        """Lit tous les tableaux (préchauffage). Retourne le nombre d'octets lus."""
+        touched = 0
+        for array in self.arrays.values():
+            array.sum()
+            touched += array.nbytes
+        return touched
+
+    @property
+    def nbytes(self):
+        return sum(array.nbytes for array in self.arrays.values())
+
+
+def save(forest, path, codec=DEFAULT_CODEC, source_sha256=None):
+    """Écrit la forêt (remplacement atomique). Retourne la taille du fichier."""
+    functions = _codec(codec)
+    if functions is None:
+        raise ValueError(f"Codec {codec} non disponible (pip install {'zstandard' if codec == 'zstd' else codec})")
+
+    layout, chunks, offset = {}, [], 0
+    for name, array in forest.arrays.items():
+        data = np.ascontiguousarray(array).tobytes()
+        layout[name] = {'dtype': array.dtype.str, 'shape': list(array.shape),
+                        'offset': offset, 'nbytes': len(data)}
+        # Alignement sur 8 octets (lecture sans copie par np.frombuffer)
+        padding = -len(data) % 8
+        chunks.append(data + b'\0' * padding)
+        offset += len(data) + padding
+    payload = b''.join(chunks)
+
+    header = dict(forest.meta, format=FORMAT_VERSION, codec=codec, arrays=layout,
+                  payload_size=len(payload), source_sha256=source_sha256)
+    header_bytes = json.dumps(header).encode('utf-8')
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(MAGIC)
+        f.write(struct.pack('<I', len(header_bytes)))
+        f.write(header_bytes)
+        f.write(functions[0](payload))
+    os.replace(tmp_path, path)
+    return os.path.getsize(path)
+
+
+def _read_header(f, path):
+    if f.read(len(MAGIC)) != MAGIC:
+        raise ValueError(f"{path}: pas un fichier de forêt compacte")
+    size, = struct.unpack('<I', f.read(4))
+    return json.loads(f.read(size))
+
+
+def read_header(path):
+    """En-tête seul (métadonnées, empreinte du modèle source), sans lire les tableaux"""
+    with open(path, 'rb') as f:
+        return _read_header(f, path)
+
+
+def load(path):
+    with open(path, 'rb') as f:
+        header = _read_header(f, path)
+        data = f.read()
+    if header.get('format') != FORMAT_VERSION:
+        raise ValueError(f"Version de format non supportée: {header.get('format')}")
+    functions = _codec(header['codec'])
+    if functions is None:
+        raise ValueError(f"Codec {header['codec']} non disponible pour lire {path}")
+    payload = functions[1](data)
+
+    arrays = {}
+    for name, spec in header.pop('arrays').items():
+        count = spec['nbytes'] // np.dtype(spec['dtype']).itemsize
+        array = np.frombuffer(payload, dtype=spec['dtype'], count=count, offset=spec['offset'])
+        arrays[name] = array.reshape(spec['shape'])
+    return CompactForest(arrays, header)
+
+
+def check_parity(model, forest, X):
+    """Compare prédictions et probabilités du modèle d'origine et de la forêt compacte"""
+    X = np.asarray(X, dtype=np.float64)
+    expected = model.predict_proba(X)
+    actual = forest.predict_proba(X)
+    agreement = float(np.mean(model.predict(X) == forest.predict(X)))
+    max_diff = float(np.max(np.abs(expected - actual))) if len(X) else 0.0
+    return {
+        'rows': len(X),
+        'prediction_agreement': agreement,
+        'max_proba_diff': max_diff,
+        'passed': agreement == 1.0 and max_diff <= PROBA_TOLERANCE,
+    }
+
+
+def export(model, path, X_check, codec=DEFAULT_CODEC, source_sha256=None):
+    """
+    Convertit, vérifie la parité sur X_check puis écrit la forêt compacte.
+    Lève ValueError si la parité échoue (le fichier n'est pas écrit).
+    """
+    forest = CompactForest.from_model(model)
+    parity = check_parity(model, forest, X_check)
+    if not parity['passed']:
+        raise ValueError(f"Parité non respectée: {parity}")
+    size = save(forest, path, codec, source_sha256)
+    return dict(parity, path=path, codec=codec, size_bytes=size)
+
+
+def export_sidecar(model, model_path, source_sha256, X_check, codec=DEFAULT_CODEC):
+    """
+    Exporte la forêt compacte à côté du modèle servi (models/model.pkl ->
+    models/model.cforest). Un modèle non supporté ou une parité non respectée
+    retire l'ancien export: le pickle est alors servi.
+    """
+    sidecar = os.path.splitext(model_path)[0] + EXTENSION
+    try:
+        if not supports(model):
+            raise ValueError(f"{type(model).__name__} non supporté")
+        return export(model, sidecar, X_check, codec, source_sha256)
+    except ValueError as e:
+        print(f"   ⚠️  Forêt compacte non disponible: {e}")
+        if os.path.exists(sidecar):
+            os.remove(sidecar)
+        return None
+
+
+def _median_load_seconds(loader, path, repeat=5):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        loader(path)
+        timings.append(time.perf_counter() - start)
+    return float(np.median(timings))
+
+
+def compare_formats(model, X_check, workdir, codecs=None):
+    """Taille et temps de chargement du pickle et du format compact (par codec)"""
+    import joblib
+
+    os.makedirs(workdir, exist_ok=True)
+    pickle_path = os.path.join(workdir, 'compare.pkl')
+    joblib.dump(model, pickle_path)
+    report = {
+        'model_type': type(model).__name__,
+        'pickle': {'size_bytes': os.path.getsize(pickle_path),
+                   'load_seconds': _median_load_seconds(joblib.load, pickle_path)},
+        'compact': {},
+    }
+    os.remove(pickle_path)
+
+    forest = CompactForest.from_model(model)
+    report['parity'] = check_parity(model, forest, X_check)
+    for codec in codecs or available_codecs():
+        path = os.path.join(workdir, f"compare.{codec}{EXTENSION}")
+        size = save(forest, path, codec)
+        report['compact'][codec] = {
+            'size_bytes': size,
+            'load_seconds': _median_load_seconds(load, path),
+            'size_ratio': round(size / report['pickle']['size_bytes'], 4),
+        }
+        # Parité après aller-retour sur disque
+        report['compact'][codec]['round_trip_parity'] = check_parity(model, load(path), X_check)['passed']
+        os.remove(path)
+    return report
+
+
+def print_report(report):
+    pickle = report['pickle']
+    print(f"📦 {report['model_type']}: pickle {pickle['size_bytes'] / 1024:.1f} Ko, "
+          f"chargement {pickle['load_seconds'] * 1000:.1f} ms")
+    for codec, entry in report['compact'].items():
+        print(f"   {codec:>5}: {entry['size_bytes'] / 1024:.1f} Ko ({entry['size_ratio']:.0%}), "
+              f"chargement {entry['load_seconds'] * 1000:.1f} ms, "
+              f"aller-retour {'✅' if entry['round_trip_parity'] else '❌'}")
+    parity = report['parity']
+    print(f"   Parité: {parity['prediction_agreement']:.2%} des prédictions identiques, "
+          f"écart max des probabilités {parity['max_proba_diff']:.2e} ({parity['rows']} lignes)")
+
+
+def _check_rows(model, data_file):
+    """Lignes de vérification: dataset transformé si disponible, sinon lot synthétique"""
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    from features import FeaturePipeline
+    import serving
+
+    pipeline = FeaturePipeline.from_model(model)
+    if pipeline is not None and os.path.exists(data_file):
+        import pandas as pd
+        return pipeline.transform_frame(pd.read_csv(data_file))
+    return serving.synthetic_batch(model, pipeline, 1000)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Format compact des forêts')
+    parser.add_argument('model', help='Modèle joblib (models/model.pkl)')
+    parser.add_argument('--output', help='Fichier compact (défaut: <modèle>.cforest)')
+    parser.add_argument('--codec', default=DEFAULT_CODEC, choices=['none', 'zstd', 'lz4'])
+    parser.add_argument('--data-file', default='data/googleplaystore_clean.csv')
+    parser.add_argument('--report', action='store_true', help='Comparer taille et chargement au pickle')
+    args = parser.parse_args()
+
+    import joblib
+    from model_registry import file_sha256
+
+    model = joblib.load(args.model)
+    X_check = _check_rows(model, args.data_file)
+
+    if args.report:
+        report = compare_formats(model, X_check, os.path.dirname(REPORT_FILE))
+        report['measured_at'] = datetime.now().isoformat()
+        with open(REPORT_FILE, 'w') as f:
+            json.dump(report, f, indent=2)
+        print_report(report)
+        print(f"📝 Rapport: {REPORT_FILE}")
+
+    output = args.output or os.path.splitext(args.model)[0] + EXTENSION
+    try:
+        result = export(model, output, X_check, args.codec, source_sha256=file_sha256(args.model))
+    except ValueError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    print(f"✅ {output}: {result['size_bytes'] / 1024:.1f} Ko ({args.codec}), parité sur {result['rows']} lignes")
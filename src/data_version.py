@@ -0,0 +1,274 @@
+"""
+Versionnage du Dataset
+======================
+À chaque entraînement, enregistre une version du CSV: découpage en blocs de
+CHUNK_ROWS lignes (offsets, empreinte des octets) et empreintes par ligne
+(clé App normalisée, contenu). La vérification suivante compare le fichier à
+cette version:
+
+- fichier inchangé (taille, date): aucune lecture
+- blocs inchangés: vérifiés par une seule empreinte des octets, sans parsing
+- à partir du premier bloc modifié (ou de la fin pour un simple ajout):
+  les lignes sont parsées et comparées pour distinguer ajouts,
+  modifications et suppressions
+
+Le résultat est écrit dans un manifeste de changements exploitable par
+l'entraînement (ajout seul: seules les lignes après le watermark sont nouvelles).
+
+    python src/data_version.py            # changements depuis la dernière version
+    python src/data_version.py --record   # enregistrer la version courante
+"""
+
+import argparse
+import csv
+import hashlib
+import json
+import os
+from collections import Counter
+from datetime import datetime
+import numpy as np
+
+from app_index import name_hash
+
+DATA_PATH = 'data/googleplaystore_clean.csv'
+VERSION_FILE = 'models/data_version.json'
+ROWS_FILE = 'models/data_version_rows.npz'
+MANIFEST_FILE = 'reports/data_changes.json'
+
+CHUNK_ROWS = int(os.environ.get('DATA_VERSION_CHUNK_ROWS', 1000))
+
+HASH_DTYPE = np.dtype('<u8')
+
+
+def _digest(data):
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def _row_hash(fields):
+    digest = hashlib.blake2b('\x1f'.join(fields).encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(digest, 'little')
+
+
+def _records(f):
+    """
+    Enregistrements CSV bruts (offset de début, octets) à partir de la position
+    courante: une ligne physique ne termine l'enregistrement que si le nombre
+    de guillemets lus depuis son début est pair
+    """
+    start = f.tell()
+    buffer = b''
+    while True:
+        line = f.readline()
+        if not line:
+            if buffer.strip():
+                yield start, buffer
+            return
+        buffer += line
+        if buffer.count(b'"') % 2 == 0:
+            if buffer.strip():
+                yield start, buffer
+            start = f.tell()
+            buffer = b''
+
+
+def _scan(f, start, first_row=0, chunk_rows=CHUNK_ROWS):
+    """
+    Parse les enregistrements depuis `start` jusqu'à la fin.
+    Retourne (blocs, noms, empreintes de clé, empreintes de contenu).
+    """
+    chunks, names, keys, contents = [], [], [], []
+    f.seek(start)
+    chunk_start, chunk_data = start, []
+    for offset, raw in _records(f):
+        if not chunk_data:
+            chunk_start = offset
+        chunk_data.append(raw)
+        fields = next(csv.reader([raw.decode('utf-8')]))
+        name = fields[0] if fields else ''
+        names.append(name)
+        keys.append(name_hash(name))
+        contents.append(_row_hash(fields))
+        if len(chunk_data) == chunk_rows:
+            chunks.append(_chunk(chunk_start, chunk_data, first_row + len(names) - chunk_rows))
+            chunk_data = []
+    if chunk_data:
+        chunks.append(_chunk(chunk_start, chunk_data, first_row + len(names) - len(chunk_data)))
+    return (chunks, names,
+            np.array(keys, dtype=HASH_DTYPE), np.array(contents, dtype=HASH_DTYPE))
+
+
+def _chunk(start, records, first_row):
+    data = b''.join(records)
+    return {'start': start, 'end': start + len(data), 'first_row': first_row,
+            'rows': len(records), 'hash': _digest(data)}
+
+
+def _header(f):
+    f.seek(0)
+    return f.readline()
+
+
+def record_version(data_file=DATA_PATH, version_file=VERSION_FILE, rows_file=ROWS_FILE):
+    """Enregistre la version du dataset utilisée pour l'entraînement"""
+    stat = os.stat(data_file)
+    with open(data_file, 'rb') as f:
+        header = _header(f)
+        chunks, _, keys, contents = _scan(f, len(header))
+
+    version = {
+        'data_file': data_file,
+        'recorded_at': datetime.now().isoformat(),
+        'size': stat.st_size,
+        'mtime_ns': stat.st_mtime_ns,
+        'header_hash': _digest(header),
+        'rows': len(keys),
+        'chunk_rows': CHUNK_ROWS,
+        'chunks': chunks,
+    }
+    os.makedirs(os.path.dirname(version_file) or '.', exist_ok=True)
+    np.savez(rows_file, keys=keys, contents=contents)
+    with open(version_file, 'w') as f:
+        json.dump(version, f, indent=2)
+    print(f"✅ Version des données enregistrée: {version['rows']} lignes, {len(chunks)} blocs")
+    return version
+
+
+def load_version(version_file=VERSION_FILE, rows_file=ROWS_FILE):
+    """Dernière version enregistrée (None si absente ou incomplète)"""
+    if not os.path.exists(version_file) or not os.path.exists(rows_file):
+        return None, None
+    with open(version_file, 'r') as f:
+        version = json.load(f)
+    with np.load(rows_file) as rows:
+        return version, (rows['keys'], rows['contents'])
+
+
+def row_fingerprints(df):
+    """
+    Empreinte (uint64) du contenu de chaque ligne d'un DataFrame chargé.
+    Calculée sur les valeurs en texte: identique quel que soit le lecteur
+    (types compacts, codes catégoriels, Spark).
+    """
+    import pandas as pd
+
+    df = df[sorted(df.columns)]
+    text = df.astype(str).where(df.notna(), '')
+    return pd.util.hash_pandas_object(text, index=False).to_numpy(HASH_DTYPE)
+
+
+def attach_training_rows(model, fingerprints):
+    """
+    Sérialise avec le modèle les empreintes de ses lignes d'entraînement: la
+    décision de déploiement ne compare les modèles que sur des lignes qu'aucun
+    des deux n'a vues
+    """
+    model.training_rows_ = np.unique(np.asarray(fingerprints, dtype=HASH_DTYPE))
+    return model
+
+
+def detect_changes(data_file=DATA_PATH, version_file=VERSION_FILE, rows_file=ROWS_FILE):
+    """Compare le dataset à la dernière version enregistrée et retourne le manifeste"""
+    version, rows = load_version(version_file, rows_file)
+    stat = os.stat(data_file)
+    manifest = {
+        'data_file': data_file,
+        'checked_at': datetime.now().isoformat(),
+        'previous_version': version['recorded_at'] if version else None,
+        'watermark': version['rows'] if version else 0,
+    }
+
+    with open(data_file, 'rb') as f:
+        header = _header(f)
+
+        if version is None or _digest(header) != version['header_hash']:
+            # Première version (ou schéma changé): tout est nouveau
+            _, names, _, _ = _scan(f, len(header))
+            return dict(manifest, current_rows=len(names), first_changed_row=0, append_only=False,
+                        changed_chunks=[], appended=len(names), modified=0, deleted=0,
+                        appended_apps=names, modified_apps=[], full_reload=True)
+
+        if stat.st_size == version['size'] and stat.st_mtime_ns == version['mtime_ns']:
+            return dict(manifest, current_rows=version['rows'], first_changed_row=version['rows'],
+                        append_only=True, changed_chunks=[], appended=0, modified=0, deleted=0,
+                        appended_apps=[], modified_apps=[], full_reload=False)
+
+        # Premier bloc dont les octets ont changé (empreinte brute, pas de parsing)
+        changed = None
+        for index, chunk in enumerate(version['chunks']):
+            if chunk['end'] > stat.st_size:
+                changed = index
+                break
+            f.seek(chunk['start'])
+            if _digest(f.read(chunk['end'] - chunk['start'])) != chunk['hash']:
+                changed = index
+                break
+
+        if changed is None:
+            start, first_row = version['size'], version['rows']
+        else:
+            start = version['chunks'][changed]['start']
+            first_row = version['chunks'][changed]['first_row']
+
+        _, names, keys, contents = _scan(f, start, first_row)
+
+    # Comparaison de la zone modifiée: lignes (clé, contenu) disparues ou apparues.
+    # Une ligne apparue dont la clé (nom normalisé) a disparu est une modification.
+    old_rows = Counter(zip(rows[0][first_row:].tolist(), rows[1][first_row:].tolist()))
+    new_rows = Counter(zip(keys.tolist(), contents.tolist()))
+    removed = old_rows - new_rows
+    added = new_rows - old_rows
+    removed_keys = {key for key, _ in removed}
+    added_keys = {key for key, _ in added}
+
+    appended, modified = [], []
+    for name, row in zip(names, zip(keys.tolist(), contents.tolist())):
+        if added[row] > 0:
+            added[row] -= 1
+            (modified if row[0] in removed_keys else appended).append(name)
+    deleted = sum(count for (key, _), count in removed.items() if key not in added_keys)
+
+    return dict(manifest,
+                current_rows=first_row + len(names),
+                first_changed_row=first_row,
+                append_only=changed is None,
+                changed_chunks=[] if changed is None else list(range(changed, len(version['chunks']))),
+                appended=len(appended), modified=len(modified), deleted=deleted,
+                appended_apps=appended, modified_apps=modified, full_reload=False)
+
+
+def write_manifest(manifest, path=MANIFEST_FILE):
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(manifest, f, indent=2)
+    return path
+
+
+def load_manifest(path=MANIFEST_FILE):
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+def print_manifest(manifest):
+    print(f"📊 Données actuelles: {manifest['current_rows']} applications "
+          f"(watermark: {manifest['watermark']})")
+    print(f"   ➕ Ajoutées: {manifest['appended']}")
+    print(f"   ✏️  Modifiées: {manifest['modified']}")
+    print(f"   ➖ Supprimées: {manifest['deleted']}")
+    if not manifest['append_only']:
+        print(f"   ⚠️  Données réécrites à partir de la ligne {manifest['first_changed_row']}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Versionnage du dataset')
+    parser.add_argument('--data-file', default=DATA_PATH)
+    parser.add_argument('--record', action='store_true', help='Enregistrer la version courante')
+    args = parser.parse_args()
+
+    if args.record:
+        record_version(args.data_file)
+    else:
+        manifest = detect_changes(args.data_file)
+        print_manifest(manifest)
+        print(f"📝 Manifeste: {write_manifest(manifest)}")
@@ -0,0 +1,200 @@
+"""
+Statistiques Incrémentales du Dataset
+=====================================
+Agrégats du CSV canonique (nombre d'apps par Category et par Type, somme et
+nombre de notes, total des reviews) tenus à jour sans relire le dataset.
+Le CSV étant en ajout seul, seules les lignes ajoutées depuis la dernière
+mise à jour (après l'offset mémorisé) sont lues. Les agrégats sont
+persistés à côté du dataset; une reconstruction complète n'a lieu qu'à la
+demande ou si le fichier a été réécrit:
+
+    python src/dataset_stats.py --rebuild
+"""
+
+import argparse
+import csv
+import hashlib
+import io
+import json
+import os
+from collections import Counter
+from datetime import datetime
+
+from app_store import DATA_FILE, file_lock
+
+# Octets du début du fichier servant d'empreinte (détection d'une réécriture)
+HEAD_BYTES = 4096
+
+
+def _to_float(value):
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    return None if number != number else number  # NaN
+
+
+def _head_digest(path, length):
+    with open(path, 'rb') as f:
+        return hashlib.blake2b(f.read(length), digest_size=16).hexdigest()
+
+
+def _add_rows(state, rows):
+    """Ajoute des lignes (dictionnaires au format du CSV) aux agrégats `state`"""
+    categories = Counter(state['categories'])
+    types = Counter(state['types'])
+    for row in rows:
+        state['total_apps'] += 1
+        if row.get('Category'):
+            categories[row['Category']] += 1
+        if row.get('Type'):
+            types[row['Type']] += 1
+        rating = _to_float(row.get('Rating'))
+        if rating is not None:
+            state['rating_sum'] += rating
+            state['rating_count'] += 1
+        reviews = _to_float(row.get('Reviews'))
+        if reviews is not None:
+            state['total_reviews'] += int(reviews)
+    state['categories'] = dict(categories)
+    state['types'] = dict(types)
+
+
+class DatasetStats:
+    """Agrégats persistés du dataset, mis à jour par ajout"""
+
+    def __init__(self, data_file=DATA_FILE, path=None):
+        self.data_file = data_file
+        self.path = path or os.path.join(os.path.dirname(data_file) or '.', 'dataset_stats.json')
+        self._state = self._load() or self._empty()
+
+    @staticmethod
+    def _empty():
+        return {
+            'offset': 0,
+            'head_bytes': 0,
+            'head_digest': None,
+            'total_apps': 0,
+            'categories': {},
+            'types': {},
+            'rating_sum': 0.0,
+            'rating_count': 0,
+            'total_reviews': 0,
+            'updated_at': None,
+        }
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return None
+        try:
+            with open(self.path, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _save(self):
+        self._state['updated_at'] = datetime.now().isoformat()
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(self._state, f)
+        os.replace(tmp_path, self.path)
+
+    def _rewritten(self, size):
+        """Le fichier a-t-il été réécrit (tronqué ou début modifié) depuis la dernière lecture?"""
+        state = self._state
+        if size < state['offset']:
+            return True
+        if state['head_bytes'] and _head_digest(self.data_file, state['head_bytes']) != state['head_digest']:
+            return True
+        return False
+
+    def update(self, rows):
+        """Ajoute des lignes (dictionnaires au format du CSV) aux agrégats"""
+        _add_rows(self._state, rows)
+
+    def refresh(self):
+        """
+        Intègre les lignes ajoutées au CSV depuis la dernière mise à jour.
+        À appeler après chaque ingestion (compaction du store, ajout direct).
+        """
+        if not os.path.exists(self.data_file):
+            return 0
+        # Rien d'ajouté depuis la dernière lecture: pas de verrou (pages en lecture seule)
+        size = os.path.getsize(self.data_file)
+        if size == self._state['offset'] and not self._rewritten(size):
+            return 0
+        with file_lock(self.data_file):
+            size = os.path.getsize(self.data_file)
+            if self._rewritten(size):
+                return self._rebuild()
+            if size == self._state['offset']:
+                return 0
+
+            with open(self.data_file, 'rb') as f:
+                header = f.readline()
+                f.seek(max(self._state['offset'], len(header)))
+                tail = f.read(size - f.tell())
+            text = header.decode('utf-8') + tail.decode('utf-8')
+            rows = list(csv.DictReader(io.StringIO(text, newline='')))
+            self.update(rows)
+            self._mark(size)
+            self._save()
+            return len(rows)
+
+    def rebuild(self):
+        """Reconstruction complète à partir du CSV"""
+        with file_lock(self.data_file):
+            return self._rebuild()
+
+    def _rebuild(self):
+        self._state = self._empty()
+        if not os.path.exists(self.data_file):
+            self._save()
+            return 0
+        size = os.path.getsize(self.data_file)
+        with open(self.data_file, 'r', newline='', encoding='utf-8') as f:
+            self.update(csv.DictReader(f))
+        self._mark(size)
+        self._save()
+        return self._state['total_apps']
+
+    def _mark(self, size):
+        state = self._state
+        state['offset'] = size
+        if state['head_bytes'] < HEAD_BYTES:
+            state['head_bytes'] = min(size, HEAD_BYTES)
+            state['head_digest'] = _head_digest(self.data_file, state['head_bytes'])
+
+    def summary(self, pending=()):
+        """
+        Statistiques au format des endpoints /stats (O(1)). pending: lignes
+        pas encore compactées dans le CSV (store), comptées sans être persistées
+        """
+        state = self._state
+        if pending:
+            state = dict(state)
+            _add_rows(state, pending)
+        return {
+            'total_apps': state['total_apps'],
+            'total_categories': len(state['categories']),
+            'categories': dict(sorted(state['categories'].items(), key=lambda item: -item[1])),
+            'avg_rating': state['rating_sum'] / state['rating_count'] if state['rating_count'] else 0,
+            'total_reviews': state['total_reviews'],
+            'free_vs_paid': dict(sorted(state['types'].items(), key=lambda item: -item[1])),
+        }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Statistiques incrémentales du dataset')
+    parser.add_argument('--data-file', default=DATA_FILE)
+    parser.add_argument('--rebuild', action='store_true', help='Reconstruire les agrégats depuis le CSV')
+    args = parser.parse_args()
+
+    stats = DatasetStats(args.data_file)
+    if args.rebuild:
+        stats.rebuild()
+    else:
+        stats.refresh()
+    summary = stats.summary()
+    print(f"📊 Applications: {summary['total_apps']} - Catégories: {summary['total_categories']}")
+    print(f"   ⭐ Note moyenne: {summary['avg_rating']:.2f} - Reviews: {summary['total_reviews']}")
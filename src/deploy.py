@@ -1,16 +1,29 @@
 """
 Script de Déploiement
 =====================
-Gère le déploiement du modèle en staging/production
+Gère le déploiement du modèle en staging/production.
+Les fichiers d'étape (models/production_model.pkl...) sont des liens vers les
+blobs du registre, remplacés atomiquement: aucune copie de modèle, pas de backup
+à maintenir (les versions précédentes restent dans le registre).
 """
 
 import os
-import shutil
 import argparse
+import glob
 from datetime import datetime
 
-def deploy(environment='production', canary=1.0):
-    """Déploie le modèle dans l'environnement spécifié"""
+from model_registry import ModelRegistry
+
+PRODUCTION_MODEL = 'models/production_model.pkl'
+# Un seul lien pour l'étape canary: la fraction du trafic est tracée dans
+# logs/deployment.log (un lien par fraction resterait pendant après le gc)
+CANARY_MODEL = 'models/canary_model.pkl'
+
+def deploy(environment='production', canary=1.0, accuracy=None):
+    """
+    Déploie le modèle dans l'environnement spécifié
+    (accuracy passée par l'orchestrateur, sinon lue dans /tmp/accuracy.txt)
+    """
     
     print("="*60)
     print(f"🚀 DÉPLOIEMENT EN {environment.upper()}")
@@ -18,43 +31,60 @@ def deploy(environment='production', canary=1.0):
     
     candidate_model = 'models/candidate_model.pkl'
     
+    # Version du candidat dans le registre (dédupliquée par empreinte)
+    registry = ModelRegistry()
+    metrics = {}
+    if accuracy is None and os.path.exists('/tmp/accuracy.txt'):
+        with open('/tmp/accuracy.txt', 'r') as f:
+            accuracy = float(f.read().strip())
+    if accuracy is not None:
+        metrics['accuracy'] = accuracy
+    candidate = registry.register(candidate_model, metrics=metrics)
+    print(f"📚 Version: {candidate['version']}")
+    
     if environment == 'staging':
         target_path = 'models/staging_model.pkl'
-        print(f"\n📦 Copie du modèle vers staging...")
-        shutil.copy(candidate_model, target_path)
+        registry.promote('staging', candidate['id'], target_path)
         print(f"✅ Modèle déployé en staging: {target_path}")
     
     elif environment == 'production':
         if canary < 1.0:
             print(f"\n🐤 Déploiement CANARY: {canary*100:.0f}% du trafic")
-            target_path = f'models/canary_model_{canary}.pkl'
+            target_path = CANARY_MODEL
+            stage = 'canary'
+            # Liens par fraction (modèle et carte) laissés par les déploiements précédents
+            for stale in glob.glob('models/canary_model_*'):
+                if os.path.islink(stale):
+                    os.remove(stale)
         else:
             print(f"\n✅ Déploiement PRODUCTION COMPLET")
-            # Backup de l'ancien modèle
-            if os.path.exists('models/production_model.pkl'):
-                backup_path = f"models/production_model_backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pkl"
-                shutil.copy('models/production_model.pkl', backup_path)
-                print(f"💾 Backup créé: {backup_path}")
+            # Production antérieure au registre: l'enregistrer pour pouvoir y revenir
+            if os.path.exists(PRODUCTION_MODEL) and registry.stage('production') is None:
+                previous = registry.register(PRODUCTION_MODEL)
+                registry.promote('production', previous['id'], PRODUCTION_MODEL)
+                print(f"💾 Version précédente enregistrée: {previous['version']}")
             
-            target_path = 'models/production_model.pkl'
+            target_path = PRODUCTION_MODEL
+            stage = 'production'
             
             # Copier les métriques
-            if os.path.exists('/tmp/accuracy.txt'):
-                with open('/tmp/accuracy.txt', 'r') as f:
-                    accuracy = f.read().strip()
+            if accuracy is not None:
                 with open('models/production_metrics.txt', 'w') as f:
-                    f.write(accuracy)
+                    f.write(f"{accuracy:.4f}")
         
-        shutil.copy(candidate_model, target_path)
+        registry.promote(stage, candidate['id'], target_path)
         print(f"✅ Modèle déployé: {target_path}")
     
+    registry.gc()
+    
     # Log du déploiement
-    log_entry = f"{datetime.now().isoformat()} | {environment} | canary={canary}\n"
+    log_entry = f"{datetime.now().isoformat()} | {environment} | canary={canary} | {candidate['version']}\n"
     os.makedirs('logs', exist_ok=True)
     with open('logs/deployment.log', 'a') as f:
         f.write(log_entry)
     
     print("\n" + "="*60)
+    return candidate
 
 def rollback():
     """Rollback vers la version précédente"""
@@ -63,17 +93,15 @@ def rollback():
     print("⚠️  ROLLBACK AUTOMATIQUE")
     print("="*60)
     
-    # Chercher le dernier backup
-    backups = [f for f in os.listdir('models') if f.startswith('production_model_backup_')]
-    if backups:
-        latest_backup = sorted(backups)[-1]
-        backup_path = os.path.join('models', latest_backup)
-        
-        print(f"\n🔄 Restauration du backup: {latest_backup}")
-        shutil.copy(backup_path, 'models/production_model.pkl')
+    # Version précédente de la production, d'après l'historique du registre
+    registry = ModelRegistry()
+    target = registry.rollback_target('production')
+    if target and target['path'] and os.path.exists(target['path']):
+        print(f"\n🔄 Restauration de la version: {target['version']}")
+        registry.promote('production', target['id'], PRODUCTION_MODEL, action='rollback')
         print("✅ Rollback effectué avec succès")
     else:
-        print("❌ Aucun backup disponible")
+        print("❌ Aucune version précédente disponible")
     
     print("="*60)
 
@@ -2,23 +2,109 @@
 Système de Décision Automatique pour le Déploiement
 ===================================================
 Décide si le nouveau modèle doit être déployé
+
+Le critère de stabilité repose sur un bootstrap apparié (src/paired_bootstrap.py):
+candidat et production sont évalués sur les mêmes lignes, celles qu'aucun
+des deux n'a vues à l'entraînement (empreintes des lignes sérialisées avec
+chaque modèle, src/data_version.py), et les intervalles de confiance de la
+différence d'accuracy et de F1 déterminent les points attribués.
 """
 
+import json
 import os
+import numpy as np
+
+from paired_bootstrap import paired_bootstrap, print_report as print_bootstrap_report
+
+DATA_FILE = 'data/googleplaystore_clean.csv'
+CANDIDATE_MODEL = 'models/candidate_model.pkl'
+PRODUCTION_MODEL = 'models/production_model.pkl'
+REPORT_FILE = 'reports/deployment_bootstrap.json'
+
+# Borne basse de l'IC de F1 tolérée pour une amélioration significative (F1 pas dégradé)
+F1_MARGIN = float(os.environ.get('DECISION_F1_MARGIN', 0.01))
+
+def paired_test_predictions(candidate=CANDIDATE_MODEL, production=PRODUCTION_MODEL,
+                            data_file=DATA_FILE, df=None):
+    """
+    Vérité et prédictions des deux modèles sur les lignes qu'aucun des deux
+    n'a vues à l'entraînement, chaque modèle avec son pipeline de features.
+    candidate/production: modèle en mémoire ou chemin; df: données déjà chargées.
+    Retourne None si la comparaison n'est pas possible.
+    """
+    import joblib
+    from data_version import row_fingerprints
+    from features import FeaturePipeline
+    from ingestion import read_playstore_csv
 
-def make_deployment_decision():
-    """Décide si on déploie le nouveau modèle"""
+    paths = [m for m in (candidate, production) if isinstance(m, str)]
+    if df is None:
+        paths.append(data_file)
+    if not all(os.path.exists(p) for p in paths):
+        return None
+    models = [joblib.load(m) if isinstance(m, str) else m for m in (candidate, production)]
+    if any(FeaturePipeline.from_model(m) is None for m in models):
+        # Ancien modèle sans pipeline de features: pas de comparaison ligne à ligne
+        return None
+    if any(getattr(m, 'training_rows_', None) is None for m in models):
+        # Lignes d'entraînement inconnues: le test pourrait contenir des lignes apprises
+        print("   ⚠️  Lignes d'entraînement non enregistrées avec le modèle: pas de comparaison ligne à ligne")
+        return None
+    if df is None:
+        df = read_playstore_csv(data_file)
+    if 'Rating' not in df.columns:
+        return None
+
+    fingerprints = row_fingerprints(df)
+    unseen = np.ones(len(df), dtype=bool)
+    for model in models:
+        unseen &= ~np.isin(fingerprints, model.training_rows_)
+    if not unseen.any():
+        print("   ⚠️  Aucune ligne inédite pour les deux modèles: pas de comparaison ligne à ligne")
+        return None
+    eval_df = df[unseen]
+    y = (eval_df['Rating'] > 4.0).astype(int).to_numpy()
+
+    predictions = [model.predict(FeaturePipeline.from_model(model).transform_frame(eval_df))
+                   for model in models]
+    return y, predictions[0], predictions[1]
+
+def evaluate_stability(candidate=CANDIDATE_MODEL, df=None):
+    """Bootstrap apparié candidat/production, ou None si impossible"""
+    try:
+        rows = paired_test_predictions(candidate, df=df)
+    except Exception as e:
+        print(f"   ⚠️  Comparaison ligne à ligne non disponible: {e}")
+        return None
+    if rows is None:
+        return None
+    report = paired_bootstrap(*rows)
+    if report is None:
+        return None
+    print_bootstrap_report(report)
+    os.makedirs(os.path.dirname(REPORT_FILE), exist_ok=True)
+    with open(REPORT_FILE, 'w') as f:
+        json.dump(report, f, indent=2)
+    return report
+
+def make_deployment_decision(improvement=None, accuracy=None, candidate=CANDIDATE_MODEL, df=None):
+    """
+    Décide si on déploie le nouveau modèle
+    (métriques, candidat et données passés par l'orchestrateur, sinon lus sur disque)
+    """
     
     print("="*60)
     print("🤖 DÉCISION AUTOMATIQUE DE DÉPLOIEMENT")
     print("="*60)
     
     # Lire les métriques
-    with open('/tmp/improvement.txt', 'r') as f:
-        improvement = float(f.read().strip())
+    if improvement is None:
+        with open('/tmp/improvement.txt', 'r') as f:
+            improvement = float(f.read().strip())
     
-    with open('/tmp/accuracy.txt', 'r') as f:
-        accuracy = float(f.read().strip())
+    if accuracy is None:
+        with open('/tmp/accuracy.txt', 'r') as f:
+            accuracy = float(f.read().strip())
     
     # Critères de décision
     score = 0
@@ -51,9 +137,28 @@ def make_deployment_decision():
         score += 10
         print(f"   🟠 Accuracy acceptable: {accuracy:.4f} (+10 pts)")
     
-    # 3. Stabilité (30 points) - Simplifié pour la démo
-    score += 30
-    print(f"   ✅ Modèle stable (+30 pts)")
+    # 3. Stabilité (30 points): intervalles de confiance de la différence
+    bootstrap = evaluate_stability(candidate, df)
+    if bootstrap is None:
+        if os.path.exists(PRODUCTION_MODEL):
+            score += 15
+            print(f"   🟠 Stabilité non vérifiable (comparaison ligne à ligne impossible) (+15 pts)")
+        else:
+            score += 30
+            print(f"   ✅ Premier déploiement, pas de modèle à comparer (+30 pts)")
+    else:
+        accuracy_low, accuracy_high = bootstrap['accuracy_ci']
+        f1_low, f1_high = bootstrap['f1_ci']
+        if accuracy_low > 0 and f1_low > -F1_MARGIN:
+            score += 30
+            print(f"   ✅ Amélioration significative (IC accuracy > 0) (+30 pts)")
+        elif accuracy_high < 0 or f1_high < 0:
+            score -= 30
+            print(f"   ❌ Dégradation significative (IC accuracy [{accuracy_low:+.4f}, {accuracy_high:+.4f}], "
+                  f"F1 [{f1_low:+.4f}, {f1_high:+.4f}]) (-30 pts)")
+        else:
+            score += 15
+            print(f"   🟡 Différence non significative (IC accuracy [{accuracy_low:+.4f}, {accuracy_high:+.4f}]) (+15 pts)")
     
     print(f"\n📊 SCORE FINAL: {score}/{max_score}")
     print("="*60)
@@ -84,6 +189,7 @@ def make_deployment_decision():
         f.write(str(score))
     
     print("="*60)
+    return {'should_deploy': decision, 'score': score, 'bootstrap': bootstrap}
 
 if __name__ == '__main__':
     make_deployment_decision()
@@ -0,0 +1,318 @@
+"""
+Pipeline de Features Partagé (Entraînement et Service)
+======================================================
+Transforme les colonnes brutes du Play Store en matrice de features.
+Ajusté une seule fois par le pipeline d'entraînement, sérialisé avec le
+modèle (attribut `feature_pipeline_`) puis rejoué à l'identique par
+l'interface de prédiction, sans pandas dans le chemin de requête.
+"""
+
+import json
+import math
+import numpy as np
+
+# Version du format sérialisé (à incrémenter si les features changent)
+FEATURE_PIPELINE_VERSION = 1
+
+# Colonnes numériques brutes (parfois stockées en texte: "50,000+", "19M", "$4.99")
+NUMERIC_COLUMNS = ['Reviews', 'Size', 'Price']
+
+# Colonnes catégorielles -> nom de la feature encodée
+CATEGORICAL_COLUMNS = {
+    'Category': 'Category_encoded',
+    'Type': 'Type_encoded',
+    'Content Rating': 'ContentRating_encoded',
+}
+
+# Ordre des colonnes de la matrice (identique au modèle du notebook)
+FEATURE_NAMES = [
+    'Reviews',
+    'Reviews_Log',
+    'Size',
+    'Price',
+    'Category_encoded',
+    'Type_encoded',
+    'ContentRating_encoded',
+]
+
+# Code attribué aux catégories inconnues au moment du fit
+UNKNOWN_CODE = -1
+
+# Caractères de formatage retirés avant conversion (chemins vectorisé et une-ligne)
+FORMAT_CHARS = {
+    'Reviews': ',+',
+    'Installs': ',+',
+    'Size': ',',
+    'Price': '$,',
+}
+
+
+def _clean_strings(values, chars):
+    """Retire les caractères de formatage d'un tableau de chaînes"""
+    arr = np.char.strip(np.asarray(values).astype(str))
+    for char in chars:
+        arr = np.char.replace(arr, char, '')
+    return arr
+
+
+def _strings_to_float(arr):
+    """Conversion vectorisée chaîne -> float64 (NaN si non numérique)"""
+    out = np.full(arr.shape, np.nan, dtype=np.float64)
+    valid = np.char.isdecimal(np.char.replace(arr, '.', '', count=1))
+    if valid.any():
+        out[valid] = arr[valid].astype(np.float64)
+    return out
+
+
+def _as_float(values, chars=''):
+    """Convertit un tableau (numérique ou texte) en float64"""
+    arr = np.asarray(values)
+    if arr.dtype.kind in 'biuf':
+        return arr.astype(np.float64)
+    return _strings_to_float(_clean_strings(arr, chars))
+
+
+def parse_installs(values):
+    """'50,000+' -> 50000.0 (vectorisé)"""
+    return _as_float(values, FORMAT_CHARS['Installs'])
+
+
+def parse_price(values):
+    """'$4.99' -> 4.99 (vectorisé)"""
+    return _as_float(values, FORMAT_CHARS['Price'])
+
+
+def parse_size(values):
+    """'19M' -> 19.0, '500k' -> 0.49 (en Mo), 'Varies with device' -> NaN"""
+    arr = np.asarray(values)
+    if arr.dtype.kind in 'biuf':
+        return arr.astype(np.float64)
+
+    arr = _clean_strings(arr, FORMAT_CHARS['Size'])
+    is_kilo = np.char.endswith(arr, 'k')
+    is_mega = np.char.endswith(arr, 'M')
+    has_unit = is_kilo | is_mega
+    arr = np.where(has_unit, np.char.rstrip(arr, 'kM'), arr)
+
+    sizes = _strings_to_float(arr)
+    sizes[is_kilo] /= 1024.0
+    return sizes
+
+
+# Parseurs vectorisés par colonne (réutilisés par l'ingestion)
+PARSERS = {
+    'Reviews': parse_installs,
+    'Installs': parse_installs,
+    'Size': parse_size,
+    'Price': parse_price,
+}
+
+
+def _parse_scalar(column, value):
+    """
+    Version scalaire des parseurs, pour le chemin une-ligne. Mêmes règles que
+    PARSERS: seuls les nombres décimaux non signés sont acceptés en texte
+    ('-5', '1e3', 'inf' -> NaN, puis valeur de remplissage)
+    """
+    if value is None:
+        return math.nan
+    if isinstance(value, (int, float)):
+        return float(value)
+
+    text = str(value).strip()
+    for char in FORMAT_CHARS.get(column, ''):
+        text = text.replace(char, '')
+    scale = 1.0
+    if column == 'Size' and text.endswith(('k', 'M')):
+        scale = 1.0 / 1024.0 if text.endswith('k') else 1.0
+        text = text.rstrip('kM')
+    if not text.replace('.', '', 1).isdecimal():
+        return math.nan
+    return float(text) * scale
+
+
+def _category_scalar(value):
+    """Valeur catégorielle d'une ligne: manquante (None, NaN) -> 'Unknown', comme dans fit"""
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return 'Unknown'
+    return str(value)
+
+
+class FeaturePipeline:
+    """
+    Transformation des données brutes en features.
+
+    L'état appris est volontairement réduit à des structures simples
+    (valeurs de remplissage et tables de correspondance) pour pouvoir être
+    sérialisé en JSON et rejoué sans pandas ni scikit-learn.
+    """
+
+    def __init__(self, fill_values=None, categories=None):
+        self.fill_values = dict(fill_values or {})
+        self.categories = {col: list(cats) for col, cats in (categories or {}).items()}
+        self._build_lookups()
+
+    def _build_lookups(self):
+        """Précalcule les tables de correspondance catégorie -> code"""
+        # Tableaux triés pour np.searchsorted (chemin vectorisé)
+        self._sorted = {col: np.asarray(cats, dtype=str) for col, cats in self.categories.items()}
+        # Dictionnaires pour le chemin une-ligne
+        self._lookups = {col: {cat: code for code, cat in enumerate(cats)}
+                         for col, cats in self.categories.items()}
+
+    @property
+    def feature_names(self):
+        return list(FEATURE_NAMES)
+
+    def fit(self, df):
+        """Apprend les valeurs de remplissage et les vocabulaires"""
+        self.fill_values = {}
+        for col in NUMERIC_COLUMNS:
+            values = PARSERS[col](df[col].to_numpy()) if col in df.columns else np.array([])
+            median = np.nanmedian(values) if np.isfinite(values).any() else 0.0
+            self.fill_values[col] = float(median)
+
+        self.categories = {}
+        for col in CATEGORICAL_COLUMNS:
+            if col not in df.columns:
+                self.categories[col] = []
+            elif hasattr(df[col], 'cat'):
+                # Colonne déjà codée (ingestion par blocs): vocabulaire = catégories observées
+                series = df[col].cat.remove_unused_categories()
+                values = series.cat.categories.astype(str).tolist()
+                if series.isna().any():
+                    values.append('Unknown')
+                self.categories[col] = sorted(set(values))
+            else:
+                values = df[col].fillna('Unknown').astype(str).to_numpy()
+                self.categories[col] = np.unique(values).tolist()
+
+        self._build_lookups()
+        return self
+
+    def _encode(self, col, values):
+        """Encodage vectorisé via recherche dichotomique dans le vocabulaire"""
+        cats = self._sorted.get(col)
+        values = np.asarray(values).astype(str)
+        if cats is None or len(cats) == 0:
+            return np.full(values.shape, UNKNOWN_CODE, dtype=np.float64)
+
+        codes = np.searchsorted(cats, values)
+        codes = np.minimum(codes, len(cats) - 1)
+        known = cats[codes] == values
+        return np.where(known, codes, UNKNOWN_CODE).astype(np.float64)
+
+    def transform(self, columns, encoded=None):
+        """
+        Transforme un lot de données (dict colonne -> tableau) en matrice
+        numpy de forme (n, len(FEATURE_NAMES)). `encoded` peut fournir des
+        colonnes catégorielles déjà converties en codes du vocabulaire.
+        """
+        encoded = encoded or {}
+        n_rows = len(next(iter({**columns, **encoded}.values()))) if (columns or encoded) else 0
+
+        numeric = {}
+        for col in NUMERIC_COLUMNS:
+            if col in columns:
+                values = PARSERS[col](columns[col])
+            else:
+                values = np.full(n_rows, np.nan)
+            numeric[col] = np.where(np.isnan(values), self.fill_values.get(col, 0.0), values)
+
+        X = np.empty((n_rows, len(FEATURE_NAMES)), dtype=np.float64)
+        X[:, 0] = numeric['Reviews']
+        X[:, 1] = np.log1p(np.maximum(numeric['Reviews'], 0.0))
+        X[:, 2] = numeric['Size']
+        X[:, 3] = numeric['Price']
+        for i, (col, _) in enumerate(CATEGORICAL_COLUMNS.items(), start=4):
+            if col in encoded:
+                X[:, i] = encoded[col]
+            else:
+                X[:, i] = self._encode(col, columns.get(col, np.full(n_rows, 'Unknown')))
+        return X
+
+    def transform_frame(self, df):
+        """Transforme un DataFrame pandas (entraînement)"""
+        columns, encoded = {}, {}
+        for col in (*NUMERIC_COLUMNS, *CATEGORICAL_COLUMNS):
+            if col not in df.columns:
+                continue
+            if hasattr(df[col], 'cat'):
+                # Encoder les seules catégories puis indexer par les codes
+                codes = df[col].cat.codes.to_numpy()
+                mapping = self._encode(col, df[col].cat.categories.to_numpy())
+                unknown = self._encode(col, np.array(['Unknown']))[0]
+                encoded[col] = np.where(codes >= 0, mapping[codes], unknown)
+            elif col in CATEGORICAL_COLUMNS:
+                # Valeurs manquantes -> 'Unknown', comme dans fit
+                columns[col] = df[col].fillna('Unknown').to_numpy()
+            else:
+                columns[col] = df[col].to_numpy()
+        return self.transform(columns, encoded)
+
+    def transform_one(self, record):
+        """Chemin rapide pour une seule ligne (dict), sans allocation pandas"""
+        row = []
+        for col in NUMERIC_COLUMNS:
+            value = _parse_scalar(col, record.get(col))
+            row.append(self.fill_values.get(col, 0.0) if math.isnan(value) else value)
+
+        reviews, size, price = row
+        features = [reviews, math.log1p(max(reviews, 0.0)), size, price]
+        for col in CATEGORICAL_COLUMNS:
+            lookup = self._lookups.get(col, {})
+            features.append(float(lookup.get(_category_scalar(record.get(col)), UNKNOWN_CODE)))
+        return np.array([features], dtype=np.float64)
+
+    def to_dict(self):
+        return {
+            'version': FEATURE_PIPELINE_VERSION,
+            'feature_names': self.feature_names,
+            'fill_values': self.fill_values,
+            'categories': self.categories,
+        }
+
+    @classmethod
+    def from_dict(cls, spec):
+        if spec.get('version') != FEATURE_PIPELINE_VERSION:
+            raise ValueError(f"Version de pipeline de features non supportée: {spec.get('version')}")
+        return cls(spec['fill_values'], spec['categories'])
+
+    def attach(self, model):
+        """Sérialise le pipeline avec le modèle (survit à joblib/pickle)"""
+        model.feature_pipeline_ = self.to_dict()
+        return model
+
+    @classmethod
+    def from_model(cls, model):
+        """Retourne le pipeline attaché au modèle, ou None (anciens modèles)"""
+        spec = getattr(model, 'feature_pipeline_', None)
+        return cls.from_dict(spec) if spec else None
+
+    def save(self, path):
+        with open(path, 'w') as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'r') as f:
+            return cls.from_dict(json.load(f))
+
+
+# Clés des API JSON (snake_case) -> colonnes brutes du dataset
+REQUEST_KEYS = {
+    'reviews': 'Reviews',
+    'size': 'Size',
+    'price': 'Price',
+    'category': 'Category',
+    'type': 'Type',
+    'content_rating': 'Content Rating',
+}
+
+
+def record_from_request(data):
+    """Convertit un payload JSON d'API en enregistrement brut pour transform_one"""
+    record = {col: data[key] for key, col in REQUEST_KEYS.items() if key in data}
+    if 'Type' not in record:
+        record['Type'] = 'Paid' if _parse_scalar('Price', data.get('price', 0)) > 0 else 'Free'
+    return record
@@ -0,0 +1,158 @@
+"""
+Cache des Entraînements
+=======================
+Un rerun du pipeline sur des entrées inchangées (workflow_dispatch, push de
+documentation) réentraînait les trois candidats et leurs plis de CV. Chaque
+entraînement est désormais stocké sous une clé de contenu:
+
+    sha256(données d'entraînement et de test, FEATURE_PIPELINE_VERSION,
+           classe de l'estimateur, get_params(), version de scikit-learn)
+
+L'entrée contient le modèle entraîné et ses métriques (accuracy, F1, scores
+de CV): à clé identique, ni fit ni CV ne sont relancés. Éviction par âge
+(dernière utilisation) puis par taille totale, la moins récemment utilisée
+d'abord.
+
+    FIT_CACHE=0                désactive le cache
+    FIT_CACHE_DIR=.cache/fits  répertoire des entrées
+    FIT_CACHE_MAX_MB=500       taille maximale du cache
+    FIT_CACHE_MAX_AGE_DAYS=14  âge maximal depuis la dernière utilisation
+
+    python src/fit_cache.py            # état du cache
+    python src/fit_cache.py --clear    # vider le cache
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import time
+import numpy as np
+
+from features import FEATURE_PIPELINE_VERSION
+
+ENABLED = os.environ.get('FIT_CACHE', '1') != '0'
+CACHE_DIR = os.environ.get('FIT_CACHE_DIR', '.cache/fits')
+MAX_MB = float(os.environ.get('FIT_CACHE_MAX_MB', 500))
+MAX_AGE_DAYS = float(os.environ.get('FIT_CACHE_MAX_AGE_DAYS', 14))
+
+EXTENSION = '.joblib'
+
+
+def dataset_hash(*arrays):
+    """Empreinte du contenu, de la forme et du type des tableaux (X_train, y_train, ...)"""
+    digest = hashlib.sha256()
+    for array in arrays:
+        array = np.ascontiguousarray(array)
+        digest.update(f"{array.dtype.str}{array.shape}".encode())
+        digest.update(array.tobytes())
+    return digest.hexdigest()
+
+
+def fit_key(estimator, data_hash, **extra):
+    """Clé d'un entraînement: données, version des features, estimateur et paramètres"""
+    import sklearn
+
+    spec = {
+        'data': data_hash,
+        'feature_pipeline_version': FEATURE_PIPELINE_VERSION,
+        'estimator': f"{type(estimator).__module__}.{type(estimator).__qualname__}",
+        # repr: paramètres non sérialisables en JSON (estimateurs imbriqués, fonctions)
+        'params': {k: repr(v) for k, v in sorted(estimator.get_params(deep=True).items())},
+        'sklearn': sklearn.__version__,
+        'extra': extra,
+    }
+    return hashlib.sha256(json.dumps(spec, sort_keys=True).encode()).hexdigest()
+
+
+class FitCache:
+    """Entrées <clé>.joblib: {'model': ..., 'metrics': {...}, 'created_at': ...}"""
+
+    def __init__(self, directory=CACHE_DIR, max_mb=MAX_MB, max_age_days=MAX_AGE_DAYS):
+        self.directory = directory
+        self.max_bytes = max_mb * 1024 * 1024
+        self.max_age_seconds = max_age_days * 24 * 3600
+        self.hits = 0
+        self.misses = 0
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + EXTENSION)
+
+    def get(self, key):
+        """(modèle, métriques) ou None; la date de dernière utilisation est mise à jour"""
+        import joblib
+
+        path = self._path(key)
+        if not os.path.exists(path):
+            self.misses += 1
+            return None
+        try:
+            entry = joblib.load(path)
+        except Exception as e:
+            # Entrée corrompue ou écrite par une autre version: recalculée
+            print(f"   ⚠️  Entrée de cache illisible ({e}), entraînement relancé")
+            os.remove(path)
+            self.misses += 1
+            return None
+        os.utime(path)
+        self.hits += 1
+        return entry['model'], entry['metrics']
+
+    def put(self, key, model, metrics):
+        import joblib
+
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        joblib.dump({'model': model, 'metrics': metrics, 'created_at': time.time()}, tmp_path)
+        os.replace(tmp_path, path)
+
+    def entries(self):
+        """Entrées (chemin, taille, dernière utilisation), la plus récente d'abord"""
+        if not os.path.isdir(self.directory):
+            return []
+        found = []
+        for name in os.listdir(self.directory):
+            if name.endswith(EXTENSION):
+                stat = os.stat(os.path.join(self.directory, name))
+                found.append((os.path.join(self.directory, name), stat.st_size, stat.st_mtime))
+        return sorted(found, key=lambda entry: entry[2], reverse=True)
+
+    def evict(self):
+        """Retire les entrées trop anciennes puis les moins récentes au-delà de la taille maximale"""
+        now = time.time()
+        kept, removed, total = [], 0, 0
+        for path, size, used_at in self.entries():
+            if now - used_at > self.max_age_seconds or total + size > self.max_bytes:
+                os.remove(path)
+                removed += 1
+            else:
+                kept.append(path)
+                total += size
+        return {'entries': len(kept), 'size_bytes': total, 'removed': removed}
+
+    def clear(self):
+        for path, _, _ in self.entries():
+            os.remove(path)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Cache des entraînements')
+    parser.add_argument('--clear', action='store_true', help='Vider le cache')
+    parser.add_argument('--evict', action='store_true', help="Appliquer l'éviction (âge, taille)")
+    args = parser.parse_args()
+
+    cache = FitCache()
+    if args.clear:
+        cache.clear()
+        print(f"🗑️  Cache vidé: {cache.directory}")
+    elif args.evict:
+        stats = cache.evict()
+        print(f"🧹 {stats['removed']} entrée(s) retirée(s), {stats['entries']} conservée(s) "
+              f"({stats['size_bytes'] / 1024 / 1024:.1f} Mo)")
+    entries = cache.entries()
+    print(f"📦 {cache.directory}: {len(entries)} entrée(s), "
+          f"{sum(size for _, size, _ in entries) / 1024 / 1024:.1f} Mo")
+    for path, size, used_at in entries:
+        age_hours = (time.time() - used_at) / 3600
+        print(f"   {os.path.basename(path)[:16]}  {size / 1024:>8.1f} Ko  utilisée il y a {age_hours:.1f} h")
@@ -0,0 +1,177 @@
+"""
+Élagage des Forêts (Sélection d'Ensemble)
+=========================================
+Après l'entraînement, réduit le nombre d'arbres d'une forêt par sélection
+gloutonne: à chaque étape, l'arbre ajouté est celui qui améliore le plus la
+précision de l'ensemble retenu, mesurée hors du sac (OOB, arbres entraînés
+par bootstrap) ou sur des données de validation. Le plus petit ensemble dont
+la précision reste dans la tolérance de celle de la forêt complète est gardé.
+
+Les gains (arbres, taille, latence) sont enregistrés avec les métriques du
+candidat (models/candidate_metrics.json).
+
+    FOREST_PRUNING=0          désactive l'élagage
+    PRUNING_TOLERANCE=0.005   perte de précision acceptée (absolue)
+    PRUNING_MIN_TREES=10      nombre minimal d'arbres conservés
+"""
+
+import copy
+import io
+import os
+import time
+import numpy as np
+
+ENABLED = os.environ.get('FOREST_PRUNING', '1') != '0'
+TOLERANCE = float(os.environ.get('PRUNING_TOLERANCE', 0.005))
+MIN_TREES = int(os.environ.get('PRUNING_MIN_TREES', 10))
+
+PRUNABLE = ('RandomForestClassifier', 'ExtraTreesClassifier')
+
+
+def supports(model, has_validation=False):
+    """
+    Forêt élagable: assez d'arbres, et des échantillons de sélection (hors du
+    sac si bootstrap, sinon un jeu de validation, cf. prune_forest)
+    """
+    return (type(model).__name__ in PRUNABLE
+            and len(getattr(model, 'estimators_', [])) > MIN_TREES
+            and (getattr(model, 'bootstrap', False) or has_validation))
+
+
+def _tree_probas(model, X):
+    """Probabilités de chaque arbre: (n_arbres, n_lignes, n_classes)"""
+    X = np.asarray(X, dtype=np.float32)
+    return np.stack([tree.predict_proba(X) for tree in model.estimators_])
+
+
+def _oob_mask(model, n_rows):
+    """masque[t, i]: la ligne i est hors du sac de l'arbre t"""
+    mask = np.ones((len(model.estimators_), n_rows), dtype=bool)
+    for t, samples in enumerate(model.estimators_samples_):
+        mask[t, samples] = False
+    return mask
+
+
+def greedy_selection(probas, mask, y_index, min_trees=MIN_TREES, tolerance=TOLERANCE):
+    """
+    Sélection gloutonne (sans remise) des arbres.
+    probas: (T, N, C), mask: (T, N) lignes évaluables par arbre, y_index: classe vraie (indice).
+    Retourne (ordre des arbres retenus, précision de référence, courbe de précision).
+    """
+    n_trees, n_rows, _ = probas.shape
+    weighted = probas * mask[:, :, None]
+    rows = np.arange(n_rows)
+
+    def accuracy(total, count):
+        covered = count > 0
+        if not covered.any():
+            return 0.0, 0.0
+        correct = total[covered].argmax(axis=1) == y_index[covered]
+        # Départage: probabilité moyenne de la vraie classe
+        margin = total[covered, y_index[covered]] / count[covered]
+        return float(correct.mean()), float(margin.mean())
+
+    reference, _ = accuracy(weighted.sum(axis=0), mask.sum(axis=0))
+
+    total = np.zeros(probas.shape[1:])
+    count = np.zeros(n_rows)
+    remaining = list(range(n_trees))
+    order, curve = [], []
+    while remaining:
+        candidates = np.array(remaining)
+        # Toutes les extensions possibles évaluées en une fois: (candidats, N, C)
+        totals = total[None] + weighted[candidates]
+        counts = count[None] + mask[candidates]
+        covered = counts > 0
+        predicted = totals.argmax(axis=2) == y_index[None]
+        correct = np.where(covered, predicted, False).sum(axis=1) / np.maximum(covered.sum(axis=1), 1)
+        margin = np.where(covered, totals[:, rows, y_index] / np.maximum(counts, 1), 0).sum(axis=1) \
+            / np.maximum(covered.sum(axis=1), 1)
+        best = int(np.lexsort((margin, correct))[-1])
+
+        tree = remaining.pop(best)
+        total += weighted[tree]
+        count += mask[tree]
+        order.append(tree)
+        curve.append(accuracy(total, count)[0])
+        if len(order) >= min_trees and curve[-1] >= reference - tolerance:
+            break
+    return order, reference, curve
+
+
+def _size_bytes(model):
+    import joblib
+    buffer = io.BytesIO()
+    joblib.dump(model, buffer)
+    return buffer.getbuffer().nbytes
+
+
+def _latency_ms(model, X, repeat=30):
+    """Latence médiane (ms) d'une prédiction d'une ligne"""
+    row = np.asarray(X[:1])
+    model.predict_proba(row)
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        model.predict_proba(row)
+        timings.append(time.perf_counter() - start)
+    return float(np.median(timings) * 1000)
+
+
+def prune_forest(model, X_train, y_train, X_val=None, y_val=None, X_test=None, y_test=None,
+                 tolerance=TOLERANCE, min_trees=MIN_TREES):
+    """
+    Retourne (forêt élaguée, rapport). Sélection hors du sac si la forêt a été
+    entraînée par bootstrap, sinon sur (X_val, y_val). Le rapport compare la
+    forêt complète et la forêt élaguée (précision sur X_test si fourni,
+    taille sérialisée, latence d'une ligne).
+    """
+    if getattr(model, 'bootstrap', False):
+        X_sel, y_sel, source = X_train, y_train, 'oob'
+        mask = _oob_mask(model, len(X_sel))
+    elif X_val is not None:
+        X_sel, y_sel, source = X_val, y_val, 'validation'
+        mask = np.ones((len(model.estimators_), len(X_sel)), dtype=bool)
+    else:
+        raise ValueError("Ni échantillons hors du sac (bootstrap=False) ni données de validation")
+
+    probas = _tree_probas(model, X_sel)
+    y_index = np.searchsorted(model.classes_, np.asarray(y_sel))
+    order, reference, curve = greedy_selection(probas, mask, y_index, min_trees, tolerance)
+
+    pruned = copy.copy(model)
+    pruned.estimators_ = [model.estimators_[t] for t in sorted(order)]
+    pruned.n_estimators = len(pruned.estimators_)
+
+    report = {
+        'selection_data': source,
+        'tolerance': tolerance,
+        'trees_before': len(model.estimators_),
+        'trees_after': pruned.n_estimators,
+        'selection_accuracy_before': round(reference, 4),
+        'selection_accuracy_after': round(curve[-1], 4),
+        'size_bytes_before': _size_bytes(model),
+        'size_bytes_after': _size_bytes(pruned),
+    }
+    if X_test is not None:
+        report['test_accuracy_before'] = round(float(np.mean(model.predict(X_test) == y_test)), 4)
+        report['test_accuracy_after'] = round(float(np.mean(pruned.predict(X_test) == y_test)), 4)
+        report['latency_ms_before'] = round(_latency_ms(model, X_test), 3)
+        report['latency_ms_after'] = round(_latency_ms(pruned, X_test), 3)
+    report['size_saving'] = round(1 - report['size_bytes_after'] / report['size_bytes_before'], 4)
+    if 'latency_ms_before' in report:
+        report['latency_saving'] = round(1 - report['latency_ms_after'] / report['latency_ms_before'], 4)
+    return pruned, report
+
+
+def print_report(report):
+    print(f"   🌲 Arbres: {report['trees_before']} -> {report['trees_after']} "
+          f"(sélection {report['selection_data']}, tolérance {report['tolerance']})")
+    print(f"   Précision {report['selection_data']}: {report['selection_accuracy_before']:.4f} -> "
+          f"{report['selection_accuracy_after']:.4f}")
+    if 'test_accuracy_before' in report:
+        print(f"   Précision test: {report['test_accuracy_before']:.4f} -> {report['test_accuracy_after']:.4f}")
+        print(f"   Latence (1 ligne): {report['latency_ms_before']:.2f} ms -> {report['latency_ms_after']:.2f} ms "
+              f"(-{report['latency_saving']:.0%})")
+    print(f"   Taille: {report['size_bytes_before'] / 1024:.1f} Ko -> {report['size_bytes_after'] / 1024:.1f} Ko "
+          f"(-{report['size_saving']:.0%})")
@@ -5,9 +5,10 @@ Génère un rapport HTML automatique après le déploiement
 
 import json
 import os
-import pickle
 from datetime import datetime
 
+from model_card import read_card
+
 def generate_html_report():
     """Génère un rapport HTML complet"""
     
@@ -22,15 +23,15 @@ def generate_html_report():
     model_info = {}
     model_file = 'models/candidate_model.pkl'
     if os.path.exists(model_file):
-        with open(model_file, 'rb') as f:
-            model = pickle.load(f)
-        model_info['type'] = type(model).__name__
+        # Fiche écrite avec le modèle (pas de désérialisation)
+        card = read_card(model_file) or {}
+        model_info['type'] = card.get('model_type', 'N/A')
         model_info['size'] = f"{os.path.getsize(model_file) / 1024:.1f} KB"
         
-        if hasattr(model, 'n_estimators'):
-            model_info['n_estimators'] = model.n_estimators
-        if hasattr(model, 'max_depth'):
-            model_info['max_depth'] = model.max_depth
+        if 'n_estimators' in card:
+            model_info['n_estimators'] = card['n_estimators']
+        if 'max_depth' in card:
+            model_info['max_depth'] = card['max_depth']
     
     # Générer le HTML
     html = f"""
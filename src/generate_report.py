@@ -7,22 +7,29 @@ import os
 import json
 from datetime import datetime
 
-def generate_report():
-    """Génère un rapport de performance"""
+def generate_report(accuracy=None, improvement=None, version=None):
+    """
+    Génère un rapport de performance
+    (métriques passées par l'orchestrateur, sinon lues dans /tmp)
+    """
     
     print("📝 Génération du rapport...")
     
     # Lire les métriques
-    try:
-        with open('/tmp/accuracy.txt', 'r') as f:
-            accuracy = f.read().strip()
-        with open('/tmp/improvement.txt', 'r') as f:
-            improvement = f.read().strip()
-        with open('/tmp/model_version.txt', 'r') as f:
-            version = f.read().strip()
-    except:
-        print("⚠️  Fichiers de métriques non trouvés")
-        return
+    if accuracy is None:
+        try:
+            with open('/tmp/accuracy.txt', 'r') as f:
+                accuracy = f.read().strip()
+            with open('/tmp/improvement.txt', 'r') as f:
+                improvement = f.read().strip()
+            with open('/tmp/model_version.txt', 'r') as f:
+                version = f.read().strip()
+        except:
+            print("⚠️  Fichiers de métriques non trouvés")
+            return
+    else:
+        # Même format que les fichiers /tmp
+        accuracy, improvement = f"{accuracy:.4f}", f"{improvement:.4f}"
     
     # Créer le rapport
     report = {
@@ -42,6 +49,7 @@ def generate_report():
         json.dump(report, f, indent=2)
     
     print(f"✅ Rapport généré: {report_path}")
+    return report_path
 
 if __name__ == '__main__':
     generate_report()
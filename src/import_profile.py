@@ -0,0 +1,179 @@
+"""
+Profil du Temps d'Import
+========================
+Lance `python -X importtime -c "import <module>"` dans un processus neuf,
+analyse la trace (stderr) et écrit un rapport JSON: temps total, paquets les
+plus coûteux et modules lourds interdits sur le chemin de service.
+
+Exécuté à la construction de l'image de l'interface de prédiction:
+
+    python src/import_profile.py prediction_interface/app.py \\
+        --forbid pandas,mlflow --budget-ms 3000
+
+Code de sortie 1 si un module interdit est importé ou si le budget est dépassé.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from datetime import datetime
+
+REPORT_FILE = 'reports/import_times.json'
+TOP_N = 15
+
+# Format CPython: "import time: <self us> | <cumulative us> | <indentation><module>"
+PREFIX = 'import time:'
+
+
+def parse_importtime(text):
+    """Entrées (module, self_us, cumulative_us, depth) d'une trace -X importtime"""
+    entries = []
+    for line in text.splitlines():
+        if not line.startswith(PREFIX):
+            continue
+        fields = line[len(PREFIX):].split('|')
+        if len(fields) != 3:
+            continue
+        try:
+            self_us, cumulative_us = int(fields[0]), int(fields[1])
+        except ValueError:
+            # Ligne d'en-tête "self [us] | cumulative | imported package"
+            continue
+        name = fields[2].rstrip()
+        # Un espace après '|' puis deux espaces par niveau d'imbrication
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        entries.append({
+            'module': name.strip(),
+            'self_us': self_us,
+            'cumulative_us': cumulative_us,
+            'depth': depth,
+        })
+    return entries
+
+
+def import_chain(entries, index):
+    """
+    Chaîne d'imports menant à entries[index] (du premier niveau au module).
+    La trace est en ordre postfixe: le parent est la première entrée
+    suivante de profondeur inférieure.
+    """
+    chain = [entries[index]['module']]
+    depth = entries[index]['depth']
+    for entry in entries[index + 1:]:
+        if entry['depth'] < depth:
+            chain.append(entry['module'])
+            depth = entry['depth']
+    return list(reversed(chain))
+
+
+def build_report(entries, top=TOP_N, forbid=()):
+    """Agrège la trace par paquet racine (pandas.core.frame -> pandas)"""
+    packages = defaultdict(int)
+    for entry in entries:
+        packages[entry['module'].split('.')[0]] += entry['self_us']
+
+    # Premier import de chaque paquet interdit, avec la chaîne qui l'a déclenché
+    forbidden = {}
+    for index, entry in enumerate(entries):
+        package = entry['module'].split('.')[0]
+        if package in forbid and package not in forbidden:
+            forbidden[package] = import_chain(entries, index)
+
+    # Le temps total est la somme des imports de premier niveau
+    total_us = sum(entry['cumulative_us'] for entry in entries if entry['depth'] == 0)
+    ranked = sorted(packages.items(), key=lambda item: item[1], reverse=True)
+
+    return {
+        'total_ms': round(total_us / 1000, 1),
+        'modules': len(entries),
+        'top_packages': [{'package': name, 'ms': round(us / 1000, 1)} for name, us in ranked[:top]],
+        'forbidden_imported': dict(sorted(forbidden.items())),
+    }
+
+
+def profile_imports(module, cwd='.', python=sys.executable):
+    """Importe le module dans un processus neuf: (entrées de la trace, durée du processus en ms)"""
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(
+        filter(None, [os.path.abspath(cwd), os.environ.get('PYTHONPATH')])))
+    start = time.perf_counter()
+    result = subprocess.run([python, '-X', 'importtime', '-c', f'import {module}'],
+                            cwd=cwd, env=env, capture_output=True, text=True)
+    wall_ms = (time.perf_counter() - start) * 1000
+
+    if result.returncode != 0:
+        # La trace d'erreur suit les lignes "import time:"
+        errors = [line for line in result.stderr.splitlines() if not line.startswith(PREFIX)]
+        raise RuntimeError(f"Import de {module} échoué:\n" + '\n'.join(errors[-10:]))
+    return parse_importtime(result.stderr), wall_ms
+
+
+def load_report(path=REPORT_FILE):
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+def write_report(report, path=REPORT_FILE):
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(report, f, indent=2)
+    return path
+
+
+def print_report(report, previous=None):
+    print(f"⏱️  Import de {report['target']}: {report['total_ms']:.1f} ms "
+          f"({report['modules']} modules, processus: {report['wall_ms']:.0f} ms)")
+    if previous and previous.get('target') == report['target']:
+        delta = report['total_ms'] - previous['total_ms']
+        print(f"   Précédent: {previous['total_ms']:.1f} ms ({delta:+.1f} ms)")
+    for package in report['top_packages']:
+        print(f"   {package['ms']:>8.1f} ms  {package['package']}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Profil du temps d'import d'une application")
+    parser.add_argument('target', help="Fichier (app/app.py) ou module importable")
+    parser.add_argument('--forbid', default='', help="Paquets interdits, séparés par des virgules")
+    parser.add_argument('--budget-ms', type=float, default=None, help="Temps d'import maximal")
+    parser.add_argument('--top', type=int, default=TOP_N)
+    parser.add_argument('--output', default=REPORT_FILE)
+    args = parser.parse_args()
+
+    if args.target.endswith('.py'):
+        cwd = os.path.dirname(args.target) or '.'
+        module = os.path.splitext(os.path.basename(args.target))[0]
+    else:
+        cwd, module = '.', args.target
+    forbid = {name.strip() for name in args.forbid.split(',') if name.strip()}
+
+    try:
+        entries, wall_ms = profile_imports(module, cwd)
+    except RuntimeError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+
+    report = build_report(entries, args.top, forbid)
+    report.update({
+        'target': args.target,
+        'python': sys.version.split()[0],
+        'wall_ms': round(wall_ms, 1),
+        'budget_ms': args.budget_ms,
+        'profiled_at': datetime.now().isoformat(),
+    })
+    previous = load_report(args.output)
+    print_report(report, previous)
+    print(f"📝 Rapport: {write_report(report, args.output)}")
+
+    failed = False
+    for package, chain in report['forbidden_imported'].items():
+        print(f"❌ Module interdit importé au démarrage: {package} ({' -> '.join(chain)})")
+        failed = True
+    if args.budget_ms is not None and report['total_ms'] > args.budget_ms:
+        print(f"❌ Budget dépassé: {report['total_ms']:.1f} ms > {args.budget_ms:.0f} ms")
+        failed = True
+    sys.exit(1 if failed else 0)
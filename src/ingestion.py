@@ -0,0 +1,125 @@
+"""
+Ingestion par Blocs du Dataset
+==============================
+Lit le CSV Play Store par blocs avec des types étroits (float32, codes
+catégoriels) pour que l'entraînement tienne dans un budget mémoire
+fixe, même sur des exports de plusieurs millions de lignes.
+"""
+
+import os
+import numpy as np
+import pandas as pd
+
+from features import PARSERS, CATEGORICAL_COLUMNS
+from profiling import peak_memory_mb
+
+DATA_PATH = 'data/googleplaystore_clean.csv'
+
+# Taille des blocs et budget mémoire (surchargeables par variables d'environnement)
+DEFAULT_CHUNKSIZE = int(os.environ.get('INGEST_CHUNKSIZE', 100_000))
+DEFAULT_MEMORY_BUDGET_MB = float(os.environ.get('INGEST_MEMORY_BUDGET_MB', 0)) or None
+
+# Colonnes texte lues brutes puis converties par les parseurs vectorisés.
+# Flottants uniquement: une valeur manquante ou illisible reste NaN et c'est
+# le pipeline de features qui la remplit (comme au service)
+RAW_NUMERIC_DTYPES = {
+    'Reviews': np.float32,
+    'Size': np.float32,
+    'Installs': np.float32,
+    'Price': np.float32,
+}
+
+# Types explicites à la lecture (les colonnes numériques "texte" restent str)
+READ_DTYPES = {
+    'Rating': np.float32,
+    'Reviews': str,
+    'Size': str,
+    'Installs': str,
+    'Price': str,
+    **{col: str for col in CATEGORICAL_COLUMNS},
+}
+
+USECOLS = list(READ_DTYPES)
+
+
+def _encode_chunk(values, vocabulary):
+    """Convertit un bloc de chaînes en codes, en étendant le vocabulaire"""
+    uniques, inverse = np.unique(values, return_inverse=True)
+    mapping = np.empty(len(uniques), dtype=np.int32)
+    for i, value in enumerate(uniques.tolist()):
+        mapping[i] = vocabulary.setdefault(value, len(vocabulary))
+    return mapping[inverse]
+
+
+def _narrow_chunk(chunk, vocabularies):
+    """Parse et réduit les types d'un bloc"""
+    columns = {}
+    if 'Rating' in chunk.columns:
+        columns['Rating'] = chunk['Rating'].to_numpy(dtype=np.float32, na_value=np.nan)
+
+    for col, dtype in RAW_NUMERIC_DTYPES.items():
+        if col not in chunk.columns:
+            continue
+        values = PARSERS[col](chunk[col].fillna('').to_numpy(dtype=str))
+        columns[col] = values.astype(dtype)
+
+    for col in CATEGORICAL_COLUMNS:
+        if col in chunk.columns:
+            values = chunk[col].fillna('Unknown').to_numpy(dtype=str)
+            columns[col] = _encode_chunk(values, vocabularies.setdefault(col, {}))
+
+    return columns
+
+
+def _codes_dtype(n_categories):
+    """Plus petit entier signé capable de contenir les codes"""
+    for dtype in (np.int8, np.int16, np.int32):
+        if n_categories < np.iinfo(dtype).max:
+            return dtype
+    return np.int64
+
+
+def read_playstore_csv(path=DATA_PATH, chunksize=DEFAULT_CHUNKSIZE, memory_budget_mb=DEFAULT_MEMORY_BUDGET_MB):
+    """
+    Lit le dataset par blocs et retourne un DataFrame compact:
+    numériques en float32 (NaN si manquant), catégorielles en pd.Categorical
+    (codes int8/int16). Lève MemoryError si le budget est dépassé.
+    """
+    vocabularies = {}
+    parts = {}
+    n_rows = 0
+    held_bytes = 0
+
+    header = pd.read_csv(path, nrows=0).columns
+    usecols = [col for col in USECOLS if col in header]
+    dtypes = {col: READ_DTYPES[col] for col in usecols}
+
+    for chunk in pd.read_csv(path, usecols=usecols, dtype=dtypes, chunksize=chunksize):
+        for col, values in _narrow_chunk(chunk, vocabularies).items():
+            parts.setdefault(col, []).append(values)
+            held_bytes += values.nbytes
+        n_rows += len(chunk)
+
+        if memory_budget_mb and peak_memory_mb() > memory_budget_mb:
+            raise MemoryError(
+                f"Budget mémoire dépassé: {peak_memory_mb():.0f} Mo > {memory_budget_mb:.0f} Mo "
+                f"après {n_rows} lignes (réduire INGEST_CHUNKSIZE)"
+            )
+
+    data = {}
+    for col, chunks in parts.items():
+        values = np.concatenate(chunks) if chunks else np.array([])
+        if col in vocabularies:
+            categories = list(vocabularies[col])
+            codes = values.astype(_codes_dtype(len(categories)))
+            data[col] = pd.Categorical.from_codes(codes, categories=categories)
+        else:
+            data[col] = values
+    df = pd.DataFrame(data, columns=[col for col in usecols if col in data])
+
+    print(f"   Ingestion: {n_rows} lignes par blocs de {chunksize}")
+    print(f"   Mémoire dataset: {df.memory_usage(deep=True).sum() / 1024**2:.2f} Mo "
+          f"(blocs: {held_bytes / 1024**2:.2f} Mo)")
+    print(f"   Pic mémoire processus: {peak_memory_mb():.0f} Mo")
+
+    return df
@@ -0,0 +1,146 @@
+"""
+Mises à Jour en Direct (Server-Sent Events)
+===========================================
+Un seul thread surveille les répertoires (models/, logs/, data/) par
+scrutation de leurs empreintes (nom, inode, taille, mtime). Quand un répertoire
+change, seules les sections qui en dépendent sont recalculées, et seules
+les clés modifiées sont diffusées aux clients connectés: le coût côté
+serveur ne dépend pas du nombre de clients.
+"""
+
+import json
+import os
+import queue
+import threading
+import time
+
+POLL_INTERVAL = float(os.environ.get('LIVE_POLL_INTERVAL', 2))
+HEARTBEAT_INTERVAL = 15
+CLIENT_QUEUE_SIZE = 100
+
+
+def directory_signature(path):
+    """Empreinte d'un répertoire (ou fichier): noms, inodes, tailles et mtimes"""
+    if os.path.isfile(path):
+        stat = os.stat(path)
+        return ((os.path.basename(path), stat.st_ino, stat.st_size, stat.st_mtime_ns),)
+    if not os.path.isdir(path):
+        return ()
+    entries = []
+    with os.scandir(path) as it:
+        for entry in it:
+            if entry.is_file():
+                # stat() suit les liens: une promotion (lien remplacé) change l'inode
+                stat = entry.stat()
+                entries.append((entry.name, stat.st_ino, stat.st_size, stat.st_mtime_ns))
+    return tuple(sorted(entries))
+
+
+def dict_delta(old, new):
+    """Clés ajoutées/modifiées et clés supprimées entre deux états"""
+    changed = {key: value for key, value in new.items() if old.get(key) != value}
+    removed = [key for key in old if key not in new]
+    return changed, removed
+
+
+def format_event(event, data):
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+class LiveBroadcaster:
+    """
+    Sections calculées par des fonctions (retournant un dictionnaire),
+    chacune dépendant d'une liste de chemins surveillés
+    """
+
+    def __init__(self, poll_interval=POLL_INTERVAL):
+        self.poll_interval = poll_interval
+        self._sources = {}
+        self._state = {}
+        self._signatures = {}
+        self._clients = set()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def add_source(self, name, compute, paths):
+        self._sources[name] = (compute, list(paths))
+
+    def start(self):
+        """Démarre la surveillance (une seule fois, au premier client)"""
+        with self._lock:
+            if self._thread is None:
+                self._refresh(force=True)
+                self._thread = threading.Thread(target=self._run, name='live-updates', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.poll_interval)
+            try:
+                self._refresh()
+            except Exception as e:
+                print(f"⚠️ Erreur mise à jour en direct: {e}")
+
+    def _refresh(self, force=False):
+        """Recalcule les sections dont un chemin a changé et diffuse les deltas"""
+        changed_paths = set()
+        for path in {p for _, paths in self._sources.values() for p in paths}:
+            signature = directory_signature(path)
+            if self._signatures.get(path) != signature:
+                self._signatures[path] = signature
+                changed_paths.add(path)
+
+        for name, (compute, paths) in self._sources.items():
+            if not force and not changed_paths.intersection(paths):
+                continue
+            new = compute()
+            changed, removed = dict_delta(self._state.get(name, {}), new)
+            self._state[name] = new
+            if not force and (changed or removed):
+                self._broadcast(format_event(name, {'changed': changed, 'removed': removed}))
+
+    def _broadcast(self, message):
+        with self._lock:
+            clients = list(self._clients)
+        for client in clients:
+            try:
+                client.put_nowait(message)
+            except queue.Full:
+                # Client trop lent: il sera resynchronisé par un état complet
+                self._drop(client)
+
+    def _drop(self, client):
+        with self._lock:
+            self._clients.discard(client)
+
+    def stream(self):
+        """Générateur SSE d'un client: état complet puis deltas"""
+        self.start()
+        client = queue.Queue(maxsize=CLIENT_QUEUE_SIZE)
+        with self._lock:
+            self._clients.add(client)
+            snapshot = dict(self._state)
+        try:
+            yield format_event('snapshot', snapshot)
+            while True:
+                with self._lock:
+                    connected = client in self._clients
+                if not connected:
+                    # Retiré pour lenteur: renvoyer l'état complet
+                    with self._lock:
+                        client = queue.Queue(maxsize=CLIENT_QUEUE_SIZE)
+                        self._clients.add(client)
+                        snapshot = dict(self._state)
+                    yield format_event('snapshot', snapshot)
+                try:
+                    yield client.get(timeout=HEARTBEAT_INTERVAL)
+                except queue.Empty:
+                    # Commentaire SSE: maintient la connexion ouverte
+                    yield ": heartbeat\n\n"
+        finally:
+            self._drop(client)
+
+    @property
+    def client_count(self):
+        with self._lock:
+            return len(self._clients)
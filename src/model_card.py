@@ -0,0 +1,101 @@
+"""
+Fiches des Modèles
+==================
+Chaque modèle sauvegardé (models/xxx.pkl) est accompagné d'une fiche JSON
+(models/xxx.card.json) avec son type et ses paramètres principaux. Les
+lecteurs (dashboard, rapports, analyse) lisent la fiche au lieu de
+désérialiser le modèle.
+
+Générer les fiches manquantes de modèles existants:
+
+    python src/model_card.py models/*.pkl
+"""
+
+import json
+import os
+import sys
+from datetime import datetime
+
+
+def card_path(model_path):
+    """models/production_model.pkl -> models/production_model.card.json"""
+    root, _ = os.path.splitext(model_path)
+    return f"{root}.card.json"
+
+
+def build_card(model, model_path):
+    """Fiche d'un modèle déjà écrit sur disque"""
+    card = {
+        'model_type': type(model).__name__,
+        'size_bytes': os.path.getsize(model_path),
+        'created_at': datetime.now().isoformat(),
+    }
+    # Paramètres affichés par le dashboard et les rapports
+    if hasattr(model, 'n_estimators'):
+        card['n_estimators'] = model.n_estimators
+    if hasattr(model, 'max_depth'):
+        card['max_depth'] = model.max_depth
+    if hasattr(model, 'n_features_in_'):
+        card['n_features'] = int(model.n_features_in_)
+    pipeline = getattr(model, 'feature_pipeline_', None)
+    if pipeline:
+        card['feature_names'] = list(pipeline.get('feature_names', []))
+    return card
+
+
+def write_card(model, model_path):
+    """Écrit la fiche à côté du modèle (remplacement atomique)"""
+    card = build_card(model, model_path)
+    path = card_path(model_path)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(card, f, indent=2)
+    os.replace(tmp_path, path)
+    return card
+
+
+def read_card(model_path):
+    """Fiche du modèle, ou None si absente ou périmée (taille différente du modèle)"""
+    path = card_path(model_path)
+    if not os.path.exists(path) or not os.path.exists(model_path):
+        return None
+    try:
+        with open(path, 'r') as f:
+            card = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if card.get('size_bytes') != os.path.getsize(model_path):
+        return None
+    return card
+
+
+class CardCache:
+    """Fiches en mémoire, relues seulement si le modèle ou la fiche a changé (inode, mtime)"""
+
+    def __init__(self):
+        self._cache = {}
+
+    def get(self, model_path):
+        try:
+            # Les liens d'étape changent de cible à la promotion: l'inode suit le blob pointé
+            model_stat, card_stat = os.stat(model_path), os.stat(card_path(model_path))
+            key = (model_stat.st_ino, model_stat.st_mtime_ns, card_stat.st_ino, card_stat.st_mtime_ns)
+        except OSError:
+            self._cache.pop(model_path, None)
+            return None
+        cached = self._cache.get(model_path)
+        if cached is None or cached[0] != key:
+            cached = (key, read_card(model_path))
+            self._cache[model_path] = cached
+        return cached[1]
+
+
+if __name__ == '__main__':
+    import joblib
+
+    for model_path in sys.argv[1:]:
+        if read_card(model_path):
+            print(f"✅ {card_path(model_path)} (à jour)")
+            continue
+        card = write_card(joblib.load(model_path), model_path)
+        print(f"✅ {card_path(model_path)}: {card['model_type']}")
@@ -0,0 +1,408 @@
+"""
+Registre Local des Modèles
+==========================
+Index unique (SQLite en mode WAL, models/registry.db) des versions de
+modèles: empreinte SHA-256, taille, fichier, fiche (type, paramètres),
+métriques, et pointeurs d'étape (candidate, staging, canary, production,
+serving). Promotion et rollback sont des mises à jour de pointeurs,
+historisées; les lecteurs (dashboard, rollback, analyse) font une recherche
+par clé au lieu de lister et relire le répertoire models/.
+
+Les octets de chaque version sont stockés une seule fois, adressés par leur
+contenu (models/blobs/<sha256>.pkl, en lecture seule). Les fichiers d'étape
+(models/production_model.pkl, models/model.pkl...) sont des liens
+symboliques remplacés atomiquement (os.replace): promotion, canary et
+rollback ne copient aucune donnée et un lecteur ne voit jamais de fichier
+à moitié écrit. Les versions anciennes et non référencées sont supprimées
+selon la politique de rétention (MODEL_RETENTION).
+
+    python src/model_registry.py              # versions et étapes
+    python src/model_registry.py --register models/candidate_model.pkl --stage candidate
+    python src/model_registry.py --gc         # supprimer les versions hors rétention
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import sqlite3
+import stat
+import urllib.parse
+from datetime import datetime
+
+from model_card import card_path, read_card, write_card
+
+MODELS_DIR = 'models'
+REGISTRY_DB = 'registry.db'
+BLOBS_DIR = 'blobs'
+
+# Nombre de versions récentes conservées en plus de celles pointées par une étape
+RETENTION = int(os.environ.get('MODEL_RETENTION', 5))
+
+STAGES = ('candidate', 'staging', 'canary', 'production', 'serving')
+
+
+def file_sha256(path, block_size=1024 * 1024):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def atomic_symlink(target, link_path):
+    """Fait pointer link_path sur target en une seule opération (os.replace)"""
+    relative = os.path.relpath(target, os.path.dirname(link_path) or '.')
+    tmp_path = f"{link_path}.{os.getpid()}.tmp"
+    if os.path.lexists(tmp_path):
+        os.remove(tmp_path)
+    os.symlink(relative, tmp_path)
+    os.replace(tmp_path, link_path)
+
+
+def open_read_only(models_dir=MODELS_DIR):
+    """
+    Registre en lecture seule pour les processus qui ne font que le consulter
+    (tableau de bord, analyses), ou None s'il n'a pas encore été créé
+    """
+    if not os.path.exists(os.path.join(models_dir, REGISTRY_DB)):
+        return None
+    return ModelRegistry(models_dir, read_only=True)
+
+
+class ModelRegistry:
+    """Versions de modèles et pointeurs d'étape"""
+
+    def __init__(self, models_dir=MODELS_DIR, db_path=None, read_only=False):
+        self.models_dir = models_dir
+        self.db_path = db_path or os.path.join(models_dir, REGISTRY_DB)
+        self.blobs_dir = os.path.join(models_dir, BLOBS_DIR)
+        # Lecture seule (outils de consultation): ni répertoire ni base créés
+        self.read_only = read_only
+        if not read_only:
+            os.makedirs(self.blobs_dir, exist_ok=True)
+            self._init_db()
+
+    def _connect(self):
+        if self.read_only:
+            uri = f"file:{urllib.parse.quote(os.path.abspath(self.db_path))}?mode=ro"
+            conn = sqlite3.connect(uri, uri=True, timeout=30, isolation_level=None)
+        else:
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        conn.execute('PRAGMA busy_timeout = 30000')
+        return conn
+
+    def _init_db(self):
+        conn = self._connect()
+        try:
+            conn.execute('PRAGMA journal_mode = WAL')
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS versions (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    version TEXT NOT NULL UNIQUE,
+                    sha256 TEXT NOT NULL UNIQUE,
+                    size INTEGER NOT NULL,
+                    path TEXT NOT NULL,
+                    model_type TEXT,
+                    card TEXT,
+                    metrics TEXT,
+                    created_at TEXT NOT NULL
+                )
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS stages (
+                    stage TEXT PRIMARY KEY,
+                    version_id INTEGER NOT NULL REFERENCES versions(id),
+                    path TEXT,
+                    updated_at TEXT NOT NULL
+                )
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS stage_events (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    stage TEXT NOT NULL,
+                    action TEXT NOT NULL,
+                    version_id INTEGER NOT NULL,
+                    previous_version_id INTEGER,
+                    at TEXT NOT NULL
+                )
+            """)
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_events_stage ON stage_events(stage, version_id)')
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _record(row):
+        if row is None:
+            return None
+        record = dict(row)
+        record['card'] = json.loads(record['card']) if record.get('card') else {}
+        record['metrics'] = json.loads(record['metrics']) if record.get('metrics') else {}
+        return record
+
+    def blob_path(self, sha256):
+        return os.path.join(self.blobs_dir, f"{sha256}.pkl")
+
+    def _store_blob(self, path, sha256, move=False):
+        """
+        Place les octets dans le stockage adressé par contenu.
+        move=True: le fichier (temporaire) est renommé, sans copie.
+        """
+        blob = self.blob_path(sha256)
+        if os.path.exists(blob):
+            if move:
+                os.remove(path)
+                if os.path.exists(card_path(path)):
+                    os.remove(card_path(path))
+            return blob
+
+        tmp_path = f"{blob}.{os.getpid()}.tmp"
+        if move:
+            os.replace(path, tmp_path)
+        else:
+            # Fichier d'un autre écrivain: copie unique à l'enregistrement
+            shutil.copyfile(path, tmp_path)
+        os.chmod(tmp_path, stat.S_IRUSR | stat.S_IRGRP | stat.S_IROTH)
+        if os.path.exists(card_path(path)):
+            (os.replace if move else shutil.copyfile)(card_path(path), card_path(blob))
+        os.replace(tmp_path, blob)
+        return blob
+
+    def publish(self, model, path, stage, metrics=None):
+        """
+        Sauvegarde un modèle, l'enregistre et fait pointer l'étape dessus.
+        Le fichier d'étape n'est jamais écrit en place (c'est un lien vers un blob).
+        """
+        import joblib
+
+        root, ext = os.path.splitext(path)
+        tmp_path = os.path.join(os.path.dirname(path), f".{os.path.basename(root)}.{os.getpid()}{ext}")
+        joblib.dump(model, tmp_path)
+        write_card(model, tmp_path)
+        record = self.register(tmp_path, metrics=metrics, move=True)
+        self.promote(stage, record['id'], path)
+        return record
+
+    def register(self, path, metrics=None, version=None, move=False):
+        """
+        Enregistre le fichier comme version (dédupliqué par empreinte).
+        Les métriques fournies complètent celles déjà connues.
+        """
+        sha256 = file_sha256(path)
+        card = read_card(path) or {}
+        blob = self._store_blob(path, sha256, move=move)
+        conn = self._connect()
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            existing = conn.execute('SELECT * FROM versions WHERE sha256 = ?', (sha256,)).fetchone()
+            if existing is not None:
+                merged = dict(json.loads(existing['metrics'] or '{}'), **(metrics or {}))
+                # Version supprimée par la rétention puis réenregistrée: blob restauré
+                conn.execute('UPDATE versions SET metrics = ?, path = ? WHERE id = ?',
+                             (json.dumps(merged), blob, existing['id']))
+                conn.execute('COMMIT')
+                return self.get(existing['id'])
+
+            version = version or f"v{datetime.now().strftime('%Y%m%d_%H%M%S')}_{sha256[:8]}"
+            conn.execute(
+                'INSERT INTO versions (version, sha256, size, path, model_type, card, metrics, created_at) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                (version, sha256, os.path.getsize(blob), blob, card.get('model_type'),
+                 json.dumps(card), json.dumps(metrics or {}), datetime.now().isoformat())
+            )
+            conn.execute('COMMIT')
+        except Exception:
+            if conn.in_transaction:
+                conn.execute('ROLLBACK')
+            raise
+        finally:
+            conn.close()
+        return self.get_by_sha(sha256)
+
+    def get(self, version_id):
+        conn = self._connect()
+        try:
+            return self._record(conn.execute('SELECT * FROM versions WHERE id = ?', (version_id,)).fetchone())
+        finally:
+            conn.close()
+
+    def get_by_sha(self, sha256):
+        conn = self._connect()
+        try:
+            return self._record(conn.execute('SELECT * FROM versions WHERE sha256 = ?', (sha256,)).fetchone())
+        finally:
+            conn.close()
+
+    def promote(self, stage, version_id, path=None, action='promote'):
+        """
+        Fait pointer l'étape sur la version (historisé pour le rollback).
+        Si `path` est fourni, ce fichier devient un lien vers le blob de la version.
+        """
+        if path:
+            blob = self.get(version_id)['path']
+            if not blob or not os.path.exists(blob):
+                raise FileNotFoundError(f"Blob absent pour la version {version_id}")
+            atomic_symlink(blob, path)
+            if os.path.exists(card_path(blob)):
+                atomic_symlink(card_path(blob), card_path(path))
+        conn = self._connect()
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            current = conn.execute('SELECT version_id FROM stages WHERE stage = ?', (stage,)).fetchone()
+            previous = current['version_id'] if current else None
+            conn.execute(
+                'INSERT INTO stages (stage, version_id, path, updated_at) VALUES (?, ?, ?, ?) '
+                'ON CONFLICT(stage) DO UPDATE SET version_id = excluded.version_id, '
+                'path = COALESCE(excluded.path, stages.path), updated_at = excluded.updated_at',
+                (stage, version_id, path, datetime.now().isoformat())
+            )
+            conn.execute(
+                'INSERT INTO stage_events (stage, action, version_id, previous_version_id, at) '
+                'VALUES (?, ?, ?, ?, ?)',
+                (stage, action, version_id, previous, datetime.now().isoformat())
+            )
+            conn.execute('COMMIT')
+        except Exception:
+            if conn.in_transaction:
+                conn.execute('ROLLBACK')
+            raise
+        finally:
+            conn.close()
+
+    def stage(self, stage):
+        """Version pointée par l'étape (avec 'stage_path' et 'stage_updated_at'), ou None"""
+        conn = self._connect()
+        try:
+            row = conn.execute(
+                'SELECT versions.*, stages.path AS stage_path, stages.updated_at AS stage_updated_at '
+                'FROM stages JOIN versions ON versions.id = stages.version_id WHERE stages.stage = ?',
+                (stage,)
+            ).fetchone()
+            return self._record(row)
+        finally:
+            conn.close()
+
+    def rollback_target(self, stage='production'):
+        """Version qui précédait la version courante de l'étape, ou None"""
+        current = self.stage(stage)
+        if current is None:
+            return None
+        conn = self._connect()
+        try:
+            row = conn.execute(
+                "SELECT previous_version_id FROM stage_events "
+                "WHERE stage = ? AND version_id = ? AND action = 'promote' "
+                "ORDER BY id DESC LIMIT 1",
+                (stage, current['id'])
+            ).fetchone()
+        finally:
+            conn.close()
+        if row is None or row['previous_version_id'] is None:
+            return None
+        return self.get(row['previous_version_id'])
+
+    def stages(self):
+        """{étape: numéro de version}"""
+        conn = self._connect()
+        try:
+            return {row['stage']: row['version_id'] for row in conn.execute('SELECT stage, version_id FROM stages')}
+        finally:
+            conn.close()
+
+    def versions(self):
+        """Toutes les versions, de la plus récente à la plus ancienne"""
+        conn = self._connect()
+        try:
+            return [self._record(row) for row in conn.execute('SELECT * FROM versions ORDER BY id DESC')]
+        finally:
+            conn.close()
+
+    def history(self, stage=None, limit=20):
+        conn = self._connect()
+        try:
+            query = 'SELECT * FROM stage_events'
+            params = ()
+            if stage:
+                query += ' WHERE stage = ?'
+                params = (stage,)
+            query += ' ORDER BY id DESC LIMIT ?'
+            return [dict(row) for row in conn.execute(query, params + (limit,))]
+        finally:
+            conn.close()
+
+
+    def gc(self, retention=RETENTION):
+        """
+        Supprime les blobs des versions qui ne sont ni pointées par une étape,
+        ni la cible de rollback d'une étape (version précédente de sa dernière
+        promotion), ni parmi les `retention` plus récentes. L'historique est conservé.
+        """
+        conn = self._connect()
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            rows = conn.execute(
+                "SELECT id, path FROM versions WHERE path != '' "
+                "AND id NOT IN (SELECT version_id FROM stages) "
+                "AND id NOT IN ("
+                "    SELECT events.previous_version_id FROM stage_events AS events "
+                "    JOIN stages ON stages.stage = events.stage AND stages.version_id = events.version_id "
+                "    WHERE events.previous_version_id IS NOT NULL AND events.id = ("
+                "        SELECT MAX(id) FROM stage_events WHERE stage = events.stage "
+                "        AND version_id = events.version_id AND action = 'promote')) "
+                "AND id NOT IN (SELECT id FROM versions ORDER BY id DESC LIMIT ?)",
+                (retention,)
+            ).fetchall()
+            conn.executemany("UPDATE versions SET path = '' WHERE id = ?", [(row['id'],) for row in rows])
+            conn.execute('COMMIT')
+        except Exception:
+            if conn.in_transaction:
+                conn.execute('ROLLBACK')
+            raise
+        finally:
+            conn.close()
+
+        freed = 0
+        for row in rows:
+            for path in (row['path'], card_path(row['path'])):
+                if os.path.exists(path):
+                    freed += os.path.getsize(path)
+                    os.remove(path)
+        if rows:
+            print(f"🗑️  {len(rows)} version(s) supprimée(s) ({freed / 1024:.1f} KB libérés)")
+        return len(rows)
+
+
+def print_registry(registry):
+    print("="*60)
+    print("📚 REGISTRE DES MODÈLES")
+    print("="*60)
+    stages = registry.stages()
+    for record in registry.versions():
+        labels = [stage for stage, version_id in stages.items() if version_id == record['id']]
+        accuracy = record['metrics'].get('accuracy')
+        print(f"   {record['version']:<32} {record['model_type'] or 'N/A':<28} "
+              f"{record['size'] / 1024:>8.1f} KB "
+              f"{f'acc={accuracy:.4f}' if accuracy is not None else '':<12} {', '.join(labels)}")
+    print("="*60)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Registre local des modèles')
+    parser.add_argument('--models-dir', default=MODELS_DIR)
+    parser.add_argument('--register', help='Fichier modèle à enregistrer')
+    parser.add_argument('--stage', choices=STAGES, help="Étape à faire pointer sur la version enregistrée")
+    parser.add_argument('--gc', action='store_true', help='Supprimer les versions hors rétention')
+    args = parser.parse_args()
+
+    registry = ModelRegistry(args.models_dir)
+    if args.gc:
+        registry.gc()
+    if args.register:
+        record = registry.register(args.register)
+        print(f"✅ Version {record['version']} ({record['sha256'][:12]})")
+        if args.stage:
+            registry.promote(args.stage, record['id'], args.register)
+            print(f"✅ {args.stage} -> {record['version']}")
+    print_registry(registry)
@@ -0,0 +1,181 @@
+"""
+Sélection Multi-Objectif des Modèles
+====================================
+Le score combiné ((accuracy + cv_mean) / 2) ne voit pas le coût de service:
+un GradientBoosting meilleur de 0,1 % mais 5 fois plus lent gagnerait. Chaque
+candidat est donc mesuré pendant la comparaison (latence d'une ligne et d'un
+lot, taille sérialisée, mémoire une fois chargé), puis le gagnant est choisi:
+
+- score: meilleur score combiné (comportement historique)
+- pareto (défaut): parmi les candidats non dominés (score, latence, taille)
+  qui respectent les budgets, le moins coûteux à servir dont le score est à
+  SELECTION_SCORE_TOLERANCE près du meilleur
+
+    SELECTION_OBJECTIVE=pareto        score ou pareto
+    SELECTION_SCORE_TOLERANCE=0.005   écart de score accepté contre un modèle moins coûteux
+    SELECTION_MAX_LATENCY_MS=         budget de latence d'une ligne (ms, vide: aucun)
+    SELECTION_MAX_SIZE_MB=            budget de taille sérialisée (Mo, vide: aucun)
+"""
+
+import io
+import os
+import time
+import tracemalloc
+import numpy as np
+
+
+def _optional_float(name):
+    value = os.environ.get(name, '')
+    return float(value) if value else None
+
+
+OBJECTIVE = os.environ.get('SELECTION_OBJECTIVE', 'pareto')
+SCORE_TOLERANCE = float(os.environ.get('SELECTION_SCORE_TOLERANCE', 0.005))
+MAX_LATENCY_MS = _optional_float('SELECTION_MAX_LATENCY_MS')
+MAX_SIZE_MB = _optional_float('SELECTION_MAX_SIZE_MB')
+
+OBJECTIVES = ('score', 'pareto')
+BATCH_ROWS = 1000
+
+
+def _median_ms(predict, X, repeat):
+    predict(X)
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        predict(X)
+        timings.append(time.perf_counter() - start)
+    return float(np.median(timings) * 1000)
+
+
+def _native_tree_bytes(model):
+    """Mémoire des arbres allouée hors de Python (nœuds et valeurs, invisibles pour tracemalloc)"""
+    try:
+        from sklearn.tree._tree import NODE_DTYPE
+    except ImportError:
+        return 0
+    total = 0
+    for estimator in np.ravel(getattr(model, 'estimators_', [model])):
+        tree = getattr(estimator, 'tree_', None)
+        if tree is not None:
+            total += tree.node_count * NODE_DTYPE.itemsize + tree.value.nbytes
+    return total
+
+
+def serving_cost(model, X, repeat=30):
+    """
+    Coût de service du modèle: latence médiane d'une ligne et d'un lot (ms),
+    taille sérialisée (octets) et mémoire allouée au chargement (octets)
+    """
+    import joblib
+
+    X = np.asarray(X)
+    predict = model.predict_proba if hasattr(model, 'predict_proba') else model.predict
+    buffer = io.BytesIO()
+    joblib.dump(model, buffer)
+    size = buffer.getbuffer().nbytes
+
+    # Mémoire: allocations Python et NumPy restant à la fin du chargement,
+    # plus les tableaux natifs des arbres. Si l'appelant trace déjà, on mesure
+    # l'écart par rapport à l'état courant et on lui laisse le traçage actif.
+    buffer.seek(0)
+    started = not tracemalloc.is_tracing()
+    if started:
+        tracemalloc.start()
+    else:
+        tracemalloc.reset_peak()
+    baseline = tracemalloc.get_traced_memory()[0]
+    loaded = joblib.load(buffer)
+    memory = tracemalloc.get_traced_memory()[0] - baseline + _native_tree_bytes(loaded)
+    if started:
+        tracemalloc.stop()
+    del loaded
+
+    return {
+        'latency_ms_single': round(_median_ms(predict, X[:1], repeat), 4),
+        'latency_ms_batch': round(_median_ms(predict, X[:BATCH_ROWS], max(repeat // 5, 3)), 3),
+        'batch_rows': min(len(X), BATCH_ROWS),
+        'size_bytes': size,
+        'memory_bytes': memory,
+    }
+
+
+def dominates(a, b):
+    """a domine b: au moins aussi bon sur score, latence et taille, meilleur sur l'un"""
+    at_least = (a['combined_score'] >= b['combined_score']
+                and a['serving']['latency_ms_single'] <= b['serving']['latency_ms_single']
+                and a['serving']['size_bytes'] <= b['serving']['size_bytes'])
+    better = (a['combined_score'] > b['combined_score']
+              or a['serving']['latency_ms_single'] < b['serving']['latency_ms_single']
+              or a['serving']['size_bytes'] < b['serving']['size_bytes'])
+    return at_least and better
+
+
+def pareto_front(results):
+    return [r for r in results if not any(dominates(other, r) for other in results if other is not r)]
+
+
+def within_budget(result, max_latency_ms=MAX_LATENCY_MS, max_size_mb=MAX_SIZE_MB):
+    cost = result['serving']
+    if max_latency_ms is not None and cost['latency_ms_single'] > max_latency_ms:
+        return False
+    if max_size_mb is not None and cost['size_bytes'] > max_size_mb * 1024 * 1024:
+        return False
+    return True
+
+
+def select(results, objective=OBJECTIVE, tolerance=SCORE_TOLERANCE,
+           max_latency_ms=MAX_LATENCY_MS, max_size_mb=MAX_SIZE_MB):
+    """
+    Choisit le gagnant parmi les résultats (dictionnaires avec 'combined_score'
+    et 'serving'). Retourne (résultat retenu, rapport de sélection).
+    """
+    if objective not in OBJECTIVES:
+        raise ValueError(f"Objectif inconnu: {objective} (choix: {', '.join(OBJECTIVES)})")
+    by_score = max(results, key=lambda r: r['combined_score'])
+    report = {
+        'objective': objective,
+        'score_tolerance': tolerance,
+        'max_latency_ms': max_latency_ms,
+        'max_size_mb': max_size_mb,
+        'best_score_model': by_score['model_name'],
+    }
+    if objective == 'score':
+        report['selected'] = by_score['model_name']
+        return by_score, report
+
+    eligible = [r for r in results if within_budget(r, max_latency_ms, max_size_mb)]
+    # Aucun candidat dans les budgets: sélection sans budget plutôt qu'aucun modèle
+    report['budget_relaxed'] = not eligible
+    eligible = eligible or results
+    front = pareto_front(eligible)
+    best = max(r['combined_score'] for r in front)
+    close = [r for r in front if r['combined_score'] >= best - tolerance]
+    selected = min(close, key=lambda r: (r['serving']['latency_ms_single'], r['serving']['size_bytes']))
+
+    report.update({
+        'within_budget': [r['model_name'] for r in eligible],
+        'pareto_front': [r['model_name'] for r in front],
+        'selected': selected['model_name'],
+    })
+    return selected, report
+
+
+def print_costs(results, report):
+    print(f"\n⚖️  Sélection ({report['objective']}):")
+    for r in results:
+        cost = r['serving']
+        marks = []
+        if r['model_name'] in report.get('pareto_front', []):
+            marks.append('pareto')
+        if r['model_name'] == report['selected']:
+            marks.append('retenu')
+        print(f"   {r['model_name']:<20} score {r['combined_score']:.4f}  "
+              f"{cost['latency_ms_single']:.3f} ms/ligne  {cost['latency_ms_batch']:.1f} ms/lot  "
+              f"{cost['size_bytes'] / 1024:.0f} Ko  {cost['memory_bytes'] / 1024:.0f} Ko chargé"
+              f"{'  [' + ', '.join(marks) + ']' if marks else ''}")
+    if report.get('budget_relaxed'):
+        print("   ⚠️  Aucun candidat ne respecte les budgets: sélection sans budget")
+    if report['selected'] != report['best_score_model']:
+        print(f"   ℹ️  {report['best_score_model']} a le meilleur score mais "
+              f"{report['selected']} est retenu (coût de service)")
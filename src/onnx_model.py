@@ -0,0 +1,253 @@
+"""
+Export ONNX et Moteur onnxruntime
+=================================
+Convertit le modèle retenu (RandomForest, GradientBoosting ou
+LogisticRegression) au format ONNX avec skl2onnx, vérifie la parité
+numérique sur un lot réservé, puis le sert avec onnxruntime (CPU).
+
+Le pipeline de features, les classes et l'empreinte du pickle d'origine sont
+stockés dans les métadonnées du fichier ONNX: le service n'a besoin ni de
+scikit-learn ni de joblib.
+
+    ONNX_INTRA_OP_THREADS=1   threads intra-opérateur d'onnxruntime
+
+Comparaison avec scikit-learn (une ligne et par lot, par nombre de threads):
+
+    python src/onnx_model.py models/model.pkl --benchmark --threads 1,2,4
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime
+import numpy as np
+
+EXTENSION = '.onnx'
+REPORT_FILE = 'reports/onnx_benchmark.json'
+
+# Threads intra-opérateur (1: latence stable d'une ligne, pas de contention avec gunicorn)
+INTRA_OP_THREADS = int(os.environ.get('ONNX_INTRA_OP_THREADS', 1))
+
+# Tolérance de parité sur les probabilités (calcul en float32)
+PROBA_TOLERANCE = 1e-4
+
+SUPPORTED = ('RandomForestClassifier', 'ExtraTreesClassifier',
+             'GradientBoostingClassifier', 'LogisticRegression')
+
+BATCH_ROWS = 1000
+
+
+def supports(model):
+    return type(model).__name__ in SUPPORTED
+
+
+class OnnxModel:
+    """Modèle servi par onnxruntime, interface predict/predict_proba de scikit-learn"""
+
+    def __init__(self, path, threads=INTRA_OP_THREADS):
+        # onnxruntime n'est utile qu'au service de ce moteur: import différé
+        import onnxruntime
+
+        options = onnxruntime.SessionOptions()
+        options.intra_op_num_threads = threads
+        options.inter_op_num_threads = 1
+        options.execution_mode = onnxruntime.ExecutionMode.ORT_SEQUENTIAL
+        self.session = onnxruntime.InferenceSession(path, options, providers=['CPUExecutionProvider'])
+        self.threads = threads
+        self.input_name = self.session.get_inputs()[0].name
+        self.nbytes = os.path.getsize(path)
+
+        meta = self.session.get_modelmeta().custom_metadata_map
+        self.classes_ = np.array(json.loads(meta['classes']))
+        self.n_features_in_ = int(meta['n_features'])
+        self.source_sha256 = meta.get('source_sha256')
+        if meta.get('feature_pipeline'):
+            self.feature_pipeline_ = json.loads(meta['feature_pipeline'])
+
+    def _run(self, X):
+        X = np.asarray(X, dtype=np.float32)
+        labels, probas = self.session.run(None, {self.input_name: X})
+        return labels, probas
+
+    def predict_proba(self, X):
+        return self._run(X)[1]
+
+    def predict(self, X):
+        return self._run(X)[0]
+
+    def touch(self):
+        """Une inférence à vide: onnxruntime alloue ses tampons au premier appel"""
+        self._run(np.zeros((1, self.n_features_in_)))
+        return self.nbytes
+
+
+def convert(model, source_sha256=None):
+    """Graphe ONNX du modèle (sortie label + probabilités, sans ZipMap)"""
+    from skl2onnx import convert_sklearn
+    from skl2onnx.common.data_types import FloatTensorType
+
+    n_features = int(model.n_features_in_)
+    onx = convert_sklearn(model, initial_types=[('input', FloatTensorType([None, n_features]))],
+                          options={id(model): {'zipmap': False}})
+    meta = {
+        'classes': json.dumps(np.asarray(model.classes_).tolist()),
+        'n_features': str(n_features),
+        'model_type': type(model).__name__,
+    }
+    if getattr(model, 'feature_pipeline_', None):
+        meta['feature_pipeline'] = json.dumps(model.feature_pipeline_)
+    if source_sha256:
+        meta['source_sha256'] = source_sha256
+    for key, value in meta.items():
+        entry = onx.metadata_props.add()
+        entry.key, entry.value = key, value
+    return onx
+
+
+def check_parity(model, onnx_model, X):
+    """Compare prédictions et probabilités de scikit-learn et d'onnxruntime"""
+    X = np.asarray(X, dtype=np.float64)
+    expected = model.predict_proba(X)
+    actual = onnx_model.predict_proba(X)
+    agreement = float(np.mean(model.predict(X) == onnx_model.predict(X)))
+    max_diff = float(np.max(np.abs(expected - actual))) if len(X) else 0.0
+    return {
+        'rows': len(X),
+        'prediction_agreement': agreement,
+        'max_proba_diff': max_diff,
+        'passed': agreement == 1.0 and max_diff <= PROBA_TOLERANCE,
+    }
+
+
+def export(model, path, X_check, source_sha256=None):
+    """
+    Convertit, vérifie la parité sur X_check puis écrit le fichier ONNX.
+    Lève ValueError si la parité échoue (le fichier n'est pas écrit).
+    """
+    data = convert(model, source_sha256).SerializeToString()
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    try:
+        parity = check_parity(model, OnnxModel(tmp_path), X_check)
+        if not parity['passed']:
+            raise ValueError(f"Parité non respectée: {parity}")
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return dict(parity, path=path, size_bytes=len(data))
+
+
+def export_sidecar(model, model_path, source_sha256, X_check):
+    """
+    Exporte le modèle ONNX à côté du modèle servi (models/model.pkl ->
+    models/model.onnx). Un modèle non supporté, skl2onnx/onnxruntime absents
+    ou une parité non respectée retirent l'ancien export.
+    """
+    sidecar = os.path.splitext(model_path)[0] + EXTENSION
+    try:
+        if not supports(model):
+            raise ValueError(f"{type(model).__name__} non supporté")
+        return export(model, sidecar, X_check, source_sha256)
+    except (ValueError, ImportError, RuntimeError) as e:
+        print(f"   ⚠️  Export ONNX non disponible: {e}")
+        if os.path.exists(sidecar):
+            os.remove(sidecar)
+        return None
+
+
+def load(path, threads=INTRA_OP_THREADS):
+    return OnnxModel(path, threads)
+
+
+def _latency(predict, X, repeat):
+    """Durée médiane (secondes) d'un appel"""
+    predict(X)
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        predict(X)
+        timings.append(time.perf_counter() - start)
+    return float(np.median(timings))
+
+
+def benchmark(model, path, X, threads=(1,), repeat=50):
+    """
+    Latence d'une ligne et débit par lot: scikit-learn contre onnxruntime
+    (un moteur par nombre de threads intra-opérateur)
+    """
+    X = np.asarray(X, dtype=np.float64)
+    row, batch = X[:1], X[:BATCH_ROWS]
+
+    def measure(predictor):
+        batch_seconds = _latency(predictor.predict_proba, batch, max(repeat // 5, 3))
+        return {
+            'single_row_ms': round(_latency(predictor.predict_proba, row, repeat) * 1000, 4),
+            'batch_ms': round(batch_seconds * 1000, 3),
+            'batch_rows_per_second': round(len(batch) / batch_seconds),
+        }
+
+    report = {
+        'model_type': type(model).__name__,
+        'batch_rows': len(batch),
+        'sklearn': measure(model),
+        'onnx': {},
+    }
+    for count in threads:
+        onnx_model = OnnxModel(path, count)
+        entry = measure(onnx_model)
+        entry['single_row_speedup'] = round(report['sklearn']['single_row_ms'] / entry['single_row_ms'], 2)
+        entry['batch_speedup'] = round(report['sklearn']['batch_ms'] / entry['batch_ms'], 2)
+        report['onnx'][str(count)] = entry
+    report['parity'] = check_parity(model, OnnxModel(path), X)
+    return report
+
+
+def print_report(report):
+    sk = report['sklearn']
+    print(f"⚡ {report['model_type']}: scikit-learn {sk['single_row_ms']:.3f} ms/ligne, "
+          f"lot de {report['batch_rows']}: {sk['batch_ms']:.1f} ms")
+    for threads, entry in report['onnx'].items():
+        print(f"   onnxruntime ({threads} thread(s)): {entry['single_row_ms']:.3f} ms/ligne "
+              f"(x{entry['single_row_speedup']}), lot: {entry['batch_ms']:.1f} ms (x{entry['batch_speedup']})")
+    parity = report['parity']
+    print(f"   Parité: {parity['prediction_agreement']:.2%} des prédictions identiques, "
+          f"écart max des probabilités {parity['max_proba_diff']:.2e} ({parity['rows']} lignes)")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Export ONNX et comparaison avec scikit-learn')
+    parser.add_argument('model', help='Modèle joblib (models/model.pkl)')
+    parser.add_argument('--output', help='Fichier ONNX (défaut: <modèle>.onnx)')
+    parser.add_argument('--data-file', default='data/googleplaystore_clean.csv')
+    parser.add_argument('--benchmark', action='store_true', help='Comparer les latences à scikit-learn')
+    parser.add_argument('--threads', default='1', help='Threads intra-opérateur à comparer (ex: 1,2,4)')
+    args = parser.parse_args()
+
+    import joblib
+    from compact_forest import _check_rows
+    from model_registry import file_sha256
+
+    model = joblib.load(args.model)
+    X_check = _check_rows(model, args.data_file)
+
+    output = args.output or os.path.splitext(args.model)[0] + EXTENSION
+    try:
+        result = export(model, output, X_check, source_sha256=file_sha256(args.model))
+    except (ValueError, ImportError) as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    print(f"✅ {output}: {result['size_bytes'] / 1024:.1f} Ko, parité sur {result['rows']} lignes")
+
+    if args.benchmark:
+        threads = [int(count) for count in args.threads.split(',')]
+        report = benchmark(model, output, X_check, threads)
+        report['measured_at'] = datetime.now().isoformat()
+        os.makedirs(os.path.dirname(REPORT_FILE), exist_ok=True)
+        with open(REPORT_FILE, 'w') as f:
+            json.dump(report, f, indent=2)
+        print_report(report)
+        print(f"📝 Rapport: {REPORT_FILE}")
@@ -0,0 +1,182 @@
+"""
+Orchestrateur du Pipeline
+=========================
+Exécute les étapes du pipeline (vérification des données, entraînement,
+décision, déploiement, rapport, paquet GCP) comme un graphe de dépendances,
+dans un seul processus:
+
+- les données, le modèle et les métriques passent d'une étape à l'autre en
+  mémoire: le CSV n'est chargé en DataFrame qu'une fois (entraînement et
+  décision), le candidat n'est pas rechargé depuis son pickle pour la décision.
+  La vérification des données lit le fichier brut de son côté (empreintes
+  des blocs, src/data_version.py): rien si le fichier est inchangé, les
+  seuls blocs modifiés sinon
+- les étapes indépendantes tournent en parallèle (fils d'exécution): la
+  lecture des données pendant la vérification, le rapport et le paquet GCP
+  pendant la décision et le déploiement
+- une étape est ignorée si l'une de ses dépendances a été ignorée ou a
+  échoué, ou si sa condition n'est pas remplie (pas de nouvelles données,
+  déploiement non approuvé)
+
+Les fichiers /tmp/*.txt lus par les workflows GitHub Actions sont toujours
+écrits par les étapes elles-mêmes.
+
+    python src/orchestrator.py                        # déploiement en staging si approuvé
+    python src/orchestrator.py --force --environment none
+"""
+
+import argparse
+import sys
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+from profiling import StageProfiler
+
+TIMINGS_PATH = 'reports/orchestrator_timings.json'
+MAX_WORKERS = 4
+
+
+class Stage:
+    """Étape du graphe: func(résultats des étapes précédentes) -> résultat"""
+
+    def __init__(self, name, func, deps=(), when=None):
+        self.name = name
+        self.func = func
+        self.deps = tuple(deps)
+        # Condition évaluée sur les résultats des dépendances (None: toujours)
+        self.when = when
+
+
+def _validate(stages):
+    names = {stage.name for stage in stages}
+    if len(names) != len(stages):
+        raise ValueError("Noms d'étapes en double")
+    for stage in stages:
+        missing = set(stage.deps) - names
+        if missing:
+            raise ValueError(f"Étape {stage.name}: dépendances inconnues {sorted(missing)}")
+
+
+def run_dag(stages, max_workers=MAX_WORKERS, profiler=None):
+    """
+    Exécute les étapes dès que leurs dépendances sont terminées.
+    Retourne (résultats par étape, statut par étape: done, skipped ou failed).
+    """
+    _validate(stages)
+    profiler = profiler or StageProfiler()
+    pending = {stage.name: stage for stage in stages}
+    results, status, running = {}, {}, {}
+
+    def execute(stage):
+        with profiler.stage(stage.name):
+            return stage.func(results)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        while pending or running:
+            progressed = False
+            for name, stage in list(pending.items()):
+                if not all(dep in status for dep in stage.deps):
+                    continue
+                del pending[name]
+                progressed = True
+                if any(status[dep] != 'done' for dep in stage.deps) or \
+                        (stage.when is not None and not stage.when(results)):
+                    status[name] = 'skipped'
+                    print(f"\n⏭️  Étape ignorée: {name}")
+                    continue
+                print(f"\n▶️  Étape: {name}")
+                running[pool.submit(execute, stage)] = name
+
+            if not running:
+                if pending and not progressed:
+                    raise ValueError(f"Dépendances circulaires: {sorted(pending)}")
+                continue
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                try:
+                    results[name] = future.result()
+                    status[name] = 'done'
+                except Exception as e:
+                    status[name] = 'failed'
+                    print(f"\n❌ Étape {name} échouée: {e}")
+    return results, status
+
+
+def pipeline_stages(force=False, environment='staging', gcp=True):
+    """Graphe du pipeline de réentraînement (mêmes étapes que ml-pipeline.yml)"""
+    # Imports différés: chaque module configure MLflow, scikit-learn... à l'import
+    from check_new_data import check_new_data
+    import train_pipeline
+    from deployment_decision import make_deployment_decision
+    from deploy import deploy
+    from generate_report import generate_report
+
+    def train(results):
+        return train_pipeline.run(data=results['load_data'])
+
+    def decide(results):
+        trained = results['train']
+        return make_deployment_decision(trained['improvement'], trained['metrics']['accuracy'],
+                                        candidate=trained['model'], df=results['load_data'][3])
+
+    def report(results):
+        trained = results['train']
+        return generate_report(trained['metrics']['accuracy'], trained['improvement'],
+                               trained['model_version'])
+
+    def gcp_bundle(results):
+        from serving_bundle import BUNDLE_DIR, build_bundle
+        trained = results['train']
+        return build_bundle(trained['model'], trained['metrics']['model_name'], trained['metrics'],
+                            BUNDLE_DIR, trained['X_test'])
+
+    stages = [
+        Stage('check_data', lambda results: check_new_data()),
+        Stage('load_data', lambda results: train_pipeline.load_data()),
+        Stage('train', train, deps=('check_data', 'load_data'),
+              when=lambda results: force or results['check_data']['has_new_data']),
+        Stage('decision', decide, deps=('train', 'load_data')),
+        Stage('deploy', lambda results: deploy(environment, accuracy=results['train']['metrics']['accuracy']),
+              deps=('decision',),
+              when=lambda results: environment != 'none' and results['decision']['should_deploy']),
+        Stage('report', report, deps=('train',)),
+    ]
+    if gcp:
+        stages.append(Stage('gcp_bundle', gcp_bundle, deps=('train',)))
+    return stages
+
+
+def main(force=False, environment='staging', gcp=True, max_workers=MAX_WORKERS):
+    print("=" * 60)
+    print("🧭 ORCHESTRATEUR DU PIPELINE")
+    print("=" * 60)
+
+    profiler = StageProfiler()
+    results, status = run_dag(pipeline_stages(force, environment, gcp), max_workers, profiler)
+
+    # Décision non prise (pas d'entraînement): même sortie que le workflow
+    if status.get('decision') != 'done':
+        with open('/tmp/should_deploy.txt', 'w') as f:
+            f.write('false')
+
+    profiler.print_summary()
+    profiler.write_report(TIMINGS_PATH)
+
+    print("\n📋 Statut des étapes:")
+    icons = {'done': '✅', 'skipped': '⏭️ ', 'failed': '❌'}
+    for name, state in status.items():
+        print(f"   {icons[state]} {name}: {state}")
+    return 1 if 'failed' in status.values() else 0
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Pipeline complet en un seul processus')
+    parser.add_argument('--force', action='store_true', help='Réentraîner même sans nouvelles données')
+    parser.add_argument('--environment', choices=['staging', 'production', 'none'], default='staging',
+                        help="Déploiement si approuvé (none: aucun)")
+    parser.add_argument('--no-gcp', action='store_true', help='Ne pas préparer le paquet GCP')
+    parser.add_argument('--workers', type=int, default=MAX_WORKERS)
+    args = parser.parse_args()
+
+    sys.exit(main(args.force, args.environment, not args.no_gcp, args.workers))
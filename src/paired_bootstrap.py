@@ -0,0 +1,109 @@
+"""
+Bootstrap Apparié Vectorisé
+===========================
+Compare deux modèles (candidat, production) sur les mêmes lignes de test:
+chaque rééchantillonnage tire n lignes avec remise et les deux modèles sont
+évalués sur ce même tirage. L'intervalle de confiance porte donc sur la
+différence (accuracy, F1), pas sur deux scores indépendants.
+
+Pas de boucle Python par rééchantillonnage: les tirages forment une matrice
+d'indices (rééchantillonnages x lignes), traitée par blocs. Chaque ligne est
+résumée par un code (vérité, prédiction A, prédiction B) sur 3 bits, et un
+seul np.bincount donne, pour chaque tirage, les 8 effectifs d'où se déduisent
+les accuracy et F1 des deux modèles.
+
+    BOOTSTRAP_RESAMPLES=5000   nombre de rééchantillonnages
+    BOOTSTRAP_CONFIDENCE=0.95  niveau de confiance des intervalles
+"""
+
+import os
+import time
+import numpy as np
+
+RESAMPLES = int(os.environ.get('BOOTSTRAP_RESAMPLES', 5000))
+CONFIDENCE = float(os.environ.get('BOOTSTRAP_CONFIDENCE', 0.95))
+SEED = 42
+
+# Matrice d'indices traitée par blocs (~ BLOCK_CELLS entiers en mémoire)
+BLOCK_CELLS = 4_000_000
+
+# Bits du code de ligne
+TRUTH, PRED_A, PRED_B = 4, 2, 1
+
+
+def _counts(codes, resamples, rng):
+    """Effectifs des 8 codes pour chaque rééchantillonnage: (rééchantillonnages, 8)"""
+    n = len(codes)
+    counts = np.empty((resamples, 8), dtype=np.int64)
+    block = max(1, BLOCK_CELLS // n)
+    for start in range(0, resamples, block):
+        size = min(block, resamples - start)
+        index = rng.integers(0, n, size=(size, n), dtype=np.int32)
+        # Décalage par tirage: un bincount unique pour tout le bloc
+        offsets = (np.arange(size, dtype=np.int64) * 8)[:, None]
+        counts[start:start + size] = np.bincount((codes[index] + offsets).ravel(),
+                                                 minlength=size * 8).reshape(size, 8)
+    return counts
+
+
+def _metrics(counts, pred_bit):
+    """Accuracy et F1 (classe positive) de l'un des modèles, par rééchantillonnage"""
+    codes = np.arange(8)
+    truth = (codes & TRUTH) > 0
+    pred = (codes & pred_bit) > 0
+    n = counts.sum(axis=1)
+    correct = counts[:, truth == pred].sum(axis=1)
+    tp = counts[:, truth & pred].sum(axis=1)
+    fp = counts[:, ~truth & pred].sum(axis=1)
+    fn = counts[:, truth & ~pred].sum(axis=1)
+    denominator = 2 * tp + fp + fn
+    f1 = np.divide(2 * tp, denominator, out=np.zeros(len(tp)), where=denominator > 0)
+    return correct / n, f1
+
+
+def _interval(values, confidence):
+    alpha = (1 - confidence) / 2
+    low, high = np.quantile(values, [alpha, 1 - alpha])
+    return float(low), float(high)
+
+
+def paired_bootstrap(y_true, pred_a, pred_b, resamples=RESAMPLES, confidence=CONFIDENCE,
+                     seed=SEED, positive=1):
+    """
+    Différences A - B (accuracy, F1 de la classe positive) avec leurs
+    intervalles de confiance bootstrap (percentiles). None sans aucune ligne.
+    """
+    start = time.perf_counter()
+    y_true, pred_a, pred_b = (np.asarray(v) == positive for v in (y_true, pred_a, pred_b))
+    if len(y_true) == 0:
+        return None
+    codes = (y_true * TRUTH + pred_a * PRED_A + pred_b * PRED_B).astype(np.int64)
+
+    counts = _counts(codes, resamples, np.random.default_rng(seed))
+    accuracy_a, f1_a = _metrics(counts, PRED_A)
+    accuracy_b, f1_b = _metrics(counts, PRED_B)
+
+    # Estimations ponctuelles sur l'échantillon complet
+    full = np.bincount(codes, minlength=8)[None, :]
+    point_a, point_b = _metrics(full, PRED_A), _metrics(full, PRED_B)
+
+    report = {'rows': len(codes), 'resamples': resamples, 'confidence': confidence}
+    for name, diffs, point in (('accuracy', accuracy_a - accuracy_b, point_a[0] - point_b[0]),
+                               ('f1', f1_a - f1_b, point_a[1] - point_b[1])):
+        low, high = _interval(diffs, confidence)
+        report[f'{name}_diff'] = float(point[0])
+        report[f'{name}_ci'] = [low, high]
+        # Part des tirages où A fait mieux que B
+        report[f'{name}_win_rate'] = float(np.mean(diffs > 0))
+    report['seconds'] = round(time.perf_counter() - start, 4)
+    return report
+
+
+def print_report(report, names=('candidat', 'production')):
+    level = f"{report['confidence']:.0%}"
+    print(f"   🎲 Bootstrap apparié: {report['resamples']} tirages de {report['rows']} lignes "
+          f"({report['seconds'] * 1000:.0f} ms)")
+    for name in ('accuracy', 'f1'):
+        low, high = report[f'{name}_ci']
+        print(f"   {name:<8} {names[0]} - {names[1]}: {report[f'{name}_diff']:+.4f} "
+              f"IC {level} [{low:+.4f}, {high:+.4f}], meilleur dans {report[f'{name}_win_rate']:.0%} des tirages")
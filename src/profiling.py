@@ -0,0 +1,133 @@
+"""
+Profilage des Étapes du Pipeline
+================================
+Mesure le temps réel, le temps CPU et le pic de mémoire résidente de chaque
+étape (chargement, entraînement par modèle, CV, MLflow, préparation GCP),
+écrit reports/pipeline_timings.json et fournit ces mesures au format des
+métriques MLflow. Avec PIPELINE_PROFILE=1, chaque étape est aussi profilée avec
+cProfile (fichiers .prof lisibles par pstats, snakeviz ou flameprof).
+
+Le temps CPU d'une étape est celui du processus (threads de BLAS, de joblib
+compris), sauf si une étape tournait en même temps dans un autre thread
+(orchestrateur): c'est alors le temps CPU du seul thread de l'étape
+(cpu_scope: process ou thread).
+"""
+
+import cProfile
+import json
+import os
+import resource
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+TIMINGS_PATH = 'reports/pipeline_timings.json'
+PROFILES_DIR = 'reports/profiles'
+
+
+def peak_memory_mb():
+    """Pic de mémoire résidente du processus (Mo)"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss est en octets sur macOS, en kilo-octets sur Linux
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+class StageProfiler:
+    """Enregistre les mesures de chaque étape, dans l'ordre d'exécution"""
+
+    def __init__(self, cprofile=False, profiles_dir=PROFILES_DIR):
+        self.cprofile = cprofile
+        self.profiles_dir = profiles_dir
+        self.stages = []
+        # Profils cProfile actifs: un seul profileur peut tourner à la fois,
+        # l'étape englobante est suspendue pendant ses sous-étapes
+        self._profiles = []
+        # Étapes en cours, tous threads confondus (détection des étapes concurrentes)
+        self._lock = threading.Lock()
+        self._active = []
+        self.started_at = datetime.now().isoformat()
+        self._wall_start = time.perf_counter()
+        self._cpu_start = time.process_time()
+
+    @contextmanager
+    def stage(self, name):
+        """Mesure le bloc; les noms 'modèle/étape' regroupent les mesures par modèle"""
+        profile = cProfile.Profile() if self.cprofile else None
+        rss_before = peak_memory_mb()
+        current = {'thread': threading.get_ident(), 'concurrent': False}
+        with self._lock:
+            for other in self._active:
+                if other['thread'] != current['thread']:
+                    other['concurrent'] = current['concurrent'] = True
+            self._active.append(current)
+        wall, cpu, thread_cpu = time.perf_counter(), time.process_time(), time.thread_time()
+        if profile:
+            if self._profiles:
+                self._profiles[-1].disable()
+            self._profiles.append(profile)
+            profile.enable()
+        try:
+            yield
+        finally:
+            if profile:
+                profile.disable()
+                self._profiles.pop()
+                if self._profiles:
+                    self._profiles[-1].enable()
+            with self._lock:
+                self._active.remove(current)
+            # Étape concurrente: le temps CPU du processus inclurait celui des autres étapes
+            concurrent = current['concurrent']
+            record = {
+                'stage': name,
+                'wall_s': round(time.perf_counter() - wall, 4),
+                'cpu_s': round(time.thread_time() - thread_cpu if concurrent else time.process_time() - cpu, 4),
+                'cpu_scope': 'thread' if concurrent else 'process',
+                # ru_maxrss est monotone: pic atteint jusqu'à la fin de l'étape
+                'peak_rss_mb': round(peak_memory_mb(), 1),
+                'rss_growth_mb': round(peak_memory_mb() - rss_before, 1),
+            }
+            if profile:
+                os.makedirs(self.profiles_dir, exist_ok=True)
+                record['profile'] = os.path.join(self.profiles_dir, f"{name.replace('/', '_')}.prof")
+                profile.dump_stats(record['profile'])
+            self.stages.append(record)
+
+    def summary(self):
+        return {
+            'started_at': self.started_at,
+            'total_wall_s': round(time.perf_counter() - self._wall_start, 4),
+            'total_cpu_s': round(time.process_time() - self._cpu_start, 4),
+            'peak_rss_mb': round(peak_memory_mb(), 1),
+            'stages': self.stages,
+        }
+
+    def print_summary(self):
+        print("\n⏱️  Temps par étape:")
+        for record in self.stages:
+            print(f"   {record['stage']:<32} {record['wall_s']:>8.2f}s réel "
+                  f"{record['cpu_s']:>8.2f}s CPU {record['peak_rss_mb']:>8.0f} Mo")
+
+    def write_report(self, path=TIMINGS_PATH):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with open(path, 'w') as f:
+            json.dump(self.summary(), f, indent=2)
+        print(f"   ✅ Rapport de temps: {path}")
+        return path
+
+    def mlflow_metrics(self):
+        """Mesures à plat au format des métriques MLflow"""
+        metrics = {}
+        for record in self.stages:
+            key = record['stage'].replace(' ', '_')
+            metrics[f"time_wall_{key}"] = record['wall_s']
+            metrics[f"time_cpu_{key}"] = record['cpu_s']
+            metrics[f"peak_rss_mb_{key}"] = record['peak_rss_mb']
+        summary = self.summary()
+        metrics['time_wall_total'] = summary['total_wall_s']
+        metrics['time_cpu_total'] = summary['total_cpu_s']
+        metrics['peak_rss_mb_total'] = summary['peak_rss_mb']
+        return metrics
+
@@ -0,0 +1,195 @@
+"""
+Chemin de Service Minimal
+=========================
+Chargement du modèle et prédiction d'une ligne avec NumPy et le runtime du
+modèle (joblib/scikit-learn) uniquement: ni pandas ni mlflow ne sont importés,
+ce qui réduit le démarrage à froid sur Cloud Run. Quand une forêt compacte
+(src/compact_forest.py) correspond au modèle, elle remplace le pickle: ni
+joblib ni scikit-learn ne sont alors chargés.
+
+Le moteur d'inférence est choisi par SERVING_BACKEND:
+
+- auto (défaut): forêt compacte si elle correspond au modèle, sinon pickle
+- onnx: modèle ONNX exporté (models/model.onnx) servi par onnxruntime
+  (src/onnx_model.py, threads: ONNX_INTRA_OP_THREADS), à défaut comme auto
+- sklearn: toujours le pickle
+
+Au démarrage, warm_up() fait passer un lot synthétique dans le modèle et lit
+ses tableaux en mémoire: les premières requêtes ne paient ni les chemins de
+code froids de scikit-learn ni les défauts de page. Les applications ne se
+déclarent prêtes (/health/ready) qu'une fois le préchauffage terminé.
+
+Copié à côté de app.py dans les images Docker (comme features.py, compact_forest.py
+et onnx_model.py).
+"""
+
+import hashlib
+import os
+import time
+import numpy as np
+
+import compact_forest
+from features import FeaturePipeline
+
+# Confiance retournée quand le modèle n'expose pas predict_proba
+DEFAULT_CONFIDENCE = 75.0
+
+# Moteur d'inférence: auto, onnx ou sklearn
+BACKEND = os.environ.get('SERVING_BACKEND', 'auto')
+BACKENDS = ('auto', 'onnx', 'sklearn')
+
+# Taille du lot synthétique de préchauffage (0 pour désactiver)
+WARMUP_ROWS = int(os.environ.get('SERVING_WARMUP_ROWS', 64))
+
+
+def _sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def compact_sidecar(path):
+    """
+    Forêt compacte exportée depuis ce modèle (models/model.cforest à côté de
+    models/model.pkl), ou None si absente ou exportée depuis un autre modèle
+    """
+    sidecar = os.path.splitext(path)[0] + compact_forest.EXTENSION
+    if not os.path.exists(sidecar):
+        return None
+    try:
+        source = compact_forest.read_header(sidecar).get('source_sha256')
+    except (OSError, ValueError):
+        return None
+    return sidecar if source == _sha256(path) else None
+
+
+def onnx_sidecar(path):
+    """
+    Modèle ONNX exporté depuis ce modèle (models/model.onnx à côté de
+    models/model.pkl), ou None si absent, exporté depuis un autre modèle ou
+    si onnxruntime n'est pas installé
+    """
+    sidecar = os.path.splitext(path)[0] + '.onnx'
+    if not os.path.exists(sidecar):
+        return None
+    try:
+        # Import différé: module et onnxruntime absents des images sans ce moteur
+        import onnx_model
+        model = onnx_model.load(sidecar)
+    except Exception as e:
+        print(f"⚠️ Moteur ONNX non disponible: {e}")
+        return None
+    return model if model.source_sha256 == _sha256(path) else None
+
+
+def backend_name(model):
+    """Moteur servant le modèle: onnx, compact ou sklearn"""
+    if isinstance(model, compact_forest.CompactForest):
+        return 'compact'
+    if type(model).__name__ == 'OnnxModel':
+        return 'onnx'
+    return 'sklearn'
+
+
+def load_model(path, backend=BACKEND):
+    """
+    Charge le modèle et son pipeline de features (None pour les anciens modèles).
+    Selon le moteur, le modèle ONNX ou la forêt compacte sont préférés au
+    pickle quand ils correspondent au modèle.
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Moteur inconnu: {backend} (choix: {', '.join(BACKENDS)})")
+    if backend == 'onnx' and not path.endswith('.onnx'):
+        model = onnx_sidecar(path)
+        if model is not None:
+            return model, FeaturePipeline.from_model(model)
+    if path.endswith('.onnx'):
+        import onnx_model
+        model = onnx_model.load(path)
+        return model, FeaturePipeline.from_model(model)
+    if backend != 'sklearn' and not path.endswith(compact_forest.EXTENSION):
+        path = compact_sidecar(path) or path
+    if path.endswith(compact_forest.EXTENSION):
+        model = compact_forest.load(path)
+    else:
+        # joblib n'est utile qu'au chargement d'un pickle: import différé
+        import joblib
+        model = joblib.load(path)
+    return model, FeaturePipeline.from_model(model)
+
+
+def legacy_features(data):
+    """Features des anciens modèles entraînés sur Rating et Reviews uniquement"""
+    return np.array([[float(data.get('Rating', data.get('rating', 0))),
+                      float(data.get('Reviews', data.get('reviews', 0)))]])
+
+
+def predict_one(model, X):
+    """
+    Prédiction et confiance (%) d'une ligne.
+    Un seul parcours du modèle: la classe est déduite des probabilités.
+    """
+    if hasattr(model, 'predict_proba'):
+        try:
+            proba = model.predict_proba(X)[0]
+            best = int(np.argmax(proba))
+            return model.classes_[best], float(proba[best] * 100)
+        except Exception:
+            pass
+    return model.predict(X)[0], DEFAULT_CONFIDENCE
+
+
+def synthetic_batch(model, feature_pipeline, rows=WARMUP_ROWS):
+    """
+    Lot synthétique couvrant le vocabulaire du pipeline (toutes les catégories)
+    et des ordres de grandeur variés pour les valeurs numériques
+    """
+    if feature_pipeline is None:
+        n_features = int(getattr(model, 'n_features_in_', 2))
+        return np.random.default_rng(0).uniform(0, 5, size=(rows, n_features))
+
+    categories = {col: cats or ['Unknown'] for col, cats in feature_pipeline.categories.items()}
+    records = []
+    for i in range(rows):
+        record = {col: cats[i % len(cats)] for col, cats in categories.items()}
+        record.update({'Reviews': 10 ** (i % 7), 'Size': 1 + (i % 100), 'Price': (i % 3) * 0.99})
+        records.append(feature_pipeline.transform_one(record)[0])
+    return np.array(records)
+
+
+def touch_model(model):
+    """Lit les tableaux des arbres (seuils, valeurs, enfants): pages chargées en mémoire"""
+    if backend_name(model) != 'sklearn':
+        return model.touch()
+    touched = 0
+    for estimator in np.ravel(getattr(model, 'estimators_', [model])):
+        tree = getattr(estimator, 'tree_', None)
+        if tree is None:
+            continue
+        for array in (tree.threshold, tree.value, tree.feature,
+                      tree.children_left, tree.children_right):
+            array.sum()
+            touched += array.nbytes
+    return touched
+
+
+def warm_up(model, feature_pipeline, rows=WARMUP_ROWS):
+    """
+    Préchauffe le modèle: mémoire, prédiction par lot puis une ligne
+    (chemin des requêtes). Retourne les mesures (durée en secondes).
+    """
+    start = time.perf_counter()
+    touched = touch_model(model)
+    if rows > 0:
+        X = synthetic_batch(model, feature_pipeline, rows)
+        if hasattr(model, 'predict_proba'):
+            model.predict_proba(X)
+        model.predict(X)
+        predict_one(model, X[:1])
+    return {
+        'warmup_seconds': round(time.perf_counter() - start, 4),
+        'warmup_rows': rows,
+        'touched_bytes': touched,
+    }
@@ -0,0 +1,118 @@
+"""
+Application Flask pour Google Cloud Run
+=======================================
+Copiée telle quelle (app.py) dans le paquet de service construit par
+src/serving_bundle.py. Le modèle, son nom et ses métriques sont lus depuis
+le manifeste du paquet (manifest.json): l'application n'est plus générée
+par gabarit.
+"""
+
+import json
+import os
+import logging
+from flask import Flask, request, jsonify
+
+import serving
+from features import record_from_request
+
+try:
+    from flask_cors import CORS
+except ImportError:
+    CORS = None
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+BUNDLE_DIR = os.path.dirname(os.path.abspath(__file__))
+MANIFEST_FILE = os.path.join(BUNDLE_DIR, 'manifest.json')
+PORT = int(os.getenv("PORT", 8080))
+
+app = Flask(__name__)
+if CORS is not None:
+    CORS(app)
+else:
+    logger.warning("⚠️ flask-cors non disponible, CORS désactivé")
+
+with open(MANIFEST_FILE, 'r') as f:
+    manifest = json.load(f)
+
+# Charger puis préchauffer le modèle (prêt seulement ensuite: /health/ready)
+logger.info(f"Loading model {manifest['version']}...")
+ready = False
+warmup_metrics = {}
+try:
+    model, feature_pipeline = serving.load_model(os.path.join(BUNDLE_DIR, manifest['model']['file']))
+    logger.info("✅ Model loaded successfully")
+    warmup_metrics = serving.warm_up(model, feature_pipeline)
+    with app.test_request_context():
+        jsonify({'success': True, 'prediction': 0, 'result': '', 'confidence': 0.0})
+    logger.info(f"🔥 Warm-up: {warmup_metrics['warmup_seconds']:.3f}s")
+    ready = True
+except Exception as e:
+    logger.error(f"❌ Failed to load model: {str(e)}")
+    model = None
+    feature_pipeline = None
+
+
+@app.route("/", methods=["GET"])
+def home():
+    return jsonify({
+        "service": "Google Play Store Success Predictor",
+        "model": manifest['model_name'],
+        "version": manifest['version'],
+        "accuracy": manifest['metrics'].get('accuracy'),
+        "status": "running" if model else "error",
+        "endpoints": {
+            "liveness": "/health/live",
+            "readiness": "/health/ready",
+            "predict": "/predict (POST)"
+        }
+    })
+
+
+@app.route("/health/live", methods=["GET"])
+def liveness():
+    return jsonify({"status": "alive"}), 200
+
+
+@app.route("/health/ready", methods=["GET"])
+@app.route("/health", methods=["GET"])
+def readiness():
+    payload = dict(warmup_metrics, status="ready" if ready else "not ready",
+                   model_loaded=model is not None, version=manifest['version'])
+    return jsonify(payload), 200 if ready else 503
+
+
+@app.route("/predict", methods=["POST"])
+def predict():
+    try:
+        if not model:
+            return jsonify({"error": "Model not loaded"}), 503
+
+        data = request.get_json()
+
+        if not data:
+            return jsonify({"error": "No data provided"}), 400
+
+        if feature_pipeline is not None:
+            X = feature_pipeline.transform_one(record_from_request(data))
+        else:
+            # Ancien modèle entraîné sur Rating et Reviews uniquement
+            X = serving.legacy_features(data)
+
+        prediction, confidence = serving.predict_one(model, X)
+
+        return jsonify({
+            'success': True,
+            'prediction': int(prediction),
+            'result': '✅ SUCCÈS' if prediction == 1 else '❌ ÉCHEC',
+            'confidence': round(confidence, 2)
+        })
+
+    except Exception as e:
+        logger.error(f"Prediction error: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
+
+if __name__ == "__main__":
+    app.run(host="0.0.0.0", port=PORT, debug=False)
@@ -0,0 +1,550 @@
+"""
+Paquet de Service pour Google Cloud Run
+=======================================
+Construit un paquet versionné et reproductible à partir du modèle retenu:
+
+- model.cforest: forêt compacte (src/compact_forest.py), vérifiée contre le
+  modèle d'origine; à défaut (modèle non supporté), model.joblib sans les
+  attributs d'entraînement
+- app.py (src/serving_app.py), features.py, serving.py, compact_forest.py:
+  chemin de service minimal, sans pandas ni bibliothèque d'entraînement
+- requirements.txt: versions épinglées sur l'environnement d'entraînement.
+  Avec la forêt compacte, ni scikit-learn ni scipy ni joblib; sinon
+  scikit-learn doit être identique pour désérialiser le modèle
+- Dockerfile: image python:<version d'entraînement>-slim, bytecode précompilé
+- manifest.json: version, modèle, métriques, dépendances et empreintes des fichiers
+
+La version du paquet dérive de l'empreinte du modèle et des fichiers: deux
+constructions du même modèle donnent la même version (et le même tag d'image).
+
+Mesurer la taille et le démarrage (jusqu'à la première prédiction):
+
+    python src/serving_bundle.py --measure            # processus local
+    python src/serving_bundle.py --measure --docker   # image Docker
+"""
+
+import argparse
+import copy
+import hashlib
+import json
+import os
+import re
+import shutil
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+from datetime import datetime
+from importlib import metadata
+
+import compact_forest
+import serving
+from features import FeaturePipeline
+
+SRC_DIR = os.path.dirname(os.path.abspath(__file__))
+BUNDLE_DIR = 'deployment_gcp'
+REPORT_FILE = 'reports/bundle_report.json'
+PICKLE_FILE = 'model.joblib'
+COMPACT_FILE = 'model' + compact_forest.EXTENSION
+
+# Compression joblib du modèle (0: aucune, chargement le plus rapide)
+MODEL_COMPRESS = int(os.environ.get('BUNDLE_MODEL_COMPRESS', 0))
+# Mesure après construction par le pipeline: local, docker ou off
+MEASURE_MODE = os.environ.get('BUNDLE_MEASURE', 'local')
+START_TIMEOUT = 120
+
+# Fichiers de src/ copiés dans le paquet (destination -> source)
+SOURCES = {
+    'app.py': 'serving_app.py',
+    'features.py': 'features.py',
+    'serving.py': 'serving.py',
+    'compact_forest.py': 'compact_forest.py',
+    'import_profile.py': 'import_profile.py',
+}
+
+# Dépendances d'exécution (versions de l'environnement courant si installées)
+RUNTIME_PACKAGES = {
+    'Flask': '2.3.3',
+    'flask-cors': '4.0.0',
+    'gunicorn': '21.2.0',
+    'numpy': '1.24.3',
+    'scipy': '1.10.1',
+    'scikit-learn': '1.3.0',
+    'joblib': '1.3.2',
+    'threadpoolctl': '3.2.0',
+    'zstandard': '0.22.0',
+    'lz4': '4.3.2',
+}
+# Nécessaires seulement pour désérialiser un pickle scikit-learn
+PICKLE_PACKAGES = {'scipy', 'scikit-learn', 'joblib', 'threadpoolctl'}
+# Paquet du codec de la forêt compacte
+CODEC_PACKAGES = {'zstd': 'zstandard', 'lz4': 'lz4'}
+# Jamais dans l'image de service
+TRAINING_ONLY = {'pandas', 'mlflow', 'pyspark', 'matplotlib', 'seaborn', 'plotly'}
+
+# Attributs utiles seulement à l'entraînement ou au diagnostic
+TRAINING_ATTRIBUTES = ('oob_score_', 'oob_decision_function_', 'oob_prediction_',
+                       'oob_improvement_', 'oob_scores_', 'train_score_')
+
+SAMPLE_REQUEST = {"reviews": 10000, "size": 25, "price": 0, "category": "GAME", "type": "Free"}
+
+
+def _sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _slug(text):
+    return re.sub(r'[^a-z0-9]+', '-', text.lower()).strip('-')
+
+
+def model_fingerprint(model):
+    """
+    Empreinte du contenu logique du modèle. Les octets sérialisés des arbres
+    scikit-learn ne sont pas reproductibles (remplissage non initialisé des
+    nœuds): les arbres sont hachés champ par champ.
+    """
+    import numpy as np
+    import pickle
+
+    digest = hashlib.sha256(type(model).__name__.encode('utf-8'))
+    estimators = np.ravel(getattr(model, 'estimators_', [model]))
+    trees = [getattr(estimator, 'tree_', None) for estimator in estimators]
+    if trees and all(tree is not None for tree in trees):
+        for tree in trees:
+            for array in (tree.feature, tree.threshold, tree.value,
+                          tree.children_left, tree.children_right):
+                digest.update(np.ascontiguousarray(array).tobytes())
+        rest = {key: value for key, value in model.__dict__.items()
+                if key not in ('estimators_', 'tree_')}
+        digest.update(pickle.dumps(rest, protocol=4))
+    else:
+        digest.update(pickle.dumps(model, protocol=4))
+    return digest.hexdigest()
+
+
+def compact_model(model):
+    """Copie superficielle du modèle sans les attributs d'entraînement"""
+    compact = copy.copy(model)
+    for attribute in TRAINING_ATTRIBUTES:
+        if attribute in compact.__dict__:
+            delattr(compact, attribute)
+    return compact
+
+
+def pinned_requirements(model_format='pickle', codec='none'):
+    """Dépendances épinglées (version installée, sinon version par défaut)"""
+    lines = []
+    for package, default in RUNTIME_PACKAGES.items():
+        if package in PICKLE_PACKAGES and model_format != 'pickle':
+            continue
+        if package in CODEC_PACKAGES.values() and CODEC_PACKAGES.get(codec) != package:
+            continue
+        try:
+            version = metadata.version(package)
+        except metadata.PackageNotFoundError:
+            version = default
+        lines.append(f"{package}=={version}")
+    return lines
+
+
+def _dockerfile(python_version, forbid):
+    return f'''FROM python:{python_version}-slim
+
+ENV PYTHONUNBUFFERED=True
+ENV PORT=8080
+
+WORKDIR /app
+
+COPY requirements.txt .
+RUN pip install --no-cache-dir -r requirements.txt
+
+COPY . .
+
+# Bytecode précompilé (sans vérification de date au démarrage), puis profil
+# d'import: la construction échoue si un paquet interdit est importé
+RUN python -m compileall -q --invalidation-mode unchecked-hash . \\
+    && python import_profile.py app.py --forbid {','.join(forbid)} --output /tmp/import_times.json \\
+    && rm import_profile.py
+
+EXPOSE 8080
+
+CMD exec gunicorn --bind :$PORT --workers 1 --threads 8 --timeout 0 app:app
+'''
+
+
+DOCKERIGNORE = '''__pycache__
+*.pyc
+*.pyo
+*.pyd
+.Python
+*.log
+.git
+.gitignore
+README.md
+deploy.sh
+'''
+
+
+def _deploy_script(manifest):
+    model_name, metrics = manifest['model_name'], manifest['metrics']
+    return f'''#!/bin/bash
+# Script de déploiement Google Cloud Run
+
+set -e
+
+echo "🚀 Déploiement sur Google Cloud Run"
+echo "===================================="
+
+# Configuration
+PROJECT_ID="your-project-id"  # À MODIFIER
+REGION="europe-west1"
+SERVICE_NAME="playstore-predictor"
+VERSION="{manifest['version']}"
+IMAGE_NAME="gcr.io/$PROJECT_ID/$SERVICE_NAME:$VERSION"
+
+echo "📋 Configuration:"
+echo "   Project: $PROJECT_ID"
+echo "   Region: $REGION"
+echo "   Service: $SERVICE_NAME"
+echo "   Version: $VERSION"
+echo ""
+
+# Vérifier gcloud
+if ! command -v gcloud &> /dev/null; then
+    echo "❌ gcloud CLI non installé"
+    echo "   Installer: https://cloud.google.com/sdk/docs/install"
+    exit 1
+fi
+
+# 1. Build l'image Docker
+echo "🔨 Build de l'image Docker..."
+docker build -t $IMAGE_NAME .
+
+# 2. Push vers Google Container Registry
+echo "📤 Push vers GCR..."
+docker push $IMAGE_NAME
+
+# 3. Déployer sur Cloud Run
+echo "🚀 Déploiement sur Cloud Run..."
+gcloud run deploy $SERVICE_NAME \\
+    --image $IMAGE_NAME \\
+    --platform managed \\
+    --region $REGION \\
+    --allow-unauthenticated \\
+    --memory 512Mi \\
+    --cpu 1 \\
+    --max-instances 10 \\
+    --port 8080
+
+echo ""
+echo "✅ Déploiement terminé!"
+echo ""
+echo "🌐 URL du service:"
+gcloud run services describe $SERVICE_NAME --region $REGION --format "value(status.url)"
+echo ""
+echo "📊 Informations:"
+echo "   Modèle: {model_name}"
+echo "   Accuracy: {metrics.get('accuracy', 0):.4f}"
+echo "   Déployé le: $(date)"
+'''
+
+
+def _readme(manifest):
+    model_name, metrics = manifest['model_name'], manifest['metrics']
+    return f'''# Déploiement Google Cloud Run
+
+## Modèle
+- **Nom**: {model_name}
+- **Version**: {manifest['version']}
+- **Accuracy**: {metrics.get('accuracy', 0):.4f}
+- **F1-Score**: {metrics.get('f1_score', 0):.4f}
+- **Date**: {manifest['created_at']}
+
+## Déploiement Local (Test)
+
+```bash
+# Build l'image
+docker build -t playstore-predictor .
+
+# Tester localement
+docker run -p 8080:8080 playstore-predictor
+
+# Tester l'API
+curl http://localhost:8080/health
+curl -X POST http://localhost:8080/predict \\
+  -H "Content-Type: application/json" \\
+  -d '{{"reviews": 10000, "size": 25, "price": 0, "category": "GAME", "type": "Free"}}'
+```
+
+## Déploiement sur Google Cloud
+
+### Prérequis
+1. Compte Google Cloud Platform
+2. gcloud CLI installé
+3. Projet GCP créé
+
+### Étapes
+
+1. **Configurer gcloud**
+```bash
+gcloud auth login
+gcloud config set project YOUR_PROJECT_ID
+```
+
+2. **Modifier deploy.sh**
+Éditer `deploy.sh` et remplacer `YOUR_PROJECT_ID`
+
+3. **Déployer**
+```bash
+./deploy.sh
+```
+
+4. **Tester**
+```bash
+# L'URL sera affichée après le déploiement
+curl https://your-service-url.run.app/health
+```
+
+## API Endpoints
+
+- `GET /` - Informations sur le service
+- `GET /health/live` - Sonde de vivacité (le processus répond)
+- `GET /health/ready` - Sonde de disponibilité: 503 tant que le modèle n'est pas
+  chargé et préchauffé, puis durée du préchauffage (`warmup_seconds`).
+  À utiliser comme sonde de démarrage Cloud Run (`/health` en est un alias)
+- `POST /predict` - Faire une prédiction
+
+### Exemple de prédiction
+
+```bash
+curl -X POST https://your-service-url.run.app/predict \\
+  -H "Content-Type: application/json" \\
+  -d '{{
+    "reviews": 10000,
+    "size": 25,
+    "price": 0,
+    "category": "GAME",
+    "type": "Free",
+    "content_rating": "Everyone"
+  }}'
+```
+
+Réponse:
+```json
+{{
+  "success": true,
+  "prediction": 1,
+  "result": "✅ SUCCÈS",
+  "confidence": 95.5
+}}
+```
+
+## Coûts
+
+Google Cloud Run facture uniquement l'utilisation:
+- Gratuit jusqu'à 2M requêtes/mois
+- ~$0.40 pour 1M requêtes supplémentaires
+
+## Support
+
+Documentation: https://cloud.google.com/run/docs
+'''
+
+
+def build_bundle(model, model_name, metrics, bundle_dir=BUNDLE_DIR, X_check=None,
+                 codec=compact_forest.DEFAULT_CODEC):
+    """
+    Écrit le paquet de service et retourne son manifeste.
+    X_check: lignes de vérification de parité de la forêt compacte
+    (lot synthétique si absent).
+    """
+    # Paquet reconstruit de zéro: aucun fichier d'une version précédente
+    if os.path.isdir(bundle_dir):
+        shutil.rmtree(bundle_dir)
+    os.makedirs(bundle_dir)
+
+    parity = None
+    if compact_forest.supports(model):
+        if X_check is None:
+            X_check = serving.synthetic_batch(model, FeaturePipeline.from_model(model), 1000)
+        try:
+            parity = compact_forest.export(model, os.path.join(bundle_dir, COMPACT_FILE), X_check, codec)
+        except ValueError as e:
+            print(f"   ⚠️  Forêt compacte non disponible: {e}")
+    if parity:
+        model_file, model_format = COMPACT_FILE, 'compact'
+    else:
+        import joblib
+        model_file, model_format, codec = PICKLE_FILE, 'pickle', 'none'
+        joblib.dump(compact_model(model), os.path.join(bundle_dir, model_file), compress=MODEL_COMPRESS)
+
+    for target, source in SOURCES.items():
+        shutil.copy(os.path.join(SRC_DIR, source), os.path.join(bundle_dir, target))
+
+    requirements = pinned_requirements(model_format, codec)
+    leaked = TRAINING_ONLY.intersection(line.split('==')[0].lower() for line in requirements)
+    if leaked:
+        raise ValueError(f"Dépendances d'entraînement dans le paquet: {sorted(leaked)}")
+    with open(os.path.join(bundle_dir, 'requirements.txt'), 'w') as f:
+        f.write('\n'.join(requirements) + '\n')
+
+    python_version = f"{sys.version_info.major}.{sys.version_info.minor}"
+    with open(os.path.join(bundle_dir, 'Dockerfile'), 'w') as f:
+        # Forêt compacte: scikit-learn ne doit pas non plus être importé
+        forbid = ['pandas', 'mlflow'] + (['sklearn'] if model_format == 'compact' else [])
+        f.write(_dockerfile(python_version, forbid))
+    with open(os.path.join(bundle_dir, '.dockerignore'), 'w') as f:
+        f.write(DOCKERIGNORE)
+
+    # Empreintes des fichiers de l'image. La version dérive du contenu logique
+    # du modèle et des autres fichiers: reproductible d'une construction à l'autre
+    files = {}
+    for name in sorted(os.listdir(bundle_dir)):
+        path = os.path.join(bundle_dir, name)
+        files[name] = {'sha256': _sha256(path), 'size_bytes': os.path.getsize(path)}
+    fingerprint = model_fingerprint(model)
+    versioned = dict(files, **{model_file: fingerprint})
+    content = hashlib.sha256(json.dumps(versioned, sort_keys=True).encode('utf-8')).hexdigest()
+
+    pipeline = getattr(model, 'feature_pipeline_', None) or {}
+    manifest = {
+        'version': f"{_slug(model_name)}-{content[:12]}",
+        'model_name': model_name,
+        'created_at': datetime.now().isoformat(),
+        'metrics': {key: value for key, value in metrics.items() if isinstance(value, (int, float))},
+        'model': {
+            'file': model_file,
+            'format': model_format,
+            'type': type(model).__name__,
+            'sha256': files[model_file]['sha256'],
+            'fingerprint': fingerprint,
+            'size_bytes': files[model_file]['size_bytes'],
+            'codec': codec if model_format == 'compact' else None,
+            'compress': MODEL_COMPRESS if model_format == 'pickle' else None,
+            'parity': parity and {key: parity[key] for key in ('rows', 'prediction_agreement', 'max_proba_diff')},
+            'feature_names': list(pipeline.get('feature_names', [])),
+        },
+        'python': python_version,
+        'base_image': f"python:{python_version}-slim",
+        'requirements': requirements,
+        'files': files,
+    }
+    with open(os.path.join(bundle_dir, 'manifest.json'), 'w') as f:
+        json.dump(manifest, f, indent=2)
+
+    deploy_path = os.path.join(bundle_dir, 'deploy.sh')
+    with open(deploy_path, 'w') as f:
+        f.write(_deploy_script(manifest))
+    os.chmod(deploy_path, 0o755)
+    with open(os.path.join(bundle_dir, 'README.md'), 'w') as f:
+        f.write(_readme(manifest))
+    return manifest
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def _wait_first_prediction(url, started, timeout=START_TIMEOUT):
+    """Secondes entre `started` et la première prédiction réussie"""
+    body = json.dumps(SAMPLE_REQUEST).encode('utf-8')
+    while time.perf_counter() - started < timeout:
+        try:
+            request = urllib.request.Request(f"{url}/predict", data=body,
+                                             headers={'Content-Type': 'application/json'})
+            with urllib.request.urlopen(request, timeout=2) as response:
+                if response.status == 200:
+                    return time.perf_counter() - started
+        except OSError:
+            pass
+        time.sleep(0.05)
+    raise TimeoutError(f"Aucune prédiction après {timeout}s")
+
+
+def _measure_local(bundle_dir):
+    """Démarrage du paquet dans un processus local (python app.py)"""
+    port = _free_port()
+    started = time.perf_counter()
+    process = subprocess.Popen([sys.executable, 'app.py'], cwd=bundle_dir,
+                               env=dict(os.environ, PORT=str(port)),
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        return None, _wait_first_prediction(f"http://127.0.0.1:{port}", started)
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def _measure_docker(bundle_dir, tag):
+    """Taille de l'image et démarrage du conteneur (docker run -> première prédiction)"""
+    subprocess.run(['docker', 'build', '-q', '-t', tag, bundle_dir], check=True,
+                   stdout=subprocess.DEVNULL)
+    size = subprocess.run(['docker', 'image', 'inspect', '-f', '{{.Size}}', tag], check=True,
+                          capture_output=True, text=True).stdout.strip()
+    port = _free_port()
+    started = time.perf_counter()
+    container = subprocess.run(['docker', 'run', '-d', '--rm', '-p', f"127.0.0.1:{port}:8080", tag],
+                               check=True, capture_output=True, text=True).stdout.strip()
+    try:
+        return int(size), _wait_first_prediction(f"http://127.0.0.1:{port}", started)
+    finally:
+        subprocess.run(['docker', 'stop', container], stdout=subprocess.DEVNULL,
+                       stderr=subprocess.DEVNULL)
+
+
+def measure_bundle(bundle_dir=BUNDLE_DIR, docker=False, report_file=REPORT_FILE):
+    """Mesure la taille et le temps jusqu'à la première prédiction, écrit le rapport"""
+    with open(os.path.join(bundle_dir, 'manifest.json'), 'r') as f:
+        manifest = json.load(f)
+
+    if docker:
+        image_bytes, seconds = _measure_docker(bundle_dir, f"playstore-predictor:{manifest['version']}")
+    else:
+        image_bytes, seconds = _measure_local(bundle_dir)
+
+    report = {
+        'version': manifest['version'],
+        'mode': 'docker' if docker else 'local',
+        'bundle_bytes': sum(entry['size_bytes'] for entry in manifest['files'].values()),
+        'model_bytes': manifest['model']['size_bytes'],
+        'image_bytes': image_bytes,
+        'start_to_first_prediction_seconds': round(seconds, 3),
+        'measured_at': datetime.now().isoformat(),
+    }
+    os.makedirs(os.path.dirname(report_file) or '.', exist_ok=True)
+    with open(report_file, 'w') as f:
+        json.dump(report, f, indent=2)
+    return report
+
+
+def print_report(report):
+    print(f"📦 Paquet {report['version']} ({report['mode']})")
+    print(f"   Paquet: {report['bundle_bytes'] / 1024:.1f} Ko (modèle: {report['model_bytes'] / 1024:.1f} Ko)")
+    if report['image_bytes'] is not None:
+        print(f"   Image:  {report['image_bytes'] / 1024 / 1024:.1f} Mo")
+    print(f"   Démarrage -> première prédiction: {report['start_to_first_prediction_seconds']:.2f}s")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Paquet de service Cloud Run')
+    parser.add_argument('--bundle-dir', default=BUNDLE_DIR)
+    parser.add_argument('--model', help="Reconstruire le paquet à partir de ce modèle (joblib)")
+    parser.add_argument('--name', default='model', help="Nom du modèle (avec --model)")
+    parser.add_argument('--measure', action='store_true', help="Mesurer taille et démarrage")
+    parser.add_argument('--docker', action='store_true', help="Mesurer l'image Docker (sinon processus local)")
+    args = parser.parse_args()
+
+    if args.model:
+        import joblib
+        manifest = build_bundle(joblib.load(args.model), args.name, {}, args.bundle_dir)
+        print(f"✅ Paquet {manifest['version']}: {args.bundle_dir}/")
+    if args.measure:
+        print_report(measure_bundle(args.bundle_dir, docker=args.docker))
+        print(f"📝 Rapport: {REPORT_FILE}")
@@ -0,0 +1,116 @@
+"""
+Backend Spark pour l'Entraînement Distribué
+===========================================
+Lit le dataset avec Spark et répartit l'entraînement des modèles candidats
+et de leurs plis de validation croisée en tâches Spark. Les métriques sont
+renvoyées au driver dans la même structure que le backend scikit-learn.
+
+Testable en local: SPARK_MASTER=local[*] (valeur par défaut).
+"""
+
+import os
+import pickle
+import numpy as np
+from sklearn.base import clone
+from sklearn.metrics import accuracy_score, f1_score
+from sklearn.model_selection import StratifiedKFold
+
+SPARK_MASTER = os.environ.get('SPARK_MASTER', 'local[*]')
+CV_FOLDS = 5
+
+# Indice de tâche réservé à l'entraînement complet (train -> test)
+HOLDOUT = -1
+
+
+def get_spark_session(master=SPARK_MASTER, app_name='playstore-training'):
+    """Crée (ou réutilise) la session Spark"""
+    from pyspark.sql import SparkSession
+
+    spark = SparkSession.builder.master(master).appName(app_name).getOrCreate()
+    # Les exécuteurs doivent pouvoir importer les fonctions de tâche: ce module
+    # n'importe rien d'autre de src/ au chargement (ingestion est importé par
+    # read_dataset, sur le driver uniquement)
+    spark.sparkContext.addPyFile(os.path.abspath(__file__))
+    return spark
+
+
+def read_dataset(spark, path):
+    """Lit le CSV avec Spark et retourne les colonnes utiles en pandas"""
+    from pyspark.sql.functions import col
+    from ingestion import USECOLS
+
+    sdf = spark.read.csv(path, header=True, quote='"', escape='"')
+    columns = [c for c in USECOLS if c in sdf.columns]
+    sdf = sdf.select(*columns)
+    if 'Rating' in columns:
+        sdf = sdf.withColumn('Rating', col('Rating').cast('float'))
+    return sdf.toPandas()
+
+
+def _run_task(task, data):
+    """
+    Exécutée sur un exécuteur: entraîne un modèle sur un pli de CV
+    (score d'accuracy) ou sur tout le train (métriques test + modèle)
+    """
+    model_name, estimator, fold = task
+    X_train, y_train, X_test, y_test, folds = data
+    model = clone(estimator)
+
+    try:
+        if fold == HOLDOUT:
+            model.fit(X_train, y_train)
+            y_pred = model.predict(X_test)
+            return model_name, fold, {
+                'accuracy': accuracy_score(y_test, y_pred),
+                'f1_score': f1_score(y_test, y_pred, average='weighted'),
+                'model': pickle.dumps(model),
+            }
+
+        train_idx, val_idx = folds[fold]
+        model.fit(X_train[train_idx], y_train[train_idx])
+        score = accuracy_score(y_train[val_idx], model.predict(X_train[val_idx]))
+        return model_name, fold, {'accuracy': score}
+    except Exception as e:
+        # Une erreur ne doit pas faire échouer les tâches des autres modèles
+        return model_name, fold, {'error': f"{type(e).__name__}: {e}"}
+
+
+def evaluate_candidates_spark(spark, models, X_train, y_train, X_test, y_test, cv=CV_FOLDS):
+    """
+    Répartit (modèles x plis) en tâches Spark et rassemble les résultats.
+
+    Retourne {model_name: (modèle entraîné, accuracy, f1, cv_scores)},
+    ou {model_name: RuntimeError} si une de ses tâches a échoué.
+    Les plis sont identiques à cross_val_score(cv=5) pour un classifieur
+    (StratifiedKFold sans mélange), les scores sont donc comparables.
+    """
+    X_train, y_train = np.asarray(X_train), np.asarray(y_train)
+    X_test, y_test = np.asarray(X_test), np.asarray(y_test)
+    folds = list(StratifiedKFold(n_splits=cv).split(X_train, y_train))
+
+    tasks = [(name, model, fold) for name, model in models.items()
+             for fold in [HOLDOUT, *range(cv)]]
+
+    sc = spark.sparkContext
+    data = sc.broadcast((X_train, y_train, X_test, y_test, folds))
+    print(f"   ⚡ Spark: {len(tasks)} tâches ({len(models)} modèles x {cv + 1}) sur {sc.master}")
+    outputs = sc.parallelize(tasks, numSlices=len(tasks)).map(lambda t: _run_task(t, data.value)).collect()
+    data.unpersist()
+
+    evaluations = {}
+    for model_name in models:
+        errors = [out['error'] for name, _, out in outputs if name == model_name and 'error' in out]
+        if errors:
+            evaluations[model_name] = RuntimeError(errors[0])
+            continue
+
+        cv_scores = np.array([out['accuracy'] for name, fold, out in sorted(outputs, key=lambda o: o[1])
+                              if name == model_name and fold != HOLDOUT])
+        holdout = next(out for name, fold, out in outputs if name == model_name and fold == HOLDOUT)
+        evaluations[model_name] = (
+            pickle.loads(holdout['model']),
+            holdout['accuracy'],
+            holdout['f1_score'],
+            cv_scores,
+        )
+    return evaluations
@@ -0,0 +1,80 @@
+"""
+Lecture de la Fin des Fichiers en Ajout Seul
+============================================
+Retourne les N derniers enregistrements d'un fichier (log ou CSV) en lisant
+le fichier par blocs depuis la fin, sans charger ce qui précède.
+
+Pour les CSV, un saut de ligne ne termine un enregistrement que s'il est hors
+d'un champ entre guillemets: le fichier se terminant hors guillemets, c'est
+le cas si le nombre de '"' entre ce saut de ligne et la fin est pair
+(les guillemets échappés '""' comptent double).
+"""
+
+import csv
+import io
+import os
+
+BLOCK_SIZE = 64 * 1024
+
+
+def _tail_offset(f, n, quoted, block_size=BLOCK_SIZE):
+    """
+    Offset du début des n derniers enregistrements.
+    Retourne 0 si le fichier en contient moins de n (début du fichier atteint).
+    """
+    end = f.seek(0, os.SEEK_END)
+    # Le saut de ligne final termine le dernier enregistrement, il n'en commence pas un
+    f.seek(max(end - 1, 0))
+    if end and f.read(1) == b'\n':
+        end -= 1
+
+    found = 0
+    quotes = 0
+    position = end
+    while position > 0:
+        start = max(position - block_size, 0)
+        f.seek(start)
+        block = f.read(position - start)
+        hi = len(block)
+        while True:
+            index = block.rfind(b'\n', 0, hi)
+            if quoted:
+                quotes += block.count(b'"', index + 1, hi)
+            if index < 0:
+                break
+            if not quoted or quotes % 2 == 0:
+                found += 1
+                if found == n:
+                    return start + index + 1
+            hi = index
+        position = start
+    return 0
+
+
+def tail_lines(path, n=10, block_size=BLOCK_SIZE):
+    """Les n dernières lignes d'un fichier texte (sans saut de ligne)"""
+    if n <= 0 or not os.path.exists(path):
+        return []
+    with open(path, 'rb') as f:
+        offset = _tail_offset(f, n, quoted=False, block_size=block_size)
+        f.seek(offset)
+        text = f.read().decode('utf-8', errors='replace')
+    return text.splitlines()[-n:]
+
+
+def tail_csv(path, n=10, block_size=BLOCK_SIZE):
+    """Les n derniers enregistrements d'un CSV avec en-tête, en dictionnaires"""
+    if n <= 0 or not os.path.exists(path):
+        return []
+    with open(path, 'rb') as f:
+        header = next(csv.reader([f.readline().decode('utf-8')]), None)
+        if not header:
+            return []
+        offset = _tail_offset(f, n, quoted=True, block_size=block_size)
+        f.seek(offset)
+        text = f.read().decode('utf-8')
+
+    rows = [row for row in csv.reader(io.StringIO(text, newline='')) if row]
+    if offset == 0:
+        rows = rows[1:]
+    return [dict(zip(header, row)) for row in rows[-n:]]
@@ -0,0 +1,52 @@
+"""
+Test de Parité du Pipeline de Features
+======================================
+Le chemin une-ligne (transform_one, service) doit produire exactement la
+matrice du chemin vectorisé (transform_frame, entraînement), y compris sur
+les valeurs mal formées ou manquantes.
+
+    python -m pytest src/test_features.py
+    python src/test_features.py
+"""
+
+import sys
+
+import numpy as np
+import pandas as pd
+
+from features import NUMERIC_COLUMNS, PARSERS, FeaturePipeline, _parse_scalar
+
+# Valeurs texte acceptées ou rejetées (NaN) par les parseurs
+RAW_VALUES = ['-5', '1e3', 'inf', 'nan', '', ' 12 ', '1,000+', '$4.99', '19M', '500k',
+              '1.5.2', 'Varies with device', '3']
+
+
+def test_scalar_parser_matches_vectorized():
+    for column in NUMERIC_COLUMNS:
+        batch = PARSERS[column](np.array(RAW_VALUES))
+        scalar = np.array([_parse_scalar(column, value) for value in RAW_VALUES])
+        np.testing.assert_array_equal(scalar, batch, err_msg=column)
+
+
+def test_transform_one_matches_transform_frame():
+    n = len(RAW_VALUES)
+    df = pd.DataFrame({
+        'Reviews': RAW_VALUES,
+        'Size': RAW_VALUES[::-1],
+        'Price': RAW_VALUES[3:] + RAW_VALUES[:3],
+        'Category': ['GAME', None, 'TOOLS'] * (n // 3) + ['GAME'] * (n % 3),
+        'Type': ['Free', 'Paid', np.nan] * (n // 3) + ['Free'] * (n % 3),
+        'Content Rating': ['Everyone'] * n,
+    })
+    pipeline = FeaturePipeline().fit(df)
+
+    batch = pipeline.transform_frame(df)
+    rows = np.vstack([pipeline.transform_one(record) for record in df.to_dict('records')])
+    np.testing.assert_array_equal(rows, batch)
+
+
+if __name__ == '__main__':
+    test_scalar_parser_matches_vectorized()
+    test_transform_one_matches_transform_frame()
+    print("✅ Parité une-ligne / lot OK")
+    sys.exit(0)
@@ -0,0 +1,59 @@
+"""
+Test de la Rétention du Registre
+================================
+Publie plus de RETENTION candidats après un déploiement en production (un gc
+après chaque publication, comme le pipeline), puis vérifie que le rollback
+de la production pointe toujours sur un blob existant.
+
+    python -m pytest src/test_model_registry.py
+    python src/test_model_registry.py
+"""
+
+import os
+import sys
+import tempfile
+
+import joblib
+from sklearn.linear_model import LogisticRegression
+
+import deploy
+from model_registry import RETENTION, ModelRegistry
+
+
+def _model(index):
+    # Paramètre différent: empreinte (et donc version) différente
+    return LogisticRegression(C=1.0 + index)
+
+
+def test_rollback_survives_retention(tmp_path):
+    cwd = os.getcwd()
+    os.chdir(tmp_path)
+    try:
+        os.makedirs('models')
+        registry = ModelRegistry()
+
+        first = registry.publish(_model(0), deploy.PRODUCTION_MODEL, 'production')
+        second = registry.publish(_model(1), 'models/candidate_model.pkl', 'candidate')
+        registry.promote('production', second['id'], deploy.PRODUCTION_MODEL)
+
+        # Chaque exécution du pipeline publie un nouveau candidat puis lance le gc
+        for index in range(2, RETENTION + 4):
+            registry.publish(_model(index), 'models/candidate_model.pkl', 'candidate')
+            registry.gc()
+
+        target = registry.rollback_target('production')
+        assert target is not None and target['id'] == first['id']
+        assert os.path.exists(target['path'])
+
+        deploy.rollback()
+        assert registry.stage('production')['id'] == first['id']
+        assert joblib.load(deploy.PRODUCTION_MODEL).C == 1.0
+    finally:
+        os.chdir(cwd)
+
+
+if __name__ == '__main__':
+    with tempfile.TemporaryDirectory() as tmp:
+        test_rollback_survives_retention(tmp)
+    print("✅ Rollback après rétention OK")
+    sys.exit(0)
@@ -0,0 +1,52 @@
+"""
+Test du Backend Spark en Local
+==============================
+Démarre une session SPARK_MASTER=local[*], lance evaluate_candidates_spark
+sur un petit jeu synthétique et vérifie que les exécuteurs (processus Python
+séparés) importent les fonctions de tâche et que les scores de CV sont ceux
+de cross_val_score(cv=5).
+
+Ignoré si pyspark n'est pas installé.
+
+    python -m pytest src/test_spark_backend.py
+    python src/test_spark_backend.py
+"""
+
+import sys
+import numpy as np
+import pytest
+from sklearn.datasets import make_classification
+from sklearn.linear_model import LogisticRegression
+from sklearn.model_selection import cross_val_score
+from sklearn.tree import DecisionTreeClassifier
+
+
+def test_spark_backend():
+    pytest.importorskip('pyspark')
+    from spark_backend import CV_FOLDS, evaluate_candidates_spark, get_spark_session
+
+    X, y = make_classification(n_samples=300, n_features=6, random_state=42)
+    X_train, X_test, y_train, y_test = X[:240], X[240:], y[:240], y[240:]
+    models = {
+        'DecisionTree': DecisionTreeClassifier(max_depth=4, random_state=42),
+        'LogisticRegression': LogisticRegression(max_iter=1000, random_state=42),
+    }
+
+    spark = get_spark_session('local[*]', 'playstore-training-test')
+    try:
+        evaluations = evaluate_candidates_spark(spark, models, X_train, y_train, X_test, y_test)
+    finally:
+        spark.stop()
+
+    for name, estimator in models.items():
+        result = evaluations[name]
+        assert not isinstance(result, Exception), f"{name}: {result}"
+        model, accuracy, f1, cv_scores = result
+        expected = cross_val_score(estimator, X_train, y_train, cv=CV_FOLDS, scoring='accuracy')
+        np.testing.assert_allclose(cv_scores, expected, err_msg=name)
+        assert np.isclose(accuracy, (model.predict(X_test) == y_test).mean()), name
+        assert 0.0 <= f1 <= 1.0, name
+
+
+if __name__ == '__main__':
+    sys.exit(pytest.main([__file__, '-q']))
@@ -0,0 +1,264 @@
+"""
+Client de Tracking MLflow Non Bloquant
+======================================
+Les runs (paramètres, métriques, modèle) sont envoyés par un thread de fond:
+métriques et paramètres en un seul log_batch, modèle en artefact. Si le
+serveur est injoignable, le run est écrit dans un répertoire de spool local
+et pourra être rejoué plus tard:
+
+    python src/tracking.py --replay
+"""
+
+import argparse
+import json
+import os
+import pickle
+import queue
+import shutil
+import tempfile
+import threading
+import time
+import urllib.request
+import uuid
+from datetime import datetime
+
+MLFLOW_TRACKING_URI = os.environ.get('MLFLOW_TRACKING_URI', 'http://localhost:5000')
+SPOOL_DIR = os.environ.get('MLFLOW_SPOOL_DIR', 'mlflow_spool')
+
+# Délai max pour vérifier que le serveur répond (évite les retries MLflow de plusieurs minutes)
+HEALTH_TIMEOUT = float(os.environ.get('MLFLOW_HEALTH_TIMEOUT', 2))
+
+
+def server_reachable(tracking_uri, timeout=HEALTH_TIMEOUT):
+    """Vérifie rapidement qu'un serveur de tracking HTTP répond"""
+    if not tracking_uri.startswith(('http://', 'https://')):
+        # Backends locaux (file:, sqlite:) toujours disponibles
+        return True
+    try:
+        with urllib.request.urlopen(f"{tracking_uri.rstrip('/')}/health", timeout=timeout) as response:
+            return response.status == 200
+    except Exception:
+        return False
+
+
+class AsyncTracker:
+    """
+    File d'envoi des runs MLflow vers un thread de fond.
+
+    log_run() retourne immédiatement; flush() attend la fin des envois.
+    Un run mis en file après flush() relance un thread d'envoi (un flush()
+    de plus l'attend). Tout run qui ne peut pas être envoyé est écrit dans
+    le spool.
+    """
+
+    def __init__(self, tracking_uri=MLFLOW_TRACKING_URI, experiment_name='google-playstore-ci-cd',
+                 spool_dir=SPOOL_DIR):
+        self.tracking_uri = tracking_uri
+        self.experiment_name = experiment_name
+        self.spool_dir = spool_dir
+        self.available = server_reachable(tracking_uri)
+        self.sent = 0
+        self.spooled = 0
+        self._queue = queue.Queue()
+        self._client = None
+        self._experiment_id = None
+        self._lock = threading.Lock()
+        self._workers = []
+        # Fin de file déjà envoyée par flush(): le thread d'envoi s'arrête
+        self._closed = False
+        self._start_worker()
+
+        if not self.available:
+            print(f"⚠️ MLflow non disponible: {tracking_uri}")
+            print(f"   Les runs seront conservés dans {spool_dir}/ (rejouer: python src/tracking.py --replay)")
+
+    def log_run(self, run_name, params=None, metrics=None, tags=None, model=None, artifacts=None):
+        """Met un run en file d'envoi (non bloquant)"""
+        record = {
+            'experiment_name': self.experiment_name,
+            'run_name': run_name,
+            'params': {k: str(v) for k, v in (params or {}).items()},
+            'metrics': {k: float(v) for k, v in (metrics or {}).items()},
+            'tags': {k: str(v) for k, v in (tags or {}).items()},
+            'timestamp': int(time.time() * 1000),
+            'artifacts': list(artifacts or []),
+        }
+        # Sérialisé ici: le modèle peut être modifié ensuite par le pipeline
+        model_bytes = pickle.dumps(model) if model is not None else None
+        with self._lock:
+            if self._closed:
+                # Le thread d'envoi s'arrête sur la fin de file: un nouveau
+                # thread traite ce run et les suivants
+                self._closed = False
+                self._start_worker()
+            self._queue.put((record, model_bytes))
+
+    def flush(self, timeout=None):
+        """Attend l'envoi (ou le spool) de tous les runs en file"""
+        with self._lock:
+            if not self._closed:
+                self._queue.put(None)
+                self._closed = True
+            workers = list(self._workers)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for worker in workers:
+            worker.join(None if deadline is None else max(0.0, deadline - time.monotonic()))
+        with self._lock:
+            self._workers = [worker for worker in self._workers if worker.is_alive()]
+        print(f"   📡 MLflow: {self.sent} run(s) envoyé(s), {self.spooled} en spool")
+
+    def _start_worker(self):
+        worker = threading.Thread(target=self._run, name='mlflow-tracker', daemon=True)
+        worker.start()
+        self._workers.append(worker)
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            record, model_bytes = item
+            if self.available:
+                try:
+                    send_run(self._get_client(), self._get_experiment_id(), record, model_bytes)
+                    self.sent += 1
+                    continue
+                except Exception as e:
+                    print(f"   ⚠️  MLflow logging échoué ({record['run_name']}): {e}")
+                    # Ne plus attendre le serveur pour les runs suivants
+                    self.available = False
+            spool_run(self.spool_dir, record, model_bytes)
+            self.spooled += 1
+
+    def _get_client(self):
+        if self._client is None:
+            from mlflow.tracking import MlflowClient
+            self._client = MlflowClient(self.tracking_uri)
+        return self._client
+
+    def _get_experiment_id(self):
+        if self._experiment_id is None:
+            self._experiment_id = get_experiment_id(self._get_client(), self.experiment_name)
+        return self._experiment_id
+
+
+def get_experiment_id(client, experiment_name):
+    experiment = client.get_experiment_by_name(experiment_name)
+    if experiment is not None:
+        return experiment.experiment_id
+    return client.create_experiment(experiment_name)
+
+
+def send_run(client, experiment_id, record, model_bytes=None):
+    """Crée le run, envoie params/métriques en un log_batch puis les artefacts"""
+    from mlflow.entities import Metric, Param, RunTag
+
+    run = client.create_run(experiment_id, run_name=record['run_name'],
+                            start_time=record['timestamp'])
+    run_id = run.info.run_id
+    try:
+        client.log_batch(
+            run_id,
+            metrics=[Metric(k, v, record['timestamp'], 0) for k, v in record['metrics'].items()],
+            params=[Param(k, v) for k, v in record['params'].items()],
+            tags=[RunTag(k, v) for k, v in record['tags'].items()],
+        )
+        for path in record['artifacts']:
+            if os.path.exists(path):
+                client.log_artifact(run_id, path)
+        if model_bytes is not None:
+            import mlflow.sklearn
+            with tempfile.TemporaryDirectory() as tmp:
+                model_dir = os.path.join(tmp, 'model')
+                mlflow.sklearn.save_model(pickle.loads(model_bytes), model_dir)
+                client.log_artifacts(run_id, model_dir, 'model')
+        client.set_terminated(run_id)
+    except Exception:
+        client.set_terminated(run_id, status='FAILED')
+        raise
+    return run_id
+
+
+def spool_run(spool_dir, record, model_bytes=None):
+    """Écrit un run non envoyé dans le spool local"""
+    name = f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{record['run_name']}_{uuid.uuid4().hex[:8]}"
+    run_dir = os.path.join(spool_dir, name)
+    os.makedirs(run_dir, exist_ok=True)
+
+    # Copier les artefacts: ils peuvent être écrasés avant le rejeu
+    record = dict(record)
+    copied = []
+    for path in record['artifacts']:
+        if os.path.exists(path):
+            target = os.path.join(run_dir, 'artifacts', os.path.basename(path))
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            shutil.copy(path, target)
+            copied.append(target)
+    record['artifacts'] = copied
+
+    if model_bytes is not None:
+        with open(os.path.join(run_dir, 'model.pkl'), 'wb') as f:
+            f.write(model_bytes)
+    with open(os.path.join(run_dir, 'run.json'), 'w') as f:
+        json.dump(record, f, indent=2)
+    return run_dir
+
+
+def replay(spool_dir=SPOOL_DIR, tracking_uri=MLFLOW_TRACKING_URI):
+    """Rejoue les runs du spool vers le serveur (supprimés une fois envoyés)"""
+    print("="*60)
+    print("🔁 REJEU DES RUNS MLFLOW EN SPOOL")
+    print("="*60)
+
+    if not os.path.isdir(spool_dir) or not os.listdir(spool_dir):
+        print("✅ Aucun run en attente")
+        return 0
+    if not server_reachable(tracking_uri):
+        print(f"❌ Serveur MLflow injoignable: {tracking_uri}")
+        return 0
+
+    from mlflow.tracking import MlflowClient
+    client = MlflowClient(tracking_uri)
+    experiments = {}
+    replayed = 0
+
+    for name in sorted(os.listdir(spool_dir)):
+        run_dir = os.path.join(spool_dir, name)
+        run_file = os.path.join(run_dir, 'run.json')
+        if not os.path.exists(run_file):
+            continue
+        with open(run_file, 'r') as f:
+            record = json.load(f)
+
+        model_bytes = None
+        model_file = os.path.join(run_dir, 'model.pkl')
+        if os.path.exists(model_file):
+            with open(model_file, 'rb') as f:
+                model_bytes = f.read()
+
+        try:
+            experiment = record['experiment_name']
+            if experiment not in experiments:
+                experiments[experiment] = get_experiment_id(client, experiment)
+            run_id = send_run(client, experiments[experiment], record, model_bytes)
+            shutil.rmtree(run_dir)
+            replayed += 1
+            print(f"   ✅ {record['run_name']} -> {run_id}")
+        except Exception as e:
+            print(f"   ❌ {record['run_name']}: {e}")
+
+    print(f"\n📡 {replayed} run(s) rejoué(s)")
+    print("="*60)
+    return replayed
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Tracking MLflow non bloquant')
+    parser.add_argument('--replay', action='store_true', help='Rejouer les runs en spool')
+    parser.add_argument('--spool-dir', default=SPOOL_DIR)
+    args = parser.parse_args()
+
+    if args.replay:
+        replay(args.spool_dir)
+    else:
+        parser.print_help()
@@ -4,7 +4,6 @@ Pipeline d'Entraînement avec MLflow
 Entraîne un nouveau modèle et le compare avec le modèle en production
 """
 
-import pandas as pd
 import numpy as np
 import mlflow
 import mlflow.sklearn
@@ -12,10 +11,14 @@ from sklearn.ensemble import RandomForestClassifier
 from sklearn.linear_model import LogisticRegression
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import accuracy_score, f1_score, roc_auc_score, classification_report
-import joblib
 import os
 from datetime import datetime
 
+from features import FeaturePipeline
+from ingestion import read_playstore_csv
+from data_version import record_version, load_manifest, print_manifest, row_fingerprints, attach_training_rows
+from model_registry import ModelRegistry
+
 # Configuration MLflow
 MLFLOW_TRACKING_URI = os.environ.get('MLFLOW_TRACKING_URI', 'http://localhost:5000')
 mlflow.set_tracking_uri(MLFLOW_TRACKING_URI)
@@ -23,24 +26,25 @@ mlflow.set_tracking_uri(MLFLOW_TRACKING_URI)
 def load_data():
     """Charge et prépare les données"""
     print("📊 Chargement des données...")
-    df = pd.read_csv('data/googleplaystore_clean.csv')
+    # Lecture par blocs avec types compacts (float32, codes catégoriels)
+    df = read_playstore_csv('data/googleplaystore_clean.csv')
     
-    # Ici, ajoutez votre logique de preprocessing
-    # Pour la démo, on crée des features synthétiques
-    X = df.select_dtypes(include=[np.number]).fillna(0)
+    # Pipeline de features partagé avec l'interface de prédiction
+    feature_pipeline = FeaturePipeline().fit(df)
+    X = feature_pipeline.transform_frame(df)
     
     # Créer une target si elle n'existe pas (exemple)
     if 'Rating' in df.columns:
-        y = (df['Rating'] > 4.0).astype(int)
+        y = (df['Rating'] > 4.0).astype(int).to_numpy()
     else:
         # Fallback: target synthétique
-        y = (X.iloc[:, 0] > X.iloc[:, 0].median()).astype(int)
+        y = (X[:, 0] > np.median(X[:, 0])).astype(int)
     
     print(f"✅ Données chargées: {len(df)} applications")
     print(f"   Features: {X.shape[1]}")
     print(f"   Distribution: {np.mean(y):.1%} succès")
     
-    return X, y
+    return X, y, feature_pipeline, df
 
 def train_model(X_train, y_train, X_test, y_test, experiment_name="google-playstore-ci-cd"):
     """Entraîne plusieurs modèles et sélectionne le meilleur"""
@@ -122,19 +126,18 @@ def compare_with_production(new_metrics):
     
     return improvement
 
-def main():
-    """Pipeline principal"""
-    
-    print("="*60)
-    print("🚀 PIPELINE D'ENTRAÎNEMENT ML")
-    print("="*60)
-    
+def run(data=None):
+    """
+    Entraîne, compare et publie le candidat, puis écrit les fichiers /tmp du
+    workflow. data: résultat de load_data() déjà chargé (orchestrateur).
+    Retourne les résultats en mémoire.
+    """
     # Charger les données
-    X, y = load_data()
+    X, y, feature_pipeline, df = data or load_data()
     
-    # Split
-    X_train, X_test, y_train, y_test = train_test_split(
-        X, y, test_size=0.2, random_state=42, stratify=y
+    # Split (empreintes des lignes découpées avec les features)
+    X_train, X_test, y_train, y_test, rows_train, _ = train_test_split(
+        X, y, row_fingerprints(df), test_size=0.2, random_state=42, stratify=y
     )
     
     # Entraîner
@@ -143,14 +146,18 @@ def main():
     # Comparer
     improvement = compare_with_production(best_metrics)
     
-    # Sauvegarder le modèle
+    # Sauvegarder le modèle (avec son pipeline de features et ses lignes d'entraînement)
+    feature_pipeline.attach(best_model)
+    attach_training_rows(best_model, rows_train)
     os.makedirs('models', exist_ok=True)
     model_path = 'models/candidate_model.pkl'
-    joblib.dump(best_model, model_path)
+    # Blob adressé par contenu + lien models/candidate_model.pkl (jamais écrit en place)
+    ModelRegistry().publish(best_model, model_path, 'candidate', metrics=best_metrics)
     
     # Sauvegarder les métriques
+    model_version = f"v{datetime.now().strftime('%Y%m%d_%H%M%S')}"
     with open('/tmp/model_version.txt', 'w') as f:
-        f.write(f"v{datetime.now().strftime('%Y%m%d_%H%M%S')}")
+        f.write(model_version)
     
     with open('/tmp/accuracy.txt', 'w') as f:
         f.write(f"{best_metrics['accuracy']:.4f}")
@@ -158,14 +165,37 @@ def main():
     with open('/tmp/improvement.txt', 'w') as f:
         f.write(f"{improvement:.4f}")
     
-    # Mettre à jour le compteur de données
-    df = pd.read_csv('data/googleplaystore_clean.csv')
+    # Enregistrer la version des données (blocs + empreintes par ligne)
+    version = record_version('data/googleplaystore_clean.csv')
     with open('models/last_training_date.txt', 'w') as f:
-        f.write(str(len(df)))
+        f.write(str(version['rows']))
     
     print("\n✅ Entraînement terminé avec succès!")
     print(f"📦 Modèle sauvegardé: {model_path}")
     print("="*60)
+    
+    return {
+        'model': best_model,
+        'metrics': best_metrics,
+        'improvement': improvement,
+        'model_version': model_version,
+        'model_path': model_path,
+        'X_test': X_test,
+    }
+
+def main():
+    """Pipeline principal"""
+    
+    print("="*60)
+    print("🚀 PIPELINE D'ENTRAÎNEMENT ML")
+    print("="*60)
+    
+    # Changements détectés par check_new_data.py
+    manifest = load_manifest()
+    if manifest:
+        print_manifest(manifest)
+    
+    run()
 
 if __name__ == '__main__':
     main()
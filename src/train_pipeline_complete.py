@@ -9,8 +9,6 @@ Pipeline ML Complet avec Docker et Déploiement Automatique
 
 import pandas as pd
 import numpy as np
-import mlflow
-import mlflow.sklearn
 from sklearn.ensemble import RandomForestClassifier, GradientBoostingClassifier
 from sklearn.linear_model import LogisticRegression
 from sklearn.model_selection import train_test_split, cross_val_score
@@ -19,43 +17,67 @@ import joblib
 import os
 import json
 from datetime import datetime
-import shutil
+import argparse
+
+from features import FeaturePipeline
+from ingestion import read_playstore_csv
+from profiling import StageProfiler, TIMINGS_PATH
+from tracking import AsyncTracker
+from data_version import record_version, row_fingerprints, attach_training_rows
+from model_registry import ModelRegistry
+from compact_forest import export_sidecar
+import onnx_model
+import forest_pruning
+import model_selection
+import fit_cache
+from serving_bundle import BUNDLE_DIR, MEASURE_MODE, build_bundle, measure_bundle
+from serving_bundle import print_report as print_bundle_report
 
 # Configuration MLflow
 MLFLOW_TRACKING_URI = os.environ.get('MLFLOW_TRACKING_URI', 'http://localhost:5000')
-mlflow.set_tracking_uri(MLFLOW_TRACKING_URI)
 
-def load_data():
+# Plis de validation croisée des candidats
+CV_FOLDS = 5
+
+# Mesure des étapes (PIPELINE_PROFILE=1 pour capturer aussi des profils cProfile)
+profiler = StageProfiler(cprofile=os.environ.get('PIPELINE_PROFILE') == '1')
+
+def load_data(spark=None):
     """Charge et prépare les données"""
     print("📊 Chargement des données...")
-    df = pd.read_csv('data/googleplaystore_clean.csv')
+    if spark is not None:
+        # Lecture distribuée par Spark
+        from spark_backend import read_dataset
+        df = read_dataset(spark, 'data/googleplaystore_clean.csv')
+    else:
+        # Lecture par blocs avec types compacts (float32, codes catégoriels)
+        df = read_playstore_csv('data/googleplaystore_clean.csv')
     
-    # Sélectionner uniquement les colonnes numériques
-    X = df.select_dtypes(include=[np.number]).fillna(0)
+    # Pipeline de features partagé avec l'interface de prédiction
+    feature_pipeline = FeaturePipeline().fit(df)
+    X = feature_pipeline.transform_frame(df)
     
     # Créer la target (Rating > 4.0 = Succès)
     if 'Rating' in df.columns:
-        y = (df['Rating'] > 4.0).astype(int)
+        y = (df['Rating'] > 4.0).astype(int).to_numpy()
     else:
-        y = (X.iloc[:, 0] > X.iloc[:, 0].median()).astype(int)
+        y = (X[:, 0] > np.median(X[:, 0])).astype(int)
     
     print(f"✅ Données chargées: {len(df)} applications")
-    print(f"   Features: {X.columns.tolist()}")
+    print(f"   Features: {feature_pipeline.feature_names}")
     print(f"   Distribution: {np.mean(y):.1%} succès")
     
-    return X, y, df
+    return X, y, df, feature_pipeline
 
-def train_and_compare_models(X_train, y_train, X_test, y_test, experiment_name="google-playstore-ci-cd"):
+def train_and_compare_models(X_train, y_train, X_test, y_test, experiment_name="google-playstore-ci-cd", spark=None, tracker=None):
     """
     Entraîne plusieurs modèles et sélectionne le meilleur
+    Si une session Spark est fournie, l'entraînement et la CV sont répartis en tâches Spark
+    Les runs MLflow sont envoyés en arrière-plan par le tracker (spool local si serveur indisponible)
     """
-    try:
-        mlflow.set_experiment(experiment_name)
-        use_mlflow = True
-    except Exception as e:
-        print(f"⚠️ MLflow non disponible: {e}")
-        print("   Continuation sans MLflow...")
-        use_mlflow = False
+    own_tracker = tracker is None
+    if own_tracker:
+        tracker = AsyncTracker(MLFLOW_TRACKING_URI, experiment_name)
     
     models = {
         'RandomForest': RandomForestClassifier(n_estimators=100, random_state=42, max_depth=10),
@@ -71,49 +93,94 @@ def train_and_compare_models(X_train, y_train, X_test, y_test, experiment_name="
     print("\n🔧 Entraînement et comparaison des modèles...")
     print("="*60)
     
+    distributed = None
+    if spark is not None:
+        try:
+            from spark_backend import evaluate_candidates_spark
+            with profiler.stage('spark_evaluation'):
+                distributed = evaluate_candidates_spark(spark, models, X_train, y_train, X_test, y_test)
+        except Exception as e:
+            print(f"⚠️ Évaluation Spark échouée: {e}")
+            print("   Continuation avec le backend local...")
+    
+    # Cache des entraînements locaux (clé: données, version des features, paramètres)
+    cache = fit_cache.FitCache() if fit_cache.ENABLED and distributed is None else None
+    if cache:
+        data_hash = fit_cache.dataset_hash(X_train, y_train, X_test, y_test)
+    
     for model_name, model in models.items():
         print(f"\n📊 {model_name}:")
         
         try:
-            if use_mlflow:
-                mlflow_context = mlflow.start_run(run_name=f"{model_name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}")
-                mlflow_context.__enter__()
-            
-            # Entraînement
-            model.fit(X_train, y_train)
-            
-            # Prédictions
-            y_pred = model.predict(X_test)
-            
-            # Métriques
-            accuracy = accuracy_score(y_test, y_pred)
-            f1 = f1_score(y_test, y_pred, average='weighted')
-            
-            # Cross-validation pour plus de robustesse
-            cv_scores = cross_val_score(model, X_train, y_train, cv=5, scoring='accuracy')
+            if distributed is not None:
+                # Résultats calculés par les tâches Spark
+                if isinstance(distributed[model_name], Exception):
+                    raise distributed[model_name]
+                model, accuracy, f1, cv_scores = distributed[model_name]
+            else:
+                # Entraînement déjà fait sur les mêmes données et paramètres: réutilisé
+                key = fit_cache.fit_key(model, data_hash, cv=CV_FOLDS, scoring='accuracy') if cache else None
+                cached = cache.get(key) if cache else None
+                if cached is not None:
+                    model, cached_metrics = cached
+                    accuracy, f1 = cached_metrics['accuracy'], cached_metrics['f1_score']
+                    cv_scores = np.array(cached_metrics['cv_scores'])
+                    print(f"   ♻️  Entraînement et CV repris du cache ({key[:12]})")
+                else:
+                    # Entraînement
+                    with profiler.stage(f'{model_name}/fit'):
+                        model.fit(X_train, y_train)
+                    
+                    # Prédictions
+                    with profiler.stage(f'{model_name}/predict'):
+                        y_pred = model.predict(X_test)
+                    
+                    # Métriques
+                    accuracy = accuracy_score(y_test, y_pred)
+                    f1 = f1_score(y_test, y_pred, average='weighted')
+                    
+                    # Cross-validation pour plus de robustesse
+                    with profiler.stage(f'{model_name}/cv'):
+                        cv_scores = cross_val_score(model, X_train, y_train, cv=CV_FOLDS, scoring='accuracy')
+                    
+                    if cache:
+                        cache.put(key, model, {'accuracy': accuracy, 'f1_score': f1,
+                                               'cv_scores': cv_scores.tolist()})
             cv_mean = cv_scores.mean()
             cv_std = cv_scores.std()
             
             # Calculer le score combiné (moyenne de accuracy et CV)
             combined_score = (accuracy + cv_mean) / 2
             
-            # Log dans MLflow si disponible
-            if use_mlflow:
-                try:
-                    mlflow.log_param("model_type", model_name)
-                    mlflow.log_metric("accuracy", accuracy)
-                    mlflow.log_metric("f1_score", f1)
-                    mlflow.log_metric("cv_mean", cv_mean)
-                    mlflow.log_metric("cv_std", cv_std)
-                    mlflow.log_metric("combined_score", combined_score)
-                    mlflow.sklearn.log_model(model, "model")
-                except Exception as e:
-                    print(f"   ⚠️  MLflow logging échoué: {e}")
+            # Coût de service: latence, taille et mémoire (sélection multi-objectif)
+            with profiler.stage(f'{model_name}/serving_cost'):
+                cost = model_selection.serving_cost(model, X_test)
+            
+            # Log dans MLflow (envoi non bloquant en un seul log_batch)
+            with profiler.stage(f'{model_name}/mlflow'):
+                tracker.log_run(
+                    f"{model_name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}",
+                    params={"model_type": model_name},
+                    metrics={
+                        "accuracy": accuracy,
+                        "f1_score": f1,
+                        "cv_mean": cv_mean,
+                        "cv_std": cv_std,
+                        "combined_score": combined_score,
+                        "latency_ms_single": cost['latency_ms_single'],
+                        "latency_ms_batch": cost['latency_ms_batch'],
+                        "size_bytes": cost['size_bytes'],
+                        "memory_bytes": cost['memory_bytes']
+                    },
+                    model=model
+                )
             
             print(f"   Accuracy:      {accuracy:.4f}")
             print(f"   F1-Score:      {f1:.4f}")
             print(f"   CV Mean:       {cv_mean:.4f} (+/- {cv_std:.4f})")
             print(f"   Combined:      {combined_score:.4f}")
+            print(f"   Latence:       {cost['latency_ms_single']:.3f} ms/ligne, "
+                  f"{cost['latency_ms_batch']:.1f} ms/lot de {cost['batch_rows']}")
             
             # Stocker les résultats
             results.append({
@@ -123,27 +190,36 @@ def train_and_compare_models(X_train, y_train, X_test, y_test, experiment_name="
                 'f1_score': f1,
                 'cv_mean': cv_mean,
                 'cv_std': cv_std,
-                'combined_score': combined_score
+                'combined_score': combined_score,
+                'serving': cost
             })
-            
-            # Garder le meilleur
-            if combined_score > best_score:
-                best_score = combined_score
-                best_model = model
-                best_model_name = model_name
-            
-            if use_mlflow:
-                mlflow_context.__exit__(None, None, None)
                     
         except Exception as e:
             print(f"   ❌ Erreur: {e}")
-            if use_mlflow and 'mlflow_context' in locals():
-                try:
-                    mlflow_context.__exit__(None, None, None)
-                except:
-                    pass
             continue
     
+    if cache:
+        stats = cache.evict()
+        print(f"\n♻️  Cache des entraînements: {cache.hits} repris, {cache.misses} calculé(s), "
+              f"{stats['entries']} entrée(s) ({stats['size_bytes'] / 1024 / 1024:.1f} Mo), "
+              f"{stats['removed']} retirée(s)")
+    
+    # Choisir le meilleur: score combiné et coût de service (SELECTION_OBJECTIVE)
+    if results:
+        selected, selection = model_selection.select(results)
+        model_selection.print_costs(results, selection)
+        selected['selection'] = selection
+        best_model, best_model_name = selected['model'], selected['model_name']
+        best_score = selected['combined_score']
+        tracker.log_run(
+            f"model_selection_{datetime.now().strftime('%Y%m%d_%H%M%S')}",
+            params={k: v for k, v in selection.items() if not isinstance(v, list)},
+            tags={'pareto_front': ','.join(selection.get('pareto_front', []))}
+        )
+    
+    if own_tracker:
+        tracker.flush()
+    
     print("\n" + "="*60)
     print(f"🏆 MEILLEUR MODÈLE: {best_model_name}")
     print(f"   Score combiné: {best_score:.4f}")
@@ -151,6 +227,23 @@ def train_and_compare_models(X_train, y_train, X_test, y_test, experiment_name="
     
     return best_model, best_model_name, results
 
+def prune_best_model(model, result, X_train, y_train, X_test, y_test):
+    """
+    Élague la forêt retenue (src/forest_pruning.py): sélection des arbres hors
+    du sac. accuracy, f1_score et combined_score restent ceux de la forêt
+    complète (cohérents avec cv_mean); les métriques de test de la forêt
+    élaguée, celle qui est servie, sont ajoutées (pruned_accuracy, pruned_f1_score)
+    """
+    print("\n🌲 Élagage de la forêt...")
+    pruned, report = forest_pruning.prune_forest(model, X_train, y_train, X_test=X_test, y_test=y_test)
+    forest_pruning.print_report(report)
+    
+    y_pred = pruned.predict(X_test)
+    result = dict(result, model=pruned, pruning=report,
+                  pruned_accuracy=accuracy_score(y_test, y_pred),
+                  pruned_f1_score=f1_score(y_test, y_pred, average='weighted'))
+    return pruned, result
+
 def compare_with_production(new_accuracy):
     """Compare le nouveau modèle avec celui en production"""
     
@@ -166,7 +259,8 @@ def compare_with_production(new_accuracy):
         with open(prod_metrics_path, 'r') as f:
             prod_metrics = json.load(f)
         
-        prod_accuracy = prod_metrics.get('accuracy', 0)
+        # Accuracy du modèle servi (forêt élaguée le cas échéant)
+        prod_accuracy = prod_metrics.get('pruned_accuracy', prod_metrics.get('accuracy', 0))
         improvement = new_accuracy - prod_accuracy
         
         print(f"   Production:  {prod_accuracy:.4f}")
@@ -187,18 +281,21 @@ def compare_with_production(new_accuracy):
         print(f"⚠️  Erreur lecture métriques production: {e}")
         return True, new_accuracy
 
-def deploy_to_prediction_interface(model, model_name, metrics):
+def deploy_to_prediction_interface(model, model_name, metrics, X_check):
     """
     Déploie le modèle vers l'interface de prédiction
+    (X_check: lignes de vérification de parité de la forêt compacte)
     """
     print("\n📦 Déploiement vers l'interface de prédiction...")
     
     os.makedirs('models', exist_ok=True)
     
     # 1. Sauvegarder le nouveau modèle comme candidat
+    # (blob adressé par contenu, models/candidate_model.pkl est un lien vers ce blob)
     candidate_path = 'models/candidate_model.pkl'
-    joblib.dump(model, candidate_path)
-    print(f"   ✅ Candidat sauvegardé: {candidate_path}")
+    registry = ModelRegistry()
+    candidate = registry.publish(model, candidate_path, 'candidate')
+    print(f"   ✅ Candidat sauvegardé: {candidate_path} ({candidate['version']})")
     
     # 2. Sauvegarder les métriques du candidat
     candidate_metrics = {
@@ -210,27 +307,47 @@ def deploy_to_prediction_interface(model, model_name, metrics):
         'combined_score': metrics['combined_score'],
         'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
     }
+    # Coût de service mesuré à la sélection, règle de sélection et gains de
+    # l'élagage (arbres, taille, latence) à côté des métriques
+    for key in ('pruned_accuracy', 'pruned_f1_score', 'serving', 'selection', 'pruning'):
+        if key in metrics:
+            candidate_metrics[key] = metrics[key]
     
     with open('models/candidate_metrics.json', 'w') as f:
         json.dump(candidate_metrics, f, indent=2)
+    registry.register(candidate_path, metrics=candidate_metrics)
     print(f"   ✅ Métriques sauvegardées: models/candidate_metrics.json")
     
     # 3. Comparer avec production
-    should_deploy, improvement = compare_with_production(metrics['accuracy'])
+    should_deploy, improvement = compare_with_production(metrics.get('pruned_accuracy', metrics['accuracy']))
     
     if should_deploy:
-        # 4. Promouvoir le candidat en production
+        # 4. Promouvoir le candidat en production (remplacement atomique du lien, sans copie)
         production_path = 'models/model.pkl'
-        shutil.copy(candidate_path, production_path)
+        registry.promote('serving', candidate['id'], production_path)
+        registry.gc()
         print(f"   ✅ Modèle déployé en production: {production_path}")
         
+        # Forêt compacte servie à la place du pickle (float32, indices int16/int32)
+        compact = export_sidecar(model, production_path, candidate['sha256'], X_check)
+        if compact:
+            print(f"   ✅ Forêt compacte: {compact['path']} ({compact['size_bytes'] / 1024:.1f} Ko, "
+                  f"pickle: {candidate['size'] / 1024:.1f} Ko)")
+        
+        # Export ONNX vérifié (interface de prédiction avec SERVING_BACKEND=onnx)
+        exported = onnx_model.export_sidecar(model, production_path, candidate['sha256'], X_check)
+        if exported:
+            print(f"   ✅ Modèle ONNX: {exported['path']} ({exported['size_bytes'] / 1024:.1f} Ko, "
+                  f"écart max des probabilités {exported['max_proba_diff']:.1e})")
+        
         # 5. Mettre à jour les métriques de production
         with open('models/production_metrics.json', 'w') as f:
             json.dump(candidate_metrics, f, indent=2)
         
-        # 6. Mettre à jour la date d'entraînement
+        # 6. Mettre à jour la date d'entraînement et la version des données
         with open('models/last_training_date.txt', 'w') as f:
             f.write(datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
+        record_version('data/googleplaystore_clean.csv')
         
         print("   ✅ Modèle prêt pour l'interface de prédiction!")
         print("   ℹ️  Rechargez le modèle dans l'interface: http://localhost:5003")
@@ -239,335 +356,49 @@ def deploy_to_prediction_interface(model, model_name, metrics):
         print("   ⚠️  Modèle non déployé (pas d'amélioration suffisante)")
         return False
 
-def prepare_for_gcp_deployment(model, model_name, metrics):
+def prepare_for_gcp_deployment(model, model_name, metrics, X_check):
     """
-    Prépare les fichiers pour le déploiement sur Google Cloud
+    Prépare le paquet de service versionné pour Google Cloud Run
+    (src/serving_bundle.py), puis mesure son démarrage (BUNDLE_MEASURE)
     """
     print("\n☁️  Préparation pour Google Cloud Platform...")
     
-    gcp_dir = 'deployment_gcp'
-    os.makedirs(gcp_dir, exist_ok=True)
+    gcp_dir = BUNDLE_DIR
+    manifest = build_bundle(model, model_name, metrics, gcp_dir, X_check)
+    print(f"   ✅ Modèle ({manifest['model']['format']}): {gcp_dir}/{manifest['model']['file']} "
+          f"({manifest['model']['size_bytes'] / 1024:.1f} Ko)")
+    print(f"   ✅ app.py, features.py, serving.py, compact_forest.py copiés")
+    print(f"   ✅ requirements.txt: {', '.join(manifest['requirements'])}")
+    print(f"   ✅ Dockerfile ({manifest['base_image']}, bytecode précompilé)")
+    print(f"   ✅ manifest.json: version {manifest['version']}")
     
-    # 1. Copier le modèle
-    model_path = os.path.join(gcp_dir, 'model.pkl')
-    joblib.dump(model, model_path)
-    print(f"   ✅ Modèle copié: {model_path}")
-    
-    # 2. Créer app.py pour GCP
-    app_content = f'''"""
-Application Flask pour Google Cloud Run
-Modèle: {model_name}
-"""
-
-import os
-import joblib
-import pandas as pd
-import numpy as np
-from flask import Flask, request, jsonify
-from flask_cors import CORS
-import logging
-
-logging.basicConfig(level=logging.INFO)
-logger = logging.getLogger(__name__)
-
-app = Flask(__name__)
-CORS(app)
-
-PORT = int(os.getenv("PORT", 8080))
-
-# Charger le modèle
-logger.info("Loading model...")
-try:
-    model = joblib.load('model.pkl')
-    logger.info("✅ Model loaded successfully")
-except Exception as e:
-    logger.error(f"❌ Failed to load model: {{str(e)}}")
-    model = None
-
-@app.route("/", methods=["GET"])
-def home():
-    return jsonify({{
-        "service": "Google Play Store Success Predictor",
-        "model": "{model_name}",
-        "accuracy": {metrics['accuracy']:.4f},
-        "status": "running" if model else "error",
-        "endpoints": {{
-            "health": "/health",
-            "predict": "/predict (POST)"
-        }}
-    }})
-
-@app.route("/health", methods=["GET"])
-def health():
-    if model:
-        return jsonify({{"status": "healthy", "model_loaded": True}}), 200
-    else:
-        return jsonify({{"status": "unhealthy", "model_loaded": False}}), 503
-
-@app.route("/predict", methods=["POST"])
-def predict():
-    try:
-        if not model:
-            return jsonify({{"error": "Model not loaded"}}), 503
-        
-        data = request.get_json()
-        
-        if not data:
-            return jsonify({{"error": "No data provided"}}), 400
-        
-        # Créer DataFrame avec Rating et Reviews
-        df = pd.DataFrame({{
-            'Rating': [float(data.get('rating', 0))],
-            'Reviews': [float(data.get('reviews', 0))]
-        }})
-        
-        prediction = model.predict(df)[0]
-        
+    if MEASURE_MODE != 'off':
         try:
-            proba = model.predict_proba(df)[0]
-            confidence = float(max(proba) * 100)
-        except:
-            confidence = 75.0
-        
-        return jsonify({{
-            'success': True,
-            'prediction': int(prediction),
-            'result': '✅ SUCCÈS' if prediction == 1 else '❌ ÉCHEC',
-            'confidence': round(confidence, 2)
-        }})
-        
-    except Exception as e:
-        logger.error(f"Prediction error: {{str(e)}}")
-        return jsonify({{"error": str(e)}}), 500
-
-if __name__ == "__main__":
-    app.run(host="0.0.0.0", port=PORT, debug=False)
-'''
-    
-    with open(os.path.join(gcp_dir, 'app.py'), 'w') as f:
-        f.write(app_content)
-    print(f"   ✅ app.py créé pour GCP")
-    
-    # 3. Créer requirements.txt
-    requirements = '''Flask==2.3.3
-flask-cors==4.0.0
-pandas==2.0.3
-numpy==1.24.3
-scikit-learn==1.3.0
-joblib==1.3.2
-gunicorn==21.2.0
-'''
-    
-    with open(os.path.join(gcp_dir, 'requirements.txt'), 'w') as f:
-        f.write(requirements)
-    print(f"   ✅ requirements.txt créé")
-    
-    # 4. Créer Dockerfile optimisé
-    dockerfile = '''FROM python:3.8-slim
-
-ENV PYTHONUNBUFFERED=True
-ENV PORT=8080
-
-WORKDIR /app
-
-COPY requirements.txt .
-RUN pip install --no-cache-dir -r requirements.txt
-
-COPY app.py .
-COPY model.pkl .
-
-EXPOSE 8080
-
-CMD exec gunicorn --bind :$PORT --workers 1 --threads 8 --timeout 0 app:app
-'''
-    
-    with open(os.path.join(gcp_dir, 'Dockerfile'), 'w') as f:
-        f.write(dockerfile)
-    print(f"   ✅ Dockerfile créé")
-    
-    # 5. Créer .dockerignore
-    dockerignore = '''__pycache__
-*.pyc
-*.pyo
-*.pyd
-.Python
-*.log
-.git
-.gitignore
-README.md
-'''
-    
-    with open(os.path.join(gcp_dir, '.dockerignore'), 'w') as f:
-        f.write(dockerignore)
-    
-    # 6. Créer script de déploiement
-    deploy_script = f'''#!/bin/bash
-# Script de déploiement Google Cloud Run
-
-set -e
-
-echo "🚀 Déploiement sur Google Cloud Run"
-echo "===================================="
-
-# Configuration
-PROJECT_ID="your-project-id"  # À MODIFIER
-REGION="europe-west1"
-SERVICE_NAME="playstore-predictor"
-IMAGE_NAME="gcr.io/$PROJECT_ID/$SERVICE_NAME"
-
-echo "📋 Configuration:"
-echo "   Project: $PROJECT_ID"
-echo "   Region: $REGION"
-echo "   Service: $SERVICE_NAME"
-echo ""
-
-# Vérifier gcloud
-if ! command -v gcloud &> /dev/null; then
-    echo "❌ gcloud CLI non installé"
-    echo "   Installer: https://cloud.google.com/sdk/docs/install"
-    exit 1
-fi
-
-# 1. Build l'image Docker
-echo "🔨 Build de l'image Docker..."
-docker build -t $IMAGE_NAME .
-
-# 2. Push vers Google Container Registry
-echo "📤 Push vers GCR..."
-docker push $IMAGE_NAME
-
-# 3. Déployer sur Cloud Run
-echo "🚀 Déploiement sur Cloud Run..."
-gcloud run deploy $SERVICE_NAME \\
-    --image $IMAGE_NAME \\
-    --platform managed \\
-    --region $REGION \\
-    --allow-unauthenticated \\
-    --memory 512Mi \\
-    --cpu 1 \\
-    --max-instances 10 \\
-    --port 8080
-
-echo ""
-echo "✅ Déploiement terminé!"
-echo ""
-echo "🌐 URL du service:"
-gcloud run services describe $SERVICE_NAME --region $REGION --format "value(status.url)"
-echo ""
-echo "📊 Informations:"
-echo "   Modèle: {model_name}"
-echo "   Accuracy: {metrics['accuracy']:.4f}"
-echo "   Déployé le: $(date)"
-'''
-    
-    deploy_path = os.path.join(gcp_dir, 'deploy.sh')
-    with open(deploy_path, 'w') as f:
-        f.write(deploy_script)
-    os.chmod(deploy_path, 0o755)
-    print(f"   ✅ Script de déploiement créé: {deploy_path}")
-    
-    # 7. Créer README
-    readme = f'''# Déploiement Google Cloud Run
-
-## Modèle
-- **Nom**: {model_name}
-- **Accuracy**: {metrics['accuracy']:.4f}
-- **F1-Score**: {metrics['f1_score']:.4f}
-- **Date**: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
-
-## Déploiement Local (Test)
-
-```bash
-# Build l'image
-docker build -t playstore-predictor .
-
-# Tester localement
-docker run -p 8080:8080 playstore-predictor
-
-# Tester l'API
-curl http://localhost:8080/health
-curl -X POST http://localhost:8080/predict \\
-  -H "Content-Type: application/json" \\
-  -d '{{"rating": 4.5, "reviews": 10000}}'
-```
-
-## Déploiement sur Google Cloud
-
-### Prérequis
-1. Compte Google Cloud Platform
-2. gcloud CLI installé
-3. Projet GCP créé
-
-### Étapes
-
-1. **Configurer gcloud**
-```bash
-gcloud auth login
-gcloud config set project YOUR_PROJECT_ID
-```
-
-2. **Modifier deploy.sh**
-Éditer `deploy.sh` et remplacer `YOUR_PROJECT_ID`
-
-3. **Déployer**
-```bash
-./deploy.sh
-```
-
-4. **Tester**
-```bash
-# L'URL sera affichée après le déploiement
-curl https://your-service-url.run.app/health
-```
-
-## API Endpoints
-
-- `GET /` - Informations sur le service
-- `GET /health` - Health check
-- `POST /predict` - Faire une prédiction
-
-### Exemple de prédiction
-
-```bash
-curl -X POST https://your-service-url.run.app/predict \\
-  -H "Content-Type: application/json" \\
-  -d '{{
-    "rating": 4.5,
-    "reviews": 10000
-  }}'
-```
-
-Réponse:
-```json
-{{
-  "success": true,
-  "prediction": 1,
-  "result": "✅ SUCCÈS",
-  "confidence": 95.5
-}}
-```
-
-## Coûts
-
-Google Cloud Run facture uniquement l'utilisation:
-- Gratuit jusqu'à 2M requêtes/mois
-- ~$0.40 pour 1M requêtes supplémentaires
-
-## Support
-
-Documentation: https://cloud.google.com/run/docs
-'''
-    
-    with open(os.path.join(gcp_dir, 'README.md'), 'w') as f:
-        f.write(readme)
-    print(f"   ✅ README créé")
+            report = measure_bundle(gcp_dir, docker=MEASURE_MODE == 'docker')
+            print_bundle_report(report)
+        except Exception as e:
+            print(f"   ⚠️  Mesure du démarrage non disponible: {e}")
     
     print(f"\n✅ Préparation GCP terminée!")
     print(f"   📁 Dossier: {gcp_dir}/")
     print(f"   📝 Modifiez {gcp_dir}/deploy.sh avec votre PROJECT_ID")
     print(f"   🚀 Puis exécutez: cd {gcp_dir} && ./deploy.sh")
 
-def main():
+def get_spark(backend):
+    """Démarre Spark si demandé (retour au backend local si indisponible)"""
+    if backend != 'spark':
+        return None
+    try:
+        from spark_backend import get_spark_session
+        spark = get_spark_session()
+        print(f"⚡ Backend Spark: {spark.sparkContext.master}")
+        return spark
+    except Exception as e:
+        print(f"⚠️ Spark non disponible: {e}")
+        print("   Continuation avec le backend local...")
+        return None
+
+def main(backend=os.environ.get('TRAINING_BACKEND', 'sklearn')):
     """Pipeline principal"""
     
     print("="*60)
@@ -575,22 +406,31 @@ def main():
     print("   Docker + Comparaison + Déploiement + GCP")
     print("="*60)
     
+    spark = get_spark(backend)
+    tracker = AsyncTracker(MLFLOW_TRACKING_URI, "google-playstore-ci-cd")
+    
     # 1. Charger les données
-    X, y, df = load_data()
+    with profiler.stage('load_data'):
+        X, y, df, feature_pipeline = load_data(spark)
     
     # 2. Split
-    X_train, X_test, y_train, y_test = train_test_split(
-        X, y, test_size=0.2, random_state=42, stratify=y
-    )
+    with profiler.stage('split'):
+        X_train, X_test, y_train, y_test, rows_train, _ = train_test_split(
+            X, y, row_fingerprints(df), test_size=0.2, random_state=42, stratify=y
+        )
     
     print(f"\n📊 Split train/test:")
     print(f"   Train: {len(X_train)} samples")
     print(f"   Test:  {len(X_test)} samples")
     
     # 3. Entraîner et comparer les modèles
-    best_model, best_model_name, results = train_and_compare_models(
-        X_train, y_train, X_test, y_test
-    )
+    with profiler.stage('train_and_compare'):
+        best_model, best_model_name, results = train_and_compare_models(
+            X_train, y_train, X_test, y_test, spark=spark, tracker=tracker
+        )
+    
+    if spark is not None:
+        spark.stop()
     
     if best_model is None:
         print("❌ Aucun modèle n'a pu être entraîné")
@@ -599,11 +439,38 @@ def main():
     # 4. Obtenir les métriques du meilleur modèle
     best_result = [r for r in results if r['model_name'] == best_model_name][0]
     
+    # Élaguer la forêt (FOREST_PRUNING=0 pour désactiver)
+    if forest_pruning.ENABLED and forest_pruning.supports(best_model):
+        try:
+            with profiler.stage('pruning'):
+                best_model, best_result = prune_best_model(
+                    best_model, best_result, X_train, y_train, X_test, y_test
+                )
+        except ValueError as e:
+            print(f"⚠️ Élagage impossible: {e}")
+            print("   Continuation avec la forêt complète...")
+    
+    # Sérialiser le pipeline de features et les lignes d'entraînement avec le modèle
+    feature_pipeline.attach(best_model)
+    attach_training_rows(best_model, rows_train)
+    
     # 5. Déployer vers l'interface de prédiction
-    deployed = deploy_to_prediction_interface(best_model, best_model_name, best_result)
+    with profiler.stage('deploy'):
+        deployed = deploy_to_prediction_interface(best_model, best_model_name, best_result, X_test)
     
     # 6. Préparer pour Google Cloud (toujours, même si pas déployé en production)
-    prepare_for_gcp_deployment(best_model, best_model_name, best_result)
+    with profiler.stage('gcp_artifacts'):
+        prepare_for_gcp_deployment(best_model, best_model_name, best_result, X_test)
+    
+    # Envoi des runs d'entraînement, mesuré avant d'écrire le rapport de temps
+    with profiler.stage('mlflow_flush'):
+        tracker.flush()
+    
+    # Rapport de temps (JSON + métriques MLflow)
+    profiler.print_summary()
+    profiler.write_report()
+    tracker.log_run('pipeline_timings', metrics=profiler.mlflow_metrics(), artifacts=[TIMINGS_PATH])
+    tracker.flush()
     
     # 7. Résumé final
     print("\n" + "="*60)
@@ -613,6 +480,9 @@ def main():
     print(f"   Accuracy:  {best_result['accuracy']:.4f}")
     print(f"   F1-Score:  {best_result['f1_score']:.4f}")
     print(f"   CV Mean:   {best_result['cv_mean']:.4f}")
+    if 'pruned_accuracy' in best_result:
+        print(f"   Élaguée:   {best_result['pruned_accuracy']:.4f} "
+              f"({best_result['pruning']['trees_after']} arbres)")
     
     if deployed:
         print(f"\n✅ Modèle déployé en production")
@@ -633,4 +503,10 @@ def main():
     print("\n" + "="*60)
 
 if __name__ == '__main__':
-    main()
+    parser = argparse.ArgumentParser(description='Pipeline ML complet')
+    parser.add_argument('--backend', choices=['sklearn', 'spark'],
+                        default=os.environ.get('TRAINING_BACKEND', 'sklearn'),
+                        help="Backend d'entraînement (spark: SPARK_MASTER, local[*] par défaut)")
+    args = parser.parse_args()
+    
+    main(args.backend)
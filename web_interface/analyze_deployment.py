@@ -4,10 +4,16 @@ Script pour analyser les résultats du déploiement MLOps
 """
 
 import os
+import sys
 import json
-import pickle
 from datetime import datetime
 
+# Modules partagés du pipeline (../src)
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '../src'))
+from tail_reader import tail_lines
+from model_card import read_card
+from model_registry import open_read_only
+
 def analyze_deployment():
     """Analyse le modèle déployé et ses métriques"""
     
@@ -21,38 +27,53 @@ def analyze_deployment():
     print("📦 MODÈLES DISPONIBLES:")
     print("-" * 80)
     
-    if os.path.exists(models_dir):
+    registry = open_read_only(models_dir)
+    versions = registry.versions() if registry else []
+    
+    if versions:
+        # Versions connues du registre, avec leurs étapes
+        stages = registry.stages()
+        for record in versions:
+            labels = [stage for stage, version_id in stages.items() if version_id == record['id']]
+            print(f"  ✅ {record['version']}{' [' + ', '.join(labels) + ']' if labels else ''}")
+            print(f"     Type: {record['model_type'] or 'inconnu (pas de fiche)'}")
+            print(f"     Taille: {record['size'] / 1024:.1f} KB")
+            print(f"     Fichier: {record['path']}")
+            print(f"     SHA-256: {record['sha256'][:16]}")
+            print(f"     Créé: {datetime.fromisoformat(record['created_at']).strftime('%Y-%m-%d %H:%M:%S')}")
+            
+            if 'production' in labels:
+                print(f"     🚀 MODÈLE EN PRODUCTION")
+                
+                if 'n_estimators' in record['card']:
+                    print(f"     Paramètres: n_estimators={record['card']['n_estimators']}")
+                if 'max_depth' in record['card']:
+                    print(f"                 max_depth={record['card']['max_depth']}")
+            print()
+    elif os.path.exists(models_dir):
         for file in sorted(os.listdir(models_dir)):
             if file.endswith('.pkl'):
                 file_path = os.path.join(models_dir, file)
                 size = os.path.getsize(file_path)
                 mtime = datetime.fromtimestamp(os.path.getmtime(file_path))
                 
-                # Charger le modèle pour voir le type
-                try:
-                    with open(file_path, 'rb') as f:
-                        model = pickle.load(f)
-                    model_type = type(model).__name__
-                    
-                    print(f"  ✅ {file}")
-                    print(f"     Type: {model_type}")
-                    print(f"     Taille: {size / 1024:.1f} KB")
-                    print(f"     Modifié: {mtime.strftime('%Y-%m-%d %H:%M:%S')}")
-                    
-                    # Si c'est le modèle de production, afficher plus de détails
-                    if 'production' in file:
-                        print(f"     🚀 MODÈLE EN PRODUCTION")
-                        
-                        # Essayer d'obtenir les paramètres
-                        if hasattr(model, 'n_estimators'):
-                            print(f"     Paramètres: n_estimators={model.n_estimators}")
-                        if hasattr(model, 'max_depth'):
-                            print(f"                 max_depth={model.max_depth}")
-                    print()
+                # Type et paramètres depuis la fiche du modèle
+                card = read_card(file_path) or {}
+                
+                print(f"  ✅ {file}")
+                print(f"     Type: {card.get('model_type', 'inconnu (pas de fiche)')}")
+                print(f"     Taille: {size / 1024:.1f} KB")
+                print(f"     Modifié: {mtime.strftime('%Y-%m-%d %H:%M:%S')}")
+                
+                # Si c'est le modèle de production, afficher plus de détails
+                if 'production' in file:
+                    print(f"     🚀 MODÈLE EN PRODUCTION")
                     
-                except Exception as e:
-                    print(f"  ⚠️  {file} (erreur de lecture: {e})")
-                    print()
+                    if 'n_estimators' in card:
+                        print(f"     Paramètres: n_estimators={card['n_estimators']}")
+                    if 'max_depth' in card:
+                        print(f"                 max_depth={card['max_depth']}")
+                print()
     else:
         print("  ❌ Dossier models/ non trouvé")
     
@@ -99,11 +120,9 @@ def analyze_deployment():
     print("-" * 80)
     
     if os.path.exists(logs_file):
-        with open(logs_file, 'r') as f:
-            lines = f.readlines()
-            # Afficher les 10 dernières lignes
-            for line in lines[-10:]:
-                print(f"  {line.strip()}")
+        # Afficher les 10 dernières lignes
+        for line in tail_lines(logs_file, 10):
+            print(f"  {line.strip()}")
     else:
         print("  ℹ️  Aucun log de déploiement trouvé")
     
@@ -4,17 +4,36 @@ Interface Web pour Ajouter des Nouvelles Applications
 Permet aux utilisateurs d'ajouter des apps sans modifier le CSV manuellement
 """
 
-from flask import Flask, render_template, request, jsonify, redirect, url_for
+from flask import Flask, render_template, request, jsonify, redirect, url_for, send_from_directory
 import pandas as pd
 import os
+import sys
 from datetime import datetime
 import logging
 
+# Modules partagés du pipeline (../src)
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '../src'))
+from app_store import AppStore
+from app_index import AppIndex
+from bulk_upload import ingest_upload, validate_chunk
+from dataset_stats import DatasetStats
+from tail_reader import tail_csv
+
 app = Flask(__name__)
 
 # Configuration
 DATA_FILE = os.path.join(os.path.dirname(__file__), '../data/googleplaystore_clean.csv')
 LOG_FILE = os.path.join(os.path.dirname(__file__), '../logs/data_additions.log')
+REJECTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '../reports/upload_rejects')
+
+# Store d'ingestion: ajouts en SQLite, compactés périodiquement dans DATA_FILE
+store = AppStore(DATA_FILE)
+
+# Index haché des noms normalisés (détection de doublons sans relire le dataset)
+app_index = AppIndex(os.path.join(os.path.dirname(DATA_FILE), 'app_index.bin'), source=store.app_names)
+
+# Agrégats du dataset mis à jour à chaque compaction (pas de relecture du CSV)
+dataset_stats = DatasetStats(DATA_FILE)
 
 # Logging
 logging.basicConfig(
@@ -26,12 +45,13 @@ logging.basicConfig(
 @app.route('/')
 def index():
     """Page d'accueil avec formulaire"""
-    # Lire les statistiques actuelles
+    # Lire les statistiques actuelles (CSV + ajouts en attente, sans compaction)
     try:
-        df = pd.read_csv(DATA_FILE)
+        dataset_stats.refresh()
+        summary = dataset_stats.summary(store.pending_rows())
         stats = {
-            'total_apps': len(df),
-            'total_categories': df['Category'].nunique() if 'Category' in df.columns else 0,
+            'total_apps': summary['total_apps'],
+            'total_categories': summary['total_categories'],
             'last_update': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
         }
     except Exception as e:
@@ -68,22 +88,27 @@ def add_app():
                 'message': 'Le nom et la catégorie sont obligatoires'
             }), 400
         
-        # Lire le CSV existant
-        df = pd.read_csv(DATA_FILE)
+        # Normalisation au schéma du dataset propre (mêmes règles que l'upload en masse)
+        accepted, rejects = validate_chunk(pd.DataFrame([app_data], dtype=str))
+        if not rejects.empty:
+            return jsonify({
+                'success': False,
+                'message': f"Données invalides: {rejects['errors'].iloc[0]}"
+            }), 400
+        app_data = accepted.iloc[0].to_dict()
         
-        # Vérifier si l'app existe déjà
-        if app_data['App'] in df['App'].values:
+        # Vérifier si l'app existe déjà (casse et espaces ignorés)
+        # puis ajouter dans le store (l'index unique sur App reste la garantie finale)
+        if app_index.contains(app_data['App']) or not store.add(app_data):
             return jsonify({
                 'success': False,
                 'message': f"L'application '{app_data['App']}' existe déjà"
             }), 400
+        app_index.add(app_data['App'])
         
-        # Ajouter la nouvelle ligne
-        new_row = pd.DataFrame([app_data])
-        df = pd.concat([df, new_row], ignore_index=True)
-        
-        # Sauvegarder
-        df.to_csv(DATA_FILE, index=False)
+        # Compaction périodique vers le CSV canonique
+        if store.maybe_compact():
+            dataset_stats.refresh()
         
         # Logger
         logging.info(f"Nouvelle app ajoutée: {app_data['App']} - Catégorie: {app_data['Category']}")
@@ -91,7 +116,7 @@ def add_app():
         return jsonify({
             'success': True,
             'message': f"Application '{app_data['App']}' ajoutée avec succès!",
-            'total_apps': len(df)
+            'total_apps': store.count()
         })
         
     except Exception as e:
@@ -112,27 +137,23 @@ def bulk_upload():
         if file.filename == '':
             return jsonify({'success': False, 'message': 'Nom de fichier vide'}), 400
         
-        # Lire le CSV uploadé
-        new_apps_df = pd.read_csv(file)
-        
-        # Lire le CSV existant
-        existing_df = pd.read_csv(DATA_FILE)
+        # Lecture par blocs, validation et ajout par lots (rejets dans un rapport)
+        new_count, report = ingest_upload(file.stream, store, app_index, reports_dir=REJECTS_DIR)
+        if store.maybe_compact():
+            dataset_stats.refresh()
         
-        # Fusionner (éviter les doublons)
-        combined_df = pd.concat([existing_df, new_apps_df], ignore_index=True)
-        combined_df = combined_df.drop_duplicates(subset=['App'], keep='first')
+        logging.info(f"Upload en masse: {new_count} nouvelles apps ajoutées, {report.rejected} rejetées")
         
-        # Sauvegarder
-        combined_df.to_csv(DATA_FILE, index=False)
-        
-        new_count = len(combined_df) - len(existing_df)
-        
-        logging.info(f"Upload en masse: {new_count} nouvelles apps ajoutées")
+        message = f'{new_count} nouvelles applications ajoutées!'
+        if report.rejected:
+            message += f' ({report.rejected} lignes rejetées)'
         
         return jsonify({
             'success': True,
-            'message': f'{new_count} nouvelles applications ajoutées!',
-            'total_apps': len(combined_df)
+            'message': message,
+            'total_apps': store.count(),
+            'rejected': report.rejected,
+            'rejects_report': url_for('upload_report', upload_id=report.upload_id) if report.rejected else None
         })
         
     except Exception as e:
@@ -142,18 +163,25 @@ def bulk_upload():
             'message': f'Erreur: {str(e)}'
         }), 500
 
+@app.route('/upload_report/<upload_id>')
+def upload_report(upload_id):
+    """Télécharger le rapport des lignes rejetées d'un upload"""
+    return send_from_directory(REJECTS_DIR, f'{upload_id}.csv', as_attachment=True)
+
 @app.route('/stats')
 def stats():
     """Retourne les statistiques en JSON"""
     try:
-        df = pd.read_csv(DATA_FILE)
+        # Lecture seule: la compaction est faite par les routes d'ajout (maybe_compact)
+        dataset_stats.refresh()
+        summary = dataset_stats.summary(store.pending_rows())
         
         stats_data = {
-            'total_apps': len(df),
-            'categories': df['Category'].value_counts().to_dict() if 'Category' in df.columns else {},
-            'avg_rating': float(df['Rating'].mean()) if 'Rating' in df.columns else 0,
-            'total_reviews': int(df['Reviews'].sum()) if 'Reviews' in df.columns else 0,
-            'free_vs_paid': df['Type'].value_counts().to_dict() if 'Type' in df.columns else {}
+            'total_apps': summary['total_apps'],
+            'categories': summary['categories'],
+            'avg_rating': summary['avg_rating'],
+            'total_reviews': summary['total_reviews'],
+            'free_vs_paid': summary['free_vs_paid']
         }
         
         return jsonify(stats_data)
@@ -166,9 +194,8 @@ def stats():
 def recent_additions():
     """Voir les dernières applications ajoutées"""
     try:
-        df = pd.read_csv(DATA_FILE)
-        # Les 10 dernières lignes (plus récentes)
-        recent = df.tail(10).to_dict('records')
+        # Les 10 dernières lignes: fin du fichier puis ajouts en attente (plus récents)
+        recent = (tail_csv(DATA_FILE, 10) + store.pending_rows(10))[-10:]
         return jsonify({'recent_apps': recent})
     except Exception as e:
         return jsonify({'error': str(e)}), 500